@@ -1,3 +1,13 @@
+import os
+
+# Connection pool of the async engine the API serves requests with (see
+# database.py). Each backend process holds up to pool size + overflow
+# connections, so keep processes x that below Postgres' max_connections.
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+DB_POOL_TIMEOUT = 30  # seconds a request waits for a free connection
+DB_ECHO = os.getenv('DB_ECHO', 'false').lower() == 'true'  # log every SQL statement
+
 # List of required tables
 REQUIRED_TABLES = {
     'wb_projects': ['project_id'],
@@ -12,4 +22,62 @@ REQUIRED_TABLES = {
     'wb_loan_statements': [],
     'wb_procurement_notices': [],
     'wb_financial_intermediary_funds_contributions': []
-}
\ No newline at end of file
+}
+
+# Materialized views maintained by the pipeline for saved queries marked
+# with the `-- @materialize` directive (see pipeline/src/materializer.py)
+MATERIALIZED_VIEW_PREFIX = 'mv_'
+MATERIALIZED_VIEW_ROW_ID = 'mv_row_id'
+
+# Run history written by the pipeline (see pipeline/src/run_history.py)
+PIPELINE_RUNS_TABLE = 'pipeline_runs'
+PIPELINE_RUN_STAGES_TABLE = 'pipeline_run_stages'
+
+# Project relationship edges scraped by the pipeline (see pipeline/src/enrichment.py),
+# served from an in-memory index that is reloaded after this many seconds
+PROJECT_RELATIONSHIPS_TABLE = 'wb_project_relationships'
+PROJECT_GRAPH_REFRESH_SECONDS = 300
+
+# Paging of the table list endpoints (see services/table_pages). Pages are
+# ordered by the REQUIRED_TABLES keys (NULLs last), ties broken by row address,
+# and continue from an opaque cursor.
+LIST_PAGE_DEFAULT_LIMIT = 100
+LIST_PAGE_MAX_LIMIT = 5000
+
+# Columns each list endpoint can filter on. All are indexed by the pipeline
+# (TABLE_INDEXES in pipeline/src/config.py), so keep the two in step.
+LIST_FILTER_COLUMNS = {
+    'wb_projects': ['project_id', 'country', 'region', 'project_status'],
+    'wb_project_themes': ['project_id'],
+    'wb_project_sectors': ['project_id'],
+    'wb_project_geo_locations': ['project_id'],
+    'wb_project_financers': ['project'],
+    'wb_credit_statements': ['credit_number', 'project_id', 'country_code'],
+    'wb_contract_awards': ['project_id', 'wb_contract_number', 'supplier_id', 'borrower_country_code']
+}
+
+# Streaming exports of the list endpoint tables (see services/table_export)
+EXPORT_BATCH_ROWS = 5000
+EXPORT_MEDIA_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+# Response cache of the list and /query endpoints (see services/response_cache).
+# Entries are keyed by the data versions the pipeline bumps after every load,
+# so they never go stale; the versions themselves are re-read at most this often.
+DATA_VERSIONS_TABLE = 'pipeline_data_versions'
+DATA_VERSION_CHECK_SECONDS = 1
+RESPONSE_CACHE_MAX_ENTRIES = 512
+RESPONSE_CACHE_MAX_BYTES = 256 * 1024 * 1024
+# Optional Redis shared by all backend replicas, e.g. redis://redis:6379/0
+RESPONSE_CACHE_REDIS_URL = os.getenv('RESPONSE_CACHE_REDIS_URL')
+RESPONSE_CACHE_REDIS_TTL = 24 * 3600  # entries of superseded versions are never read again
+
+# Binary response formats of the list and /query endpoints and table exports
+# (see services/arrow_format), chosen with ?format= or the Accept header
+ARROW_MEDIA_TYPES = {
+    'arrow': 'application/vnd.apache.arrow.stream',
+    'parquet': 'application/vnd.apache.parquet'
+}
+ARROW_BATCH_ROWS = 65536  # rows per record batch (Parquet row group) of streamed results
@@ -1,9 +1,12 @@
+import re
 import time
 from sqlalchemy import create_engine, inspect
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.exc import OperationalError, SQLAlchemyError
 import logging
 import os
+from app.config import DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_ECHO
 
 logger = logging.getLogger(__name__)
 
@@ -43,24 +46,46 @@ def wait_for_db_and_tables(engine, required_tables, max_retries=30, retry_interv
     missing_tables = set(required_tables) - set(inspector.get_table_names())
     raise RuntimeError(f"Database tables not ready after {max_retries} retries. Missing tables: {missing_tables}")
 
-# Create the database engine with more detailed logging
+# Create the database engine
 DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL environment variable is not set")
 
 engine = create_engine(
     DATABASE_URL,
-    echo=True,  # Enable SQL logging
+    echo=DB_ECHO,  # SQL logging, off unless DB_ECHO=true
     pool_pre_ping=True  # Enable connection health checks
 )
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def async_database_url(url: str) -> str:
+    """The same database through the asyncpg driver"""
+    return re.sub(r'^postgres(?:ql)?(?:\+\w+)?://', 'postgresql+asyncpg://', url)
+
+# Async engine the API serves requests with, so concurrent requests overlap
+# their database waits instead of holding a worker thread each
+async_engine = create_async_engine(
+    async_database_url(DATABASE_URL),
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_pre_ping=True,
+    echo=DB_ECHO
+)
+
+AsyncSessionLocal = sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 def get_db():
     """Dependency for getting database sessions"""
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    """Dependency for getting async database sessions"""
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,10 +1,24 @@
 import logging
-from fastapi import FastAPI, Depends, HTTPException, Body
+from typing import Any, AsyncIterator, Callable, List, Optional
+from fastapi import FastAPI, Depends, HTTPException, Body, Query, Request
 from sqlalchemy import text
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
-from .database import get_db
+from .database import get_async_db, AsyncSessionLocal, async_engine
+from .config import MATERIALIZED_VIEW_ROW_ID, LIST_PAGE_DEFAULT_LIMIT, LIST_PAGE_MAX_LIMIT, ARROW_MEDIA_TYPES
+from .services.sql_query import SQLQueryService
+from .services.pipeline_runs import PipelineRunService
+from .services.project_graph import ProjectGraphService
+from .services.table_pages import TablePageService
+from .services.table_export import TableExportService
+from .services.response_cache import DataVersionService, ResponseCache, cache_key, etag_for, etag_matches
+from .services.arrow_format import encode_records, negotiate_format, table_schema
+from .utils.serialization import render_json
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from pathlib import Path
 from .models import (
@@ -32,6 +46,15 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Saved queries are served from their materialized views when available
+query_service = SQLQueryService("/app/queries")
+pipeline_run_service = PipelineRunService()
+project_graph_service = ProjectGraphService()
+table_page_service = TablePageService()
+table_export_service = TableExportService(async_engine)
+data_version_service = DataVersionService()
+response_cache = ResponseCache()
+
 # Create a single FastAPI instance with metadata
 app = FastAPI(
     title="World Bank Projects API",
@@ -47,81 +70,295 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# JSON responses are compressed for clients that accept gzip
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 @app.on_event("startup")
 async def startup_event():
-    """Log when the application starts up"""
+    """Log when the application starts up and build the project graph index"""
     logger.info("Starting up FastAPI application...")
+    try:
+        async with AsyncSessionLocal() as db:
+            await db.run_sync(project_graph_service.load)
+    except Exception as e:
+        logger.error(f"Could not build the project graph index: {str(e)}")
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Log when the application shuts down"""
     logger.info("Shutting down FastAPI application...")
+    await async_engine.dispose()
 
-@app.get("/projects/")
-def get_projects(db: Session = Depends(get_db)):
-    """Get all World Bank projects"""
+async def cached_response(request: Request, db: AsyncSession, tables: Optional[List[str]],
+                          build: Callable[[Session], Any], render: Callable[[Any], bytes] = render_json,
+                          media_type: str = "application/json") -> Response:
+    """
+    Serve a response from the response cache, keyed by the request, its
+    media type and the data version of the tables it reads (None: any table).
+    A client holding the current ETag gets a 304 without the response being built.
+
+    The services are synchronous code; run_sync runs them on the async
+    session, so their queries still go through asyncpg without blocking the
+    event loop. Encoding runs on the threadpool for the same reason.
+    """
+    version = await db.run_sync(data_version_service.version_of, tables)
+    if version is None:
+        # No version recorded yet, so there is nothing to invalidate the entry with
+        return Response(await run_in_threadpool(render, await db.run_sync(build)), media_type=media_type)
+
+    key = cache_key(request.url.path, request.query_params.multi_items(), version, media_type)
+    headers = {"ETag": etag_for(key), "Cache-Control": "no-cache", "Vary": "Accept"}
+    if etag_matches(request.headers.get("if-none-match", ""), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    body = response_cache.get(key)
+    if body is None:
+        body = await run_in_threadpool(render, await db.run_sync(build))
+        response_cache.put(key, body)
+    return Response(body, media_type=media_type, headers=headers)
+
+async def prime_stream(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    Run a stream up to its first chunk, so a failing query raises before the
+    response has started instead of cutting the body short.
+    """
     try:
-        return db.query(WbProjects).all()
-    except SQLAlchemyError as e:
-        logger.error(f"Database error in get_projects: {str(e)}")
-        raise HTTPException(status_code=500, detail="Database error occurred")
+        first = await chunks.__anext__()
+    except StopAsyncIteration:
+        first = b''
 
-@app.get("/sectors/")
-def get_sectors(db: Session = Depends(get_db)):
-    """Get all project sectors"""
+    async def stream():
+        yield first
+        async for chunk in chunks:
+            yield chunk
+    return stream()
+
+LIST_PARAMS = {'limit', 'cursor', 'fields', 'format'}
+
+async def list_table_page(name: str, model, request: Request, limit: int, cursor: Optional[str],
+                          fields: Optional[str], db: AsyncSession):
+    """
+    Serve one page of a list endpoint as JSON, or as Arrow or Parquet when the
+    Accept header or a format parameter asks for it (the next cursor is then
+    in the schema metadata). Every other query parameter is a filter.
+    """
+    filters = {key: value for key, value in request.query_params.items() if key not in LIST_PARAMS}
+    build = lambda session: table_page_service.list_page(
+        session, model, limit=limit, cursor=cursor, fields=fields, filters=filters
+    )
     try:
-        return db.query(WbProjectSectors).all()
+        format = negotiate_format(request.query_params.get('format'), request.headers.get('accept', ''))
+        if format == 'json':
+            return await cached_response(request, db, [model.__tablename__], build)
+
+        render = lambda page: encode_records(page['fields'], page['data'], format,
+                                             metadata={'next_cursor': page['nextCursor'] or ''},
+                                             schema=table_schema(model.__table__, page['fields']))
+        return await cached_response(request, db, [model.__tablename__], build, render, ARROW_MEDIA_TYPES[format])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except SQLAlchemyError as e:
-        logger.error(f"Database error in get_sectors: {str(e)}")
+        logger.error(f"Database error in {name}: {str(e)}")
         raise HTTPException(status_code=500, detail="Database error occurred")
 
+@app.get("/projects/")
+async def get_projects(
+    request: Request,
+    limit: int = Query(LIST_PAGE_DEFAULT_LIMIT, ge=1, le=LIST_PAGE_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Page through World Bank projects"""
+    return await list_table_page("get_projects", WbProjects, request, limit, cursor, fields, db)
+
+@app.get("/sectors/")
+async def get_sectors(
+    request: Request,
+    limit: int = Query(LIST_PAGE_DEFAULT_LIMIT, ge=1, le=LIST_PAGE_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Page through project sectors"""
+    return await list_table_page("get_sectors", WbProjectSectors, request, limit, cursor, fields, db)
+
 @app.get("/themes/")
-def get_themes(db: Session = Depends(get_db)):
-    """Get all project themes"""
-    try:
-        return db.query(WbProjectThemes).all()
-    except SQLAlchemyError as e:
-        logger.error(f"Database error in get_themes: {str(e)}")
-        raise HTTPException(status_code=500, detail="Database error occurred")
+async def get_themes(
+    request: Request,
+    limit: int = Query(LIST_PAGE_DEFAULT_LIMIT, ge=1, le=LIST_PAGE_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Page through project themes"""
+    return await list_table_page("get_themes", WbProjectThemes, request, limit, cursor, fields, db)
 
 @app.get("/contract_awards/")
-def get_contract_awards(db: Session = Depends(get_db)):
-    """Get all contract awards"""
+async def get_contract_awards(
+    request: Request,
+    limit: int = Query(LIST_PAGE_DEFAULT_LIMIT, ge=1, le=LIST_PAGE_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Page through contract awards"""
+    return await list_table_page("get_contract_awards", WbContractAwards, request, limit, cursor, fields, db)
+
+@app.get("/credit_statements/")
+async def get_credit_statements(
+    request: Request,
+    limit: int = Query(LIST_PAGE_DEFAULT_LIMIT, ge=1, le=LIST_PAGE_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Page through credit statements"""
+    return await list_table_page("get_credit_statements", WbCreditStatements, request, limit, cursor, fields, db)
+
+@app.get("/financers/")
+async def get_financers(
+    request: Request,
+    limit: int = Query(LIST_PAGE_DEFAULT_LIMIT, ge=1, le=LIST_PAGE_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Page through project financers"""
+    return await list_table_page("get_financers", WbProjectFinancers, request, limit, cursor, fields, db)
+
+@app.get("/geo_locations/")
+async def get_geo_locations(
+    request: Request,
+    limit: int = Query(LIST_PAGE_DEFAULT_LIMIT, ge=1, le=LIST_PAGE_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Page through project geographical locations"""
+    return await list_table_page("get_geo_locations", WbProjectGeoLocations, request, limit, cursor, fields, db)
+
+# Tables of the list endpoints by the name they are exported under
+EXPORT_MODELS = {
+    'projects': WbProjects,
+    'sectors': WbProjectSectors,
+    'themes': WbProjectThemes,
+    'contract_awards': WbContractAwards,
+    'credit_statements': WbCreditStatements,
+    'financers': WbProjectFinancers,
+    'geo_locations': WbProjectGeoLocations
+}
+
+@app.get("/export/{dataset}")
+async def export_dataset(
+    dataset: str,
+    request: Request,
+    format: str = "ndjson",
+    fields: Optional[str] = None
+):
+    """Stream a whole table as NDJSON, CSV, Arrow or Parquet; other query parameters filter it like the list endpoints"""
+    if dataset not in EXPORT_MODELS:
+        raise HTTPException(status_code=404, detail=f"Unknown dataset: {dataset}")
+    filters = {key: value for key, value in request.query_params.items() if key not in {'format', 'fields'}}
     try:
-        return db.query(WbContractAwards).all()
+        media_type, chunks = table_export_service.export(EXPORT_MODELS[dataset], format, fields=fields, filters=filters)
+        chunks = await prime_stream(chunks)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except SQLAlchemyError as e:
-        logger.error(f"Database error in get_contract_awards: {str(e)}")
+        logger.error(f"Database error in export_dataset: {str(e)}")
         raise HTTPException(status_code=500, detail="Database error occurred")
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{dataset}.{format}"'}
+    )
 
-@app.get("/credit_statements/")
-def get_credit_statements(db: Session = Depends(get_db)):
-    """Get all credit statements"""
+@app.get("/pipeline_runs/")
+async def list_pipeline_runs(
+    limit: int = Query(20, ge=1, le=500),
+    status: str = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """List recent pipeline runs with their totals, newest first"""
     try:
-        return db.query(WbCreditStatements).all()
+        return await db.run_sync(lambda session: pipeline_run_service.list_runs(session, limit=limit, status=status))
     except SQLAlchemyError as e:
-        logger.error(f"Database error in get_credit_statements: {str(e)}")
+        logger.error(f"Database error in list_pipeline_runs: {str(e)}")
         raise HTTPException(status_code=500, detail="Database error occurred")
 
-@app.get("/financers/")
-def get_financers(db: Session = Depends(get_db)):
-    """Get all project financers"""
+@app.get("/pipeline_runs/compare")
+async def compare_pipeline_runs(base_run_id: int, target_run_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Compare two pipeline runs stage by stage"""
     try:
-        return db.query(WbProjectFinancers).all()
+        return {
+            "base_run_id": base_run_id,
+            "target_run_id": target_run_id,
+            "stages": await db.run_sync(pipeline_run_service.compare_runs, base_run_id, target_run_id)
+        }
     except SQLAlchemyError as e:
-        logger.error(f"Database error in get_financers: {str(e)}")
+        logger.error(f"Database error in compare_pipeline_runs: {str(e)}")
         raise HTTPException(status_code=500, detail="Database error occurred")
 
-@app.get("/geo_locations/")
-def get_geo_locations(db: Session = Depends(get_db)):
-    """Get all project geographical locations"""
+@app.get("/pipeline_runs/{run_id}")
+async def get_pipeline_run(run_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Get one pipeline run with its fetch, transform and load stages"""
     try:
-        return db.query(WbProjectGeoLocations).all()
+        run = await db.run_sync(pipeline_run_service.get_run, run_id)
     except SQLAlchemyError as e:
-        logger.error(f"Database error in get_geo_locations: {str(e)}")
+        logger.error(f"Database error in get_pipeline_run: {str(e)}")
         raise HTTPException(status_code=500, detail="Database error occurred")
+    if run is None:
+        raise HTTPException(status_code=404, detail=f"Pipeline run {run_id} not found")
+    return run
+
+@app.get("/project_graph/stats")
+async def get_project_graph_stats(db: AsyncSession = Depends(get_async_db)):
+    """Size of the project relationship graph"""
+    await db.run_sync(project_graph_service.ensure_loaded)
+    return project_graph_service.stats()
+
+@app.get("/project_graph/components")
+async def list_project_graph_components(
+    min_size: int = Query(2, ge=1),
+    limit: int = Query(50, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Largest groups of projects connected through any relationship"""
+    await db.run_sync(project_graph_service.ensure_loaded)
+    return project_graph_service.list_components(min_size=min_size, limit=limit)
+
+@app.get("/projects/{project_id}/parents")
+async def get_project_parents(project_id: str, db: AsyncSession = Depends(get_async_db)):
+    """Parent chain of a project, from its direct parent up to the root"""
+    await db.run_sync(project_graph_service.ensure_loaded)
+    return {"project_id": project_id, "parents": project_graph_service.parent_chain(project_id)}
+
+@app.get("/projects/{project_id}/children")
+async def get_project_children(project_id: str, db: AsyncSession = Depends(get_async_db)):
+    """Projects whose parent is this project"""
+    await db.run_sync(project_graph_service.ensure_loaded)
+    return {"project_id": project_id, "children": project_graph_service.children_of(project_id)}
+
+@app.get("/projects/{project_id}/associated")
+async def get_project_associated(project_id: str, db: AsyncSession = Depends(get_async_db)):
+    """Cluster of projects linked to this one through associated-project links"""
+    await db.run_sync(project_graph_service.ensure_loaded)
+    return {"project_id": project_id, "associated": project_graph_service.associated_cluster(project_id)}
+
+@app.get("/projects/{project_id}/component")
+async def get_project_component(project_id: str, db: AsyncSession = Depends(get_async_db)):
+    """Every project connected to this one through any relationship"""
+    await db.run_sync(project_graph_service.ensure_loaded)
+    return {"project_id": project_id, "component": project_graph_service.component(project_id)}
+
+@app.get("/response_cache/stats")
+async def get_response_cache_stats():
+    """Size and hit rate of the response cache"""
+    return response_cache.stats()
 
 @app.get("/health")
-def health_check():
+async def health_check():
     """Basic health check endpoint"""
     try:
         return {"status": "healthy", "message": "API is running normally"}
@@ -130,12 +367,28 @@ def health_check():
         raise HTTPException(status_code=500, detail="Health check failed")
     
 @app.get("/query/{query_path:path}")
-async def execute_query(query_path: str, db: Session = Depends(get_db)):
-    """Execute a SQL query from the queries directory and return results."""
+async def execute_query(
+    query_path: str,
+    request: Request,
+    format: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Execute a SQL query from the queries directory and return results, as
+    JSON or, when the Accept header or format asks for it, as an Arrow IPC
+    stream or Parquet file streamed from the cursor in record batches.
+    """
     try:
-        query_service = SQLQueryService()
-        results = query_service.execute_query(db, query_path)
-        return results
+        format = negotiate_format(format, request.headers.get('accept', ''))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        if format != 'json':
+            sql = await db.run_sync(query_service.resolve_query, query_path)
+            media_type, chunks = table_export_service.export_query(sql, format)
+            return StreamingResponse(await prime_stream(chunks), media_type=media_type)
+        # A saved query may read any table, so any load invalidates its cached result
+        return await cached_response(request, db, None, lambda session: query_service.execute_query(session, query_path))
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
@@ -166,7 +419,7 @@ async def list_queries():
 @app.post("/execute_query")
 async def execute_query(
     request: QueryRequest,  # Changed from query_path: str = Body(...)
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Execute a SQL query from file and return the results"""
     try:
@@ -185,25 +438,26 @@ async def execute_query(
             logger.error(f"Invalid query path: {query_file}")
             raise HTTPException(status_code=403, detail="Invalid query path")
 
-        # Read and execute query
-        with open(query_file, 'r') as f:
-            query_text = f.read()
-            logger.info(f"Executing query: {query_text[:100]}...")  # Log first 100 chars of query
-            query = text(query_text)
+        # Read and execute query, using its materialized view when the pipeline has built one
+        query_text = await db.run_sync(query_service.resolve_query, request.query_path)
+        logger.info(f"Executing query: {query_text[:100]}...")  # Log first 100 chars of query
+        query = text(query_text)
             
-        result = db.execute(query)
+        result = await db.execute(query)
         
         # Convert to list of dicts for JSON response
-        columns = result.keys()
-        rows = [dict(zip(columns, row)) for row in result.fetchall()]
+        keys = list(result.keys())
+        columns = [col for col in keys if col != MATERIALIZED_VIEW_ROW_ID]
+        positions = [keys.index(col) for col in columns]
+        rows = [{col: row[i] for col, i in zip(columns, positions)} for row in result.fetchall()]
         
         logger.info(f"Query executed successfully. Returning {len(rows)} rows")
         
-        return {
+        return Response(await run_in_threadpool(render_json, {
             "columns": list(columns),
             "rows": rows,
             "total_rows": len(rows)
-        }
+        }), media_type="application/json")
         
     except Exception as e:
         logger.error(f"Error executing query: {str(e)}")
@@ -1,4 +1,15 @@
 from .google_drive import GoogleDriveService
+from .sql_query import SQLQueryService
+from .pipeline_runs import PipelineRunService
+from .project_graph import ProjectGraphService
+from .table_pages import TablePageService
+from .table_export import TableExportService
+from .response_cache import DataVersionService, ResponseCache
+from .arrow_format import RecordBatchEncoder
 
 # Export only what should be used by other parts of the application
-__all__ = ['GoogleDriveService']
\ No newline at end of file
+__all__ = [
+    'GoogleDriveService', 'SQLQueryService', 'PipelineRunService', 'ProjectGraphService',
+    'TablePageService', 'TableExportService', 'DataVersionService', 'ResponseCache',
+    'RecordBatchEncoder'
+]
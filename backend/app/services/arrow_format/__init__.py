@@ -0,0 +1,4 @@
+from .service import RecordBatchEncoder, encode_records, negotiate_format, table_schema
+
+# Export only the encoder and its helpers
+__all__ = ['RecordBatchEncoder', 'encode_records', 'negotiate_format', 'table_schema']
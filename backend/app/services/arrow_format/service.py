@@ -0,0 +1,130 @@
+import io
+from decimal import Decimal
+from uuid import UUID
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import Boolean, Date, DateTime, Float, Integer, Numeric
+from typing import Any, Dict, List, Optional, Sequence
+from app.config import ARROW_MEDIA_TYPES
+
+def negotiate_format(format: Optional[str], accept: str) -> str:
+    """
+    The response format of a request: an explicit `format` parameter, else
+    the first Arrow or Parquet media type in the Accept header, else json.
+    """
+    if format:
+        if format != 'json' and format not in ARROW_MEDIA_TYPES:
+            raise ValueError(f"Unknown format {format}; use one of: json, {', '.join(ARROW_MEDIA_TYPES)}")
+        return format
+    for media_range in accept.split(','):
+        media_type = media_range.split(';')[0].strip().lower()
+        for name, known in ARROW_MEDIA_TYPES.items():
+            if media_type == known:
+                return name
+    return 'json'
+
+def arrow_type(column_type) -> pa.DataType:
+    """Arrow type of a SQLAlchemy column type; anything unknown is sent as text."""
+    for sql_type, type_ in ((Boolean, pa.bool_()), (DateTime, pa.timestamp('us')), (Date, pa.date32()),
+                            (Integer, pa.int64()), (Float, pa.float64()), (Numeric, pa.float64())):
+        if isinstance(column_type, sql_type):
+            return type_
+    return pa.string()
+
+def table_schema(table, names: List[str]) -> pa.Schema:
+    """Schema of the given columns of a table, the same for every page whatever its values."""
+    return pa.schema([pa.field(name, arrow_type(table.c[name].type)) for name in names])
+
+def text_value(value: Any) -> str:
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+def column_array(values: List[Any], field: Optional[pa.Field] = None) -> pa.Array:
+    """
+    One column of a batch. Without a field the type is inferred; Decimals
+    become doubles (as in the JSON responses), UUIDs strings and all-null
+    columns strings. With a field the values are converted to its type.
+    """
+    first = next((value for value in values if value is not None), None)
+    if isinstance(first, Decimal):
+        values = [None if value is None else float(value) for value in values]
+    elif isinstance(first, UUID):
+        values = [None if value is None else str(value) for value in values]
+
+    if field is None:
+        array = pa.array(values)
+        return array.cast(pa.string()) if pa.types.is_null(array.type) else array
+    if pa.types.is_string(field.type) and first is not None and not isinstance(first, str):
+        # Text columns of tables, or a column that was all nulls when the schema was inferred
+        values = [None if value is None else text_value(value) for value in values]
+    return pa.array(values, type=field.type)
+
+class _Sink(io.RawIOBase):
+    """Write-only buffer the Arrow writers write to, drained after every batch."""
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.buffer += data
+        return len(data)
+
+    def drain(self) -> bytes:
+        data, self.buffer = bytes(self.buffer), bytearray()
+        return data
+
+class RecordBatchEncoder:
+    """
+    Encodes rows as an Arrow IPC stream or a Parquet file, one record batch
+    (or row group) per write, so a cursor can be streamed batch by batch.
+    Without a `schema` it is inferred from the first batch; `metadata` is
+    stored in it.
+    """
+
+    def __init__(self, names: List[str], format: str, metadata: Optional[Dict[str, str]] = None,
+                 schema: Optional[pa.Schema] = None):
+        self.names = names
+        self.format = format
+        self.metadata = metadata
+        self.schema: Optional[pa.Schema] = None
+        self._sink = _Sink()
+        self._writer = None
+        if schema is not None:
+            self._open(schema)
+
+    def write(self, rows: Sequence[Sequence[Any]]) -> bytes:
+        """Encode a batch of rows (tuples in the order of names) and return the bytes it produced."""
+        if not rows:
+            return b''
+        columns = [list(column) for column in zip(*rows)]
+        if self.schema is None:
+            arrays = [column_array(values) for values in columns]
+            self._open(pa.schema([pa.field(name, array.type) for name, array in zip(self.names, arrays)]))
+        else:
+            arrays = [column_array(values, field) for values, field in zip(columns, self.schema)]
+        batch = pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+        self._writer.write_batch(batch)
+        return self._sink.drain()
+
+    def close(self) -> bytes:
+        """Finish the stream or file and return its remaining bytes."""
+        if self._writer is None:
+            # No rows: an empty stream of string columns still carries the names
+            self._open(pa.schema([pa.field(name, pa.string()) for name in self.names]))
+        self._writer.close()
+        return self._sink.drain()
+
+    def _open(self, schema: pa.Schema):
+        self.schema = schema.with_metadata(self.metadata) if self.metadata else schema
+        if self.format == 'parquet':
+            self._writer = pq.ParquetWriter(self._sink, self.schema, compression='zstd')
+        else:
+            self._writer = pa.ipc.new_stream(self._sink, self.schema)
+
+def encode_records(names: List[str], records: List[Dict[str, Any]], format: str,
+                   metadata: Optional[Dict[str, str]] = None, schema: Optional[pa.Schema] = None) -> bytes:
+    """Encode a list of row dicts (e.g. one page of a list endpoint) in one go."""
+    encoder = RecordBatchEncoder(names, format, metadata, schema)
+    return encoder.write([[record[name] for name in names] for record in records]) + encoder.close()
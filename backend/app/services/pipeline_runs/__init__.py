@@ -0,0 +1,4 @@
+from .service import PipelineRunService
+
+# Export only the service class
+__all__ = ['PipelineRunService']
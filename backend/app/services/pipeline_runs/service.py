@@ -0,0 +1,100 @@
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from typing import Dict, Any, List, Optional
+from app.config import PIPELINE_RUNS_TABLE, PIPELINE_RUN_STAGES_TABLE
+
+class PipelineRunService:
+    """Read access to the run history catalog written by the pipeline."""
+
+    def list_runs(self, db: Session, limit: int = 20, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """List the most recent runs with their totals, newest first."""
+        filters = "WHERE r.status = :status" if status else ""
+        params = {"limit": limit, "status": status} if status else {"limit": limit}
+        result = db.execute(
+            text(f"""
+                SELECT
+                    r.run_id, r.started_at, r.finished_at, r.duration_seconds, r.status,
+                    r.datasets, r.tables_loaded, r.tables_failed,
+                    COALESCE(SUM(s.rows) FILTER (WHERE s.stage = 'load' AND s.status = 'success'), 0) AS rows_loaded,
+                    COALESCE(SUM(s.bytes) FILTER (WHERE s.stage = 'fetch'), 0) AS bytes_fetched,
+                    COALESCE(SUM(s.retries), 0) AS retries,
+                    MAX(s.peak_rss_bytes) AS peak_rss_bytes,
+                    COUNT(*) FILTER (WHERE s.status = 'failed') AS failed_stages
+                FROM {PIPELINE_RUNS_TABLE} r
+                LEFT JOIN {PIPELINE_RUN_STAGES_TABLE} s ON s.run_id = r.run_id
+                {filters}
+                GROUP BY r.run_id
+                ORDER BY r.run_id DESC
+                LIMIT :limit
+            """),
+            params
+        )
+        return [dict(row._mapping) for row in result]
+
+    def get_run(self, db: Session, run_id: int) -> Optional[Dict[str, Any]]:
+        """Return one run with all of its fetch, transform and load stages."""
+        run = db.execute(
+            text(f"SELECT * FROM {PIPELINE_RUNS_TABLE} WHERE run_id = :run_id"),
+            {"run_id": run_id}
+        ).first()
+        if run is None:
+            return None
+
+        stages = db.execute(
+            text(f"""
+                SELECT stage, dataset, table_name, started_at, finished_at, duration_seconds,
+                       rows, bytes, retries, failures, peak_rss_bytes, status, error
+                FROM {PIPELINE_RUN_STAGES_TABLE}
+                WHERE run_id = :run_id
+                ORDER BY started_at
+            """),
+            {"run_id": run_id}
+        )
+        return {
+            **dict(run._mapping),
+            "stages": [dict(row._mapping) for row in stages]
+        }
+
+    def compare_runs(self, db: Session, base_run_id: int, target_run_id: int) -> List[Dict[str, Any]]:
+        """
+        Compare two runs stage by stage. Each entry pairs the same step
+        (stage, dataset, table) from both runs with its duration change.
+        """
+        result = db.execute(
+            text(f"""
+                WITH base AS (
+                    SELECT * FROM {PIPELINE_RUN_STAGES_TABLE} WHERE run_id = :base_run_id
+                ),
+                target AS (
+                    SELECT * FROM {PIPELINE_RUN_STAGES_TABLE} WHERE run_id = :target_run_id
+                )
+                SELECT
+                    COALESCE(b.stage, t.stage) AS stage,
+                    COALESCE(b.dataset, t.dataset) AS dataset,
+                    COALESCE(b.table_name, t.table_name) AS table_name,
+                    b.duration_seconds AS base_duration_seconds,
+                    t.duration_seconds AS target_duration_seconds,
+                    t.duration_seconds - b.duration_seconds AS duration_change_seconds,
+                    ROUND(((t.duration_seconds - b.duration_seconds) * 100.0
+                        / NULLIF(b.duration_seconds, 0))::NUMERIC, 2) AS duration_change_percent,
+                    b.rows AS base_rows,
+                    t.rows AS target_rows,
+                    b.rows / NULLIF(b.duration_seconds, 0) AS base_rows_per_second,
+                    t.rows / NULLIF(t.duration_seconds, 0) AS target_rows_per_second,
+                    b.bytes AS base_bytes,
+                    t.bytes AS target_bytes,
+                    b.peak_rss_bytes AS base_peak_rss_bytes,
+                    t.peak_rss_bytes AS target_peak_rss_bytes,
+                    b.status AS base_status,
+                    t.status AS target_status
+                FROM base b
+                FULL OUTER JOIN target t
+                    ON b.stage = t.stage
+                    -- FULL JOIN needs plain equality, so compare NULLs as empty strings
+                    AND COALESCE(b.dataset, '') = COALESCE(t.dataset, '')
+                    AND COALESCE(b.table_name, '') = COALESCE(t.table_name, '')
+                ORDER BY duration_change_seconds DESC NULLS LAST
+            """),
+            {"base_run_id": base_run_id, "target_run_id": target_run_id}
+        )
+        return [dict(row._mapping) for row in result]
@@ -0,0 +1,4 @@
+from .service import ProjectGraphService
+
+# Export only the service class
+__all__ = ['ProjectGraphService']
@@ -0,0 +1,150 @@
+import logging
+import threading
+import time
+from collections import defaultdict
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from app.config import PROJECT_RELATIONSHIPS_TABLE, PROJECT_GRAPH_REFRESH_SECONDS
+
+logger = logging.getLogger(__name__)
+
+def group_components(nodes: Iterable[str], edges: Iterable[Tuple[str, str]]) -> Dict[str, List[str]]:
+    """Union-find over undirected edges; maps every node to its sorted component."""
+    parent: Dict[str, str] = {}
+
+    def find(node):
+        root = node
+        while parent.setdefault(root, root) != root:
+            root = parent[root]
+        while parent[node] != root:
+            parent[node], node = root, parent[node]
+        return root
+
+    for a, b in edges:
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    members = defaultdict(list)
+    for node in nodes:
+        members[find(node)].append(node)
+
+    # Every node of a component shares the same list
+    component_of = {}
+    for group in members.values():
+        group.sort()
+        for node in group:
+            component_of[node] = group
+    return component_of
+
+class ProjectGraphService:
+    """
+    In-memory adjacency index over the project relationship edge table.
+
+    The edges are read once into dictionaries (parent, children, associated
+    cluster and connected component of each project) so traversals are plain
+    lookups instead of SQL over JSON strings. The index is rebuilt when it is
+    older than PROJECT_GRAPH_REFRESH_SECONDS, i.e. shortly after a pipeline run.
+    """
+
+    def __init__(self, refresh_seconds: float = PROJECT_GRAPH_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self.parents: Dict[str, str] = {}
+        self.children: Dict[str, List[str]] = {}
+        self.clusters: Dict[str, List[str]] = {}
+        self.components: Dict[str, List[str]] = {}
+        self.edge_count = 0
+        self.loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def load(self, db: Session) -> int:
+        """Rebuild the index from the edge table and return the number of edges."""
+        try:
+            rows = db.execute(text(
+                f"SELECT project_id, related_id, relation_type FROM {PROJECT_RELATIONSHIPS_TABLE} "
+                f"ORDER BY project_id, related_id"
+            )).fetchall()
+        except SQLAlchemyError as e:
+            # The table only exists once the pipeline has scraped relationships
+            logger.warning(f"Could not load project relationships: {str(e)}")
+            db.rollback()
+            rows = []
+
+        parents, children = {}, defaultdict(list)
+        associated_edges, all_edges, nodes = [], [], set()
+        for project_id, related_id, relation_type in rows:
+            nodes.update((project_id, related_id))
+            all_edges.append((project_id, related_id))
+            if relation_type == 'parent':
+                if project_id not in parents:
+                    parents[project_id] = related_id
+                    children[related_id].append(project_id)
+            elif relation_type == 'associated':
+                associated_edges.append((project_id, related_id))
+
+        clusters = group_components({node for edge in associated_edges for node in edge}, associated_edges)
+        components = group_components(nodes, all_edges)
+
+        # Swap everything in at once so readers never see a half-built index
+        self.parents, self.children = parents, dict(children)
+        self.clusters, self.components = clusters, components
+        self.edge_count = len(rows)
+        self.loaded_at = time.time()
+        logger.info(f"Loaded project graph with {len(nodes)} projects and {len(rows)} relationships")
+        return len(rows)
+
+    def ensure_loaded(self, db: Session):
+        """
+        Load the index on first use and reload it once it is stale. While one
+        request reloads it the others keep reading the current index: requests
+        share the event loop thread, so waiting on the lock would deadlock.
+        """
+        if self.loaded_at is not None and time.time() - self.loaded_at < self.refresh_seconds:
+            return
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            if self.loaded_at is None or time.time() - self.loaded_at >= self.refresh_seconds:
+                self.load(db)
+        finally:
+            self._lock.release()
+
+    def parent_chain(self, project_id: str, max_depth: int = 100) -> List[str]:
+        """Parents of a project from its direct parent up to the root."""
+        chain, seen = [], {project_id}
+        current = self.parents.get(project_id)
+        while current is not None and current not in seen and len(chain) < max_depth:
+            chain.append(current)
+            seen.add(current)
+            current = self.parents.get(current)
+        return chain
+
+    def children_of(self, project_id: str) -> List[str]:
+        return self.children.get(project_id, [])
+
+    def associated_cluster(self, project_id: str) -> List[str]:
+        """Projects linked to this one through associated-project links, directly or not."""
+        return [member for member in self.clusters.get(project_id, []) if member != project_id]
+
+    def component(self, project_id: str) -> List[str]:
+        """Every project connected to this one through any relationship, including itself."""
+        return self.components.get(project_id, [project_id])
+
+    def list_components(self, min_size: int = 2, limit: int = 50) -> List[Dict[str, Any]]:
+        """The largest connected components, largest first."""
+        unique = {id(members): members for members in self.components.values()}.values()
+        largest = sorted((members for members in unique if len(members) >= min_size),
+                         key=lambda members: (-len(members), members[0]))
+        return [{"size": len(members), "projects": members} for members in largest[:limit]]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "projects": len(self.components),
+            "relationships": self.edge_count,
+            "projects_with_parent": len(self.parents),
+            "associated_clusters": len({id(members) for members in self.clusters.values()}),
+            "components": len({id(members) for members in self.components.values()}),
+            "loaded_at": self.loaded_at
+        }
@@ -0,0 +1,4 @@
+from .service import DataVersionService, ResponseCache, cache_key, etag_for, etag_matches
+
+# Export only the services and their key helpers
+__all__ = ['DataVersionService', 'ResponseCache', 'cache_key', 'etag_for', 'etag_matches']
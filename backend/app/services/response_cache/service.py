@@ -0,0 +1,177 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError
+from typing import Dict, Any, Iterable, Optional, Tuple
+from app.config import (
+    DATA_VERSIONS_TABLE,
+    DATA_VERSION_CHECK_SECONDS,
+    RESPONSE_CACHE_MAX_ENTRIES,
+    RESPONSE_CACHE_MAX_BYTES,
+    RESPONSE_CACHE_REDIS_URL,
+    RESPONSE_CACHE_REDIS_TTL
+)
+
+logger = logging.getLogger(__name__)
+
+def cache_key(path: str, params: Iterable[Tuple[str, str]], version: str, media_type: str = "application/json") -> str:
+    """
+    Key of a response: the endpoint, its query parameters in a canonical
+    order, the data version and the media type it is encoded in.
+    """
+    query = '&'.join(f"{name}={value}" for name, value in sorted(params))
+    return f"{path}?{query}#{version}#{media_type}"
+
+def etag_for(key: str) -> str:
+    """
+    Weak ETag of a response: equal keys have equal content, but GZipMiddleware
+    sends that content gzipped or not, so the bytes on the wire can differ.
+    """
+    return 'W/"' + hashlib.sha256(key.encode('utf-8')).hexdigest()[:32] + '"'
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Whether an If-None-Match header names the ETag: '*', or any entry of its
+    comma-separated list under the weak comparison RFC 9110 asks for here.
+    """
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    if '*' in tags:
+        return True
+    opaque = etag[2:] if etag.startswith('W/') else etag
+    return any((tag[2:] if tag.startswith('W/') else tag) == opaque for tag in tags)
+
+class DataVersionService:
+    """
+    Data versions of the tables and materialized views, as bumped by the
+    pipeline after each successful load or refresh. The versions table is
+    re-read at most every DATA_VERSION_CHECK_SECONDS.
+    """
+
+    def __init__(self, check_seconds: float = DATA_VERSION_CHECK_SECONDS):
+        self.check_seconds = check_seconds
+        self.versions: Dict[str, int] = {}
+        self.checked_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def load(self, db: Session) -> Dict[str, int]:
+        try:
+            rows = db.execute(text(f"SELECT table_name, version FROM {DATA_VERSIONS_TABLE}")).fetchall()
+        except SQLAlchemyError as e:
+            # The table only exists once the pipeline has loaded something
+            logger.debug(f"Could not read data versions: {str(e)}")
+            db.rollback()
+            rows = []
+        self.versions = {table_name: version for table_name, version in rows}
+        self.checked_at = time.time()
+        return self.versions
+
+    def current(self, db: Session) -> Dict[str, int]:
+        """
+        The versions, re-read once they are older than check_seconds. Requests
+        arriving during a re-read get the previous versions rather than wait.
+        """
+        if self.checked_at is None or time.time() - self.checked_at >= self.check_seconds:
+            if self._lock.acquire(blocking=False):
+                try:
+                    if self.checked_at is None or time.time() - self.checked_at >= self.check_seconds:
+                        self.load(db)
+                finally:
+                    self._lock.release()
+        return self.versions
+
+    def version_of(self, db: Session, tables: Optional[Iterable[str]] = None) -> Optional[str]:
+        """
+        The version of the given tables, or of all data when tables is None
+        (for queries that may read anything). None when a table has no
+        version yet, in which case its responses must not be cached.
+        """
+        versions = self.current(db)
+        if tables is None:
+            return str(max(versions.values())) if versions else None
+        parts = []
+        for table in tables:
+            if table not in versions:
+                return None
+            parts.append(f"{table}:{versions[table]}")
+        return ','.join(parts)
+
+class ResponseCache:
+    """
+    LRU cache of serialized responses, bounded by entry count and total size,
+    optionally backed by a Redis shared between backend replicas. Keys carry
+    the data version, so entries are never invalidated, only evicted.
+    """
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES, max_bytes: int = RESPONSE_CACHE_MAX_BYTES,
+                 redis_url: Optional[str] = RESPONSE_CACHE_REDIS_URL):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._redis = None
+        if redis_url:
+            try:
+                import redis
+                self._redis = redis.Redis.from_url(redis_url)
+            except ImportError:
+                logger.warning("RESPONSE_CACHE_REDIS_URL is set but the redis package is not installed")
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            body = self.entries.get(key)
+            if body is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return body
+        body = self._shared_get(key)
+        if body is not None:
+            self._store(key, body)
+            self.hits += 1
+        else:
+            self.misses += 1
+        return body
+
+    def put(self, key: str, body: bytes):
+        self._store(key, body)
+        if self._redis is not None:
+            try:
+                self._redis.set(key, body, ex=RESPONSE_CACHE_REDIS_TTL)
+            except Exception as e:
+                logger.warning(f"Could not write to the shared response cache: {str(e)}")
+
+    def _shared_get(self, key: str) -> Optional[bytes]:
+        if self._redis is None:
+            return None
+        try:
+            return self._redis.get(key)
+        except Exception as e:
+            logger.warning(f"Could not read from the shared response cache: {str(e)}")
+            return None
+
+    def _store(self, key: str, body: bytes):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self.entries:
+                self.size -= len(self.entries.pop(key))
+            self.entries[key] = body
+            self.size += len(body)
+            while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self.entries),
+            "bytes": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "shared": self._redis is not None
+        }
@@ -0,0 +1,4 @@
+from .service import SQLQueryService
+
+# Export only the service class
+__all__ = ['SQLQueryService']
@@ -1,8 +1,34 @@
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 import pandas as pd
 from pathlib import Path
 from typing import Dict, Any, Optional
 import os
+import re
+from app.config import MATERIALIZED_VIEW_PREFIX, MATERIALIZED_VIEW_ROW_ID
+
+# Kept in step with pipeline/src/materializer.py (see pipeline/tests/test_materializer.py)
+DIRECTIVE_PATTERN = re.compile(r'^--\s*@(\w+)\s*(?::\s*(.*))?$')
+
+def parse_query_directives(query: str) -> Dict[str, str]:
+    """Read the `-- @key: value` directive comments at the top of a query file."""
+    directives = {}
+    for line in query.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if not line.startswith('--'):
+            break
+        match = DIRECTIVE_PATTERN.match(line)
+        if match:
+            directives[match.group(1).lower()] = (match.group(2) or '').strip()
+    return directives
+
+def get_materialized_view_name(query_path: str) -> str:
+    """Build the view name the pipeline uses for a materialized query file."""
+    name = re.sub(r'\.sql$', '', str(query_path), flags=re.IGNORECASE).lower()
+    name = re.sub(r'[^a-z0-9]+', '_', name).strip('_')
+    return f"{MATERIALIZED_VIEW_PREFIX}{name}"[:63]
 
 class SQLQueryService:
     def __init__(self, queries_dir: str = "queries"):
@@ -18,24 +44,55 @@ class SQLQueryService:
                 
             with open(full_path, 'r') as f:
                 return f.read()
+        except FileNotFoundError:
+            raise
         except Exception as e:
             raise Exception(f"Error loading query {query_path}: {str(e)}")
 
+    def get_materialized_view(self, db: Session, query_path: str, query: str) -> Optional[str]:
+        """
+        Return the materialized view holding the precomputed result of a query
+        marked with `-- @materialize`, or None if it has not been built yet.
+        """
+        if 'materialize' not in parse_query_directives(query):
+            return None
+
+        view_name = get_materialized_view_name(query_path)
+        populated = db.execute(
+            text("SELECT ispopulated FROM pg_matviews WHERE matviewname = :name"),
+            {"name": view_name}
+        ).scalar()
+        return view_name if populated else None
+
+    def resolve_query(self, db: Session, query_path: str) -> str:
+        """
+        Return the SQL to run for a query file: a read of its materialized view
+        when one is available, otherwise the query itself. The view's row ids
+        follow the query's `-- @order_by` directive; without one the order of
+        the view rows is unspecified.
+        """
+        query = self.load_query(query_path)
+        view_name = self.get_materialized_view(db, query_path, query)
+        if view_name:
+            return f"SELECT * FROM {view_name} ORDER BY {MATERIALIZED_VIEW_ROW_ID}"
+        return query
+
     def execute_query(self, db: Session, query_path: str) -> Dict[str, Any]:
         """Execute SQL query and return results as JSON-serializable dictionary."""
         try:
             # Load and execute query
-            query = self.load_query(query_path)
-            result = db.execute(query)
-            
+            query = self.resolve_query(db, query_path)
+            result = db.execute(text(query))
+
             # Convert to DataFrame for easy manipulation
             df = pd.DataFrame(result.fetchall())
             if not df.empty:
                 df.columns = result.keys()
-            
+                df = df.drop(columns=[MATERIALIZED_VIEW_ROW_ID], errors='ignore')
+
             # Convert to dictionary format
             records = df.to_dict('records') if not df.empty else []
-            
+
             # Get column names and types
             columns = [
                 {
@@ -44,12 +101,14 @@ class SQLQueryService:
                 }
                 for col in df.columns
             ] if not df.empty else []
-            
+
             return {
                 "data": records,
                 "columns": columns,
                 "rowCount": len(records)
             }
-            
+
+        except FileNotFoundError:
+            raise
         except Exception as e:
-            raise Exception(f"Error executing query {query_path}: {str(e)}")
\ No newline at end of file
+            raise Exception(f"Error executing query {query_path}: {str(e)}")
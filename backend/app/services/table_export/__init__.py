@@ -0,0 +1,4 @@
+from .service import TableExportService
+
+# Export only the service class
+__all__ = ['TableExportService']
@@ -0,0 +1,94 @@
+import csv
+import io
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from typing import Any, AsyncIterator, List, Mapping, Optional, Sequence, Tuple
+from app.config import EXPORT_BATCH_ROWS, EXPORT_MEDIA_TYPES, ARROW_MEDIA_TYPES, ARROW_BATCH_ROWS, MATERIALIZED_VIEW_ROW_ID
+from app.services.arrow_format import RecordBatchEncoder, table_schema
+from app.services.table_pages import TablePageService
+from app.utils.serialization import render_json
+
+def encode_ndjson(names: List[str], rows: Sequence[Sequence[Any]]) -> bytes:
+    return b''.join(render_json(dict(zip(names, row))) + b'\n' for row in rows)
+
+def encode_csv(names: List[str], rows: Sequence[Sequence[Any]]) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode('utf-8')
+
+class TableExportService:
+    """
+    Streams whole tables as NDJSON, CSV, an Arrow IPC stream or Parquet.
+
+    Rows are read through a server-side cursor EXPORT_BATCH_ROWS at a time
+    and each batch is encoded and handed to the response as soon as it is
+    read, so memory stays flat however large the table is. The export owns
+    its connection, which is released when the stream ends or the client
+    disconnects.
+    """
+
+    def __init__(self, engine: AsyncEngine, batch_rows: int = EXPORT_BATCH_ROWS):
+        self.engine = engine
+        self.batch_rows = batch_rows
+        self.pages = TablePageService()
+
+    def export(
+        self,
+        model,
+        format: str,
+        fields: Optional[str] = None,
+        filters: Optional[Mapping[str, str]] = None
+    ) -> Tuple[str, AsyncIterator[bytes]]:
+        """
+        The media type and body chunks of a table export. Fields and filters
+        work as on the list endpoints; invalid ones and unknown formats raise
+        ValueError here, before anything is streamed.
+        """
+        media_types = {**EXPORT_MEDIA_TYPES, **ARROW_MEDIA_TYPES}
+        if format not in media_types:
+            raise ValueError(f"Unknown format {format}; use one of: {', '.join(media_types)}")
+        query, names, keys = self.pages.build_select(model, fields, filters)
+        if format in ARROW_MEDIA_TYPES:
+            encoder = RecordBatchEncoder(names, format, schema=table_schema(model.__table__, names))
+            return media_types[format], self._stream_batches(query.order_by(*keys), names, encoder)
+        return media_types[format], self._stream(query.order_by(*keys), names, format)
+
+    async def _stream_batches(self, query, names: List[str], encoder: RecordBatchEncoder) -> AsyncIterator[bytes]:
+        """Arrow and Parquet exports: one record batch (row group) per cursor batch."""
+        async for batch in self._batches(query, len(names)):
+            yield encoder.write(batch)
+        yield encoder.close()
+
+    async def _stream(self, query, names: List[str], format: str) -> AsyncIterator[bytes]:
+        encode = encode_csv if format == 'csv' else encode_ndjson
+        if format == 'csv':
+            yield encode_csv(names, [names])
+        async for batch in self._batches(query, len(names)):
+            yield encode(names, batch)
+
+    async def _batches(self, query, width: int) -> AsyncIterator[List[Sequence[Any]]]:
+        async with self.engine.connect() as conn:
+            result = await conn.stream(query.execution_options(yield_per=self.batch_rows))
+            async for batch in result.partitions(self.batch_rows):
+                # Drop the key columns the list endpoints select for their cursor
+                yield [row[:width] for row in batch]
+
+    def export_query(self, sql: str, format: str) -> Tuple[str, AsyncIterator[bytes]]:
+        """
+        The media type and body chunks of a saved query's result as an Arrow
+        IPC stream or Parquet, encoded batch by batch from a server-side
+        cursor. The schema is inferred from the first batch.
+        """
+        if format not in ARROW_MEDIA_TYPES:
+            raise ValueError(f"Unknown format {format}; use one of: {', '.join(ARROW_MEDIA_TYPES)}")
+        return ARROW_MEDIA_TYPES[format], self._stream_query(sql, format)
+
+    async def _stream_query(self, sql: str, format: str) -> AsyncIterator[bytes]:
+        async with self.engine.connect() as conn:
+            result = await conn.stream(text(sql).execution_options(yield_per=ARROW_BATCH_ROWS))
+            keys = list(result.keys())
+            positions = [i for i, key in enumerate(keys) if key != MATERIALIZED_VIEW_ROW_ID]
+            encoder = RecordBatchEncoder([keys[i] for i in positions], format)
+            async for batch in result.partitions(ARROW_BATCH_ROWS):
+                yield encoder.write([[row[i] for i in positions] for row in batch])
+        yield encoder.close()
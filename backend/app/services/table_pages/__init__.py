@@ -0,0 +1,4 @@
+from .service import TablePageService, encode_cursor, decode_cursor
+
+# Export only the service class and its cursor helpers
+__all__ = ['TablePageService', 'encode_cursor', 'decode_cursor']
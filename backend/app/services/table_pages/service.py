@@ -0,0 +1,202 @@
+import base64
+import json
+from sqlalchemy import and_, bindparam, or_, select
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.expression import ColumnElement
+from sqlalchemy.sql.visitors import InternalTraversal
+from sqlalchemy.types import NullType
+from typing import Dict, Any, List, Mapping, Optional, Tuple
+from app.config import REQUIRED_TABLES, LIST_FILTER_COLUMNS, LIST_PAGE_DEFAULT_LIMIT
+
+def encode_cursor(values: List[Any]) -> str:
+    """Opaque cursor holding the key of the last row of a page."""
+    return base64.urlsafe_b64encode(json.dumps(values, default=str).encode()).decode().rstrip('=')
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except ValueError:
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Invalid cursor")
+    return values
+
+def split_list(value: Optional[str]) -> List[str]:
+    return [item.strip() for item in value.split(',') if item.strip()] if value else []
+
+class RowLocator(ColumnElement):
+    """
+    The physical address of a row: ctid in Postgres, rowid in SQLite. The
+    tables are written by pandas without a primary key, so this is what
+    tells rows with equal keys apart. Read as text for the cursor, since
+    drivers disagree on how to return a tid.
+    """
+    inherit_cache = True
+    _traverse_internals = [('table', InternalTraversal.dp_clauseelement),
+                           ('as_text', InternalTraversal.dp_boolean)]
+    type = NullType()
+
+    def __init__(self, table, as_text: bool = False):
+        self.table = table
+        self.as_text = as_text
+
+class RowLocatorValue(ColumnElement):
+    """A row address taken from a cursor, to compare a RowLocator with."""
+    inherit_cache = True
+    _traverse_internals = [('value', InternalTraversal.dp_clauseelement)]
+    type = NullType()
+
+    def __init__(self, value: Any):
+        self.value = bindparam('row_locator', value)
+
+@compiles(RowLocator)
+def compile_row_locator(element, compiler, **kw):
+    return f"{compiler.preparer.format_table(element.table)}.rowid"
+
+@compiles(RowLocator, 'postgresql')
+def compile_row_locator_postgresql(element, compiler, **kw):
+    ctid = f"{compiler.preparer.format_table(element.table)}.ctid"
+    return f"CAST({ctid} AS TEXT)" if element.as_text else ctid
+
+@compiles(RowLocatorValue)
+def compile_row_locator_value(element, compiler, **kw):
+    return compiler.process(element.value, **kw)
+
+@compiles(RowLocatorValue, 'postgresql')
+def compile_row_locator_value_postgresql(element, compiler, **kw):
+    # Bound as text: asyncpg would otherwise expect a (block, offset) tuple for a tid
+    return f"CAST(CAST({compiler.process(element.value, **kw)} AS TEXT) AS tid)"
+
+def after_key(keys: List[Any], values: List[Any], locator, locator_value):
+    """
+    Rows that sort after the given key values in the (key NULLS LAST, ...,
+    row address) order. Spelled out column by column, since a row comparison
+    such as (a, b) > (1, NULL) is NULL and would drop the rows with NULL keys.
+    """
+    condition = locator > RowLocatorValue(locator_value)
+    for key, value in reversed(list(zip(keys, values))):
+        if value is None:
+            # Only NULLs follow a NULL
+            condition = and_(key.is_(None), condition)
+        else:
+            condition = or_(key > value, key.is_(None), and_(key == value, condition))
+    return condition
+
+def ranges_after_key(keys: List[Any], values: List[Any], locator, locator_value) -> List[Any]:
+    """
+    The rows after_key selects, split into ranges of the first key that an
+    index can seek to, in page order: its non-NULL values from the cursor's
+    on, then its NULL tail. OR-ing the two would hide the bound on the first
+    key from the planner and scan from the start of the table on every page.
+    """
+    if not keys:
+        return [locator > RowLocatorValue(locator_value)]
+    first, value = keys[0], values[0]
+    if value is None:
+        # Within the NULL tail the next key takes over
+        return [and_(first.is_(None), condition)
+                for condition in ranges_after_key(keys[1:], values[1:], locator, locator_value)]
+    rest = after_key(keys[1:], values[1:], locator, locator_value)
+    return [
+        and_(first >= value, or_(first > value, and_(first == value, rest))),
+        first.is_(None)
+    ]
+
+class TablePageService:
+    """
+    Keyset pagination over the tables behind the list endpoints.
+
+    Rows are ordered by the table's key from REQUIRED_TABLES (NULLs last),
+    then by row address, since the keys are neither unique nor NOT NULL in
+    the tables pandas writes. Each page continues after the key and address
+    of the previous page's last row: a range of the first key column from
+    the cursor's value on, then (once that runs out) its NULL tail, so a
+    deep page starts from an index lookup on the first key instead of
+    reading and discarding every earlier row as OFFSET does.
+    Rows are read as plain tuples of the requested columns instead of ORM
+    objects. Filters are equality matches (a comma-separated value matches
+    any of its items) on the indexed columns in LIST_FILTER_COLUMNS.
+    """
+
+    def key_columns(self, model) -> List[Any]:
+        table = model.__table__
+        return [table.columns[name] for name in REQUIRED_TABLES[table.name]]
+
+    def order_by(self, model) -> List[Any]:
+        """The order pages (and exports) follow: the key, NULLs last, then the row address."""
+        return [key.asc().nulls_last() for key in self.key_columns(model)] + [RowLocator(model.__table__)]
+
+    def list_page(
+        self,
+        db: Session,
+        model,
+        limit: int = LIST_PAGE_DEFAULT_LIMIT,
+        cursor: Optional[str] = None,
+        fields: Optional[str] = None,
+        filters: Optional[Mapping[str, str]] = None
+    ) -> Dict[str, Any]:
+        """
+        One page of a table as {"data", "fields", "rowCount", "limit",
+        "nextCursor"}; nextCursor is None on the last page. Raises ValueError
+        for unknown fields or filters and malformed cursors.
+        """
+        query, names, keys = self.build_select(model, fields, filters)
+        locator = RowLocator(model.__table__)
+        query = query.add_columns(RowLocator(model.__table__, as_text=True))
+
+        query = query.order_by(*self.order_by(model))
+        if cursor:
+            # The key values of the last row, then its address
+            after = decode_cursor(cursor, len(keys) + 1)
+            ranges = ranges_after_key(keys, after[:-1], locator, after[-1])
+        else:
+            ranges = [None]
+
+        # One row more than asked tells whether another page follows
+        rows = []
+        for condition in ranges:
+            if len(rows) > limit:
+                break
+            page = query if condition is None else query.where(condition)
+            rows.extend(db.execute(page.limit(limit + 1 - len(rows))).fetchall())
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        next_cursor = None
+        if has_more:
+            last = rows[-1]
+            next_cursor = encode_cursor([last._mapping[key.name] for key in keys] + [last[-1]])
+        return {
+            # The requested columns come first in every row
+            "data": [dict(zip(names, row)) for row in rows],
+            "fields": names,
+            "rowCount": len(rows),
+            "limit": limit,
+            "nextCursor": next_cursor
+        }
+
+    def build_select(self, model, fields: Optional[str] = None,
+                     filters: Optional[Mapping[str, str]] = None) -> Tuple[Any, List[str], List[Any]]:
+        """
+        The filtered select of a table's requested columns (all by default)
+        plus its key columns, with the requested names and the key columns.
+        """
+        table = model.__table__
+        keys = self.key_columns(model)
+
+        names = split_list(fields) or [column.name for column in table.columns]
+        unknown = [name for name in names if name not in table.c]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        # The key is read even when not requested, to build the next cursor
+        selected = names + [key.name for key in keys if key.name not in names]
+        query = select(*[table.c[name] for name in selected])
+
+        allowed = LIST_FILTER_COLUMNS.get(table.name, [])
+        for name, value in (filters or {}).items():
+            if name not in allowed:
+                raise ValueError(f"Cannot filter on {name}; filterable columns are: {', '.join(allowed) or 'none'}")
+            values = split_list(value)
+            query = query.where(table.c[name].in_(values) if len(values) > 1 else table.c[name] == value.strip())
+        return query, names, keys
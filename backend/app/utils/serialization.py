@@ -0,0 +1,27 @@
+"""Fast JSON encoding of API responses"""
+import math
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any
+
+import orjson
+
+def json_default(value: Any) -> Any:
+    """
+    Encode what orjson does not support natively: pandas timestamps (a
+    datetime subclass) and NaT, and Decimals as floats like FastAPI does.
+    """
+    if isinstance(value, (datetime, date, time)):
+        # NaT is the one value not equal to itself
+        return None if value != value else value.isoformat()
+    if isinstance(value, Decimal):
+        number = float(value)
+        return number if math.isfinite(number) else None
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def render_json(content: Any) -> bytes:
+    """
+    Encode a response body straight from plain rows with orjson, skipping
+    FastAPI's jsonable_encoder pass. NaN and infinite floats become null.
+    """
+    return orjson.dumps(content, default=json_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
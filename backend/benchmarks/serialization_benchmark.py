@@ -0,0 +1,141 @@
+# backend/benchmarks/serialization_benchmark.py
+"""
+Benchmark of the read endpoints' serialization paths.
+
+For every list endpoint table the same rows are fetched and encoded twice:
+
+- orm: ORM instances from db.query(Model), run through FastAPI's
+  jsonable_encoder and json.dumps, as the endpoints used to do
+- core: row tuples from a Core select turned into dicts and encoded with
+  orjson, as TablePageService and render_json do now
+
+Without --database-url the tables are created in a SQLite file and filled
+with synthetic rows, so the numbers measure Python-side cost only:
+
+    python benchmarks/serialization_benchmark.py --rows 20000 --repeat 3
+    python benchmarks/serialization_benchmark.py --database-url postgresql://... --rows 50000
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import DateTime, create_engine, func, select
+from sqlalchemy.orm import Session
+
+from app.models import (
+    WbProjectFinancers,
+    WbCreditStatements,
+    WbContractAwards,
+    WbProjectGeoLocations,
+    WbProjects,
+    WbProjectThemes,
+    WbProjectSectors
+)
+from app.services.table_pages.service import TablePageService
+from app.utils.serialization import render_json
+
+MODELS = {
+    'projects': WbProjects,
+    'sectors': WbProjectSectors,
+    'themes': WbProjectThemes,
+    'contract_awards': WbContractAwards,
+    'credit_statements': WbCreditStatements,
+    'financers': WbProjectFinancers,
+    'geo_locations': WbProjectGeoLocations
+}
+
+
+def synthetic_rows(model, count: int, rng: random.Random) -> List[Dict[str, Any]]:
+    """Rows with unique keys, text in every string column and dates in the datetime ones"""
+    columns = [column for column in model.__table__.columns]
+    start = datetime(2000, 1, 1)
+    rows = []
+    for i in range(count):
+        row = {}
+        for column in columns:
+            if isinstance(column.type, DateTime):
+                row[column.name] = start + timedelta(days=rng.randint(0, 9000))
+            elif column.primary_key:
+                row[column.name] = f"{column.name[:2].upper()}{i:07d}"
+            else:
+                row[column.name] = ' '.join(rng.choice(['World', 'Bank', 'Project', 'Loan', 'Grant', '1250000.0'])
+                                            for _ in range(rng.randint(1, 6)))
+        rows.append(row)
+    return rows
+
+
+def orm_path(db: Session, model, limit: int) -> bytes:
+    return json.dumps(jsonable_encoder(db.query(model).limit(limit).all())).encode('utf-8')
+
+
+def core_path(db: Session, model, limit: int) -> bytes:
+    return render_json(TablePageService().list_page(db, model, limit=limit))
+
+
+def best_time(path: Callable[[Session, Any, int], bytes], db: Session, model, limit: int, repeat: int):
+    best, size = None, 0
+    for _ in range(repeat):
+        db.expunge_all()
+        start_time = time.perf_counter()
+        size = len(path(db, model, limit))
+        seconds = time.perf_counter() - start_time
+        best = seconds if best is None else min(best, seconds)
+    return best, size
+
+
+def run_serialization_benchmark(engine, rows: int, repeat: int) -> List[Dict[str, Any]]:
+    results = []
+    with Session(engine) as db:
+        for endpoint, model in MODELS.items():
+            count = db.execute(select(func.count()).select_from(model.__table__)).scalar()
+            limit = min(rows, count)
+            if not limit:
+                continue
+            orm_seconds, orm_bytes = best_time(orm_path, db, model, limit, repeat)
+            core_seconds, core_bytes = best_time(core_path, db, model, limit, repeat)
+            results.append({
+                'endpoint': endpoint,
+                'rows': limit,
+                'columns': len(model.__table__.columns),
+                'orm_rows_per_second': round(limit / orm_seconds),
+                'core_rows_per_second': round(limit / core_seconds),
+                'speedup': round(orm_seconds / core_seconds, 2),
+                'orm_bytes': orm_bytes,
+                'core_bytes': core_bytes
+            })
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark ORM and Core serialization of the list endpoints")
+    parser.add_argument('--database-url', help="database with loaded tables (default: synthetic SQLite)")
+    parser.add_argument('--rows', type=int, default=20000, help="rows per endpoint")
+    parser.add_argument('--repeat', type=int, default=3, help="passes per path; the fastest counts")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    if args.database_url:
+        engine = create_engine(args.database_url)
+    else:
+        path = os.path.join(tempfile.mkdtemp(), 'serialization_benchmark.sqlite')
+        engine = create_engine(f"sqlite:///{path}")
+        rng = random.Random(args.seed)
+        for model in MODELS.values():
+            model.__table__.create(engine)
+            with engine.begin() as conn:
+                conn.execute(model.__table__.insert(), synthetic_rows(model, args.rows, rng))
+
+    print(f"{'endpoint':<20}{'rows':>8}{'cols':>6}{'orm rows/s':>14}{'core rows/s':>14}{'speedup':>9}")
+    for result in run_serialization_benchmark(engine, args.rows, args.repeat):
+        print(f"{result['endpoint']:<20}{result['rows']:>8}{result['columns']:>6}"
+              f"{result['orm_rows_per_second']:>14}{result['core_rows_per_second']:>14}{result['speedup']:>8}x")
@@ -0,0 +1,7 @@
+# backend/tests/conftest.py
+"""The backend runs from its own directory, so the tests import `app` from there too."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,33 @@
+# backend/tests/test_response_cache.py
+import pytest
+
+from app.services.response_cache import cache_key, etag_for, etag_matches
+
+ETAG = etag_for(cache_key('/api/projects', [('limit', '10')], '1:2'))
+
+
+def test_etag_is_weak():
+    # The same entry goes out gzipped or not, so its bytes are not fixed
+    assert ETAG.startswith('W/"') and ETAG.endswith('"')
+
+
+@pytest.mark.parametrize('header', [
+    ETAG,
+    ETAG[2:],                                   # the strong form of the same tag
+    f'"other", {ETAG}',
+    f'W/"other",{ETAG[2:]}',
+    '*',
+])
+def test_if_none_match_names_the_etag(header):
+    assert etag_matches(header, ETAG)
+
+
+@pytest.mark.parametrize('header', [
+    '',
+    '"other"',
+    # A prefix or a superstring of the tag is a different tag
+    ETAG[:-2] + '"',
+    f'W/"x{ETAG[3:]}',
+])
+def test_if_none_match_misses_other_etags(header):
+    assert not etag_matches(header, ETAG)
@@ -0,0 +1,79 @@
+# backend/tests/test_table_pages.py
+import pytest
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, insert
+from sqlalchemy.orm import Session
+
+from app.config import LIST_FILTER_COLUMNS, REQUIRED_TABLES
+from app.services.table_pages import TablePageService
+
+metadata = MetaData()
+
+
+class Award:
+    # Like the tables pandas writes: no primary key and nullable key columns
+    __table__ = Table(
+        'wb_test_awards', metadata,
+        Column('contract', String),
+        Column('project', String),
+        Column('amount', Integer)
+    )
+
+
+ROWS = [
+    ('C1', 'P1', 1), ('C1', 'P1', 2), ('C1', 'P1', 3),   # duplicate keys across page boundaries
+    ('C1', None, 4), ('C1', None, 5),                      # NULL in the second key
+    (None, 'P1', 6), (None, None, 7), (None, None, 8),     # NULL in the first key
+    ('C2', 'P2', 9), ('C0', 'P9', 10), ('C2', 'P1', 11),
+]
+
+
+@pytest.fixture
+def db(monkeypatch):
+    monkeypatch.setitem(REQUIRED_TABLES, 'wb_test_awards', ['contract', 'project'])
+    engine = create_engine('sqlite://')
+    metadata.create_all(engine)
+    with Session(engine) as session:
+        session.execute(insert(Award.__table__), [
+            {'contract': contract, 'project': project, 'amount': amount}
+            for contract, project, amount in ROWS
+        ])
+        session.commit()
+        yield session
+
+
+def page_through(db, limit, **kwargs):
+    service = TablePageService()
+    pages, cursor = [], None
+    while True:
+        page = service.list_page(db, Award, limit=limit, cursor=cursor, fields='amount,contract,project', **kwargs)
+        pages.append(page)
+        cursor = page['nextCursor']
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.parametrize('limit', [1, 2, 3, 4, 100])
+def test_pages_cover_duplicate_and_null_keys_once(db, limit):
+    pages = page_through(db, limit)
+    amounts = [row['amount'] for page in pages for row in page['data']]
+
+    assert sorted(amounts) == sorted(amount for _, _, amount in ROWS)
+    assert len(amounts) == len(set(amounts))
+    assert all(page['rowCount'] <= limit for page in pages)
+
+
+def test_pages_follow_the_key_with_nulls_last(db):
+    rows = [row for page in page_through(db, 2) for row in page['data']]
+    keys = [(row['contract'], row['project']) for row in rows]
+
+    def sort_key(key):
+        return tuple((value is None, value or '') for value in key)
+
+    assert keys == sorted(keys, key=sort_key)
+
+
+def test_filtered_pages_keep_the_tiebreaker(db, monkeypatch):
+    monkeypatch.setitem(LIST_FILTER_COLUMNS, 'wb_test_awards', ['contract'])
+    pages = page_through(db, 1, filters={'contract': 'C1'})
+
+    assert sorted(row['amount'] for page in pages for row in page['data']) == [1, 2, 3, 4, 5]
@@ -0,0 +1,239 @@
+# pipeline/benchmarks/mock_api.py
+"""
+Local stand-in for the World Bank services the pipeline fetches from.
+
+Serves the datacatalog `top`/`skip` JSON pagination for every endpoint in
+API_CONFIG and a generated projects `all.xlsx`, with configurable latency,
+error rate and dataset sizes. The benchmark suite starts it in a separate
+process; it can also be run on its own to point a full pipeline at it:
+
+    python benchmarks/mock_api.py --port 8900 --scale 10
+    WB_API_BASE_URL=http://localhost:8900/dexapps/fone/api/apiservice \\
+    WB_PROJECTS_URL=http://localhost:8900/api/v3/projects/all.xlsx \\
+    python src/pipeline.py
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import random
+import shutil
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import urlparse, parse_qs
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from config import API_CONFIG, BENCHMARK_CONFIG, LOG_CONFIG
+from synthetic import generate_api_page, write_projects_workbook
+
+logger = logging.getLogger(__name__)
+
+API_PATH = '/dexapps/fone/api/apiservice'
+PROJECTS_PATH = '/api/v3/projects/all.xlsx'
+
+
+class MockWorldBankServer(ThreadingHTTPServer):
+    """HTTP server holding the stand-in settings shared by all request handlers"""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address,
+        volumes: Dict[str, int],
+        latency: float = BENCHMARK_CONFIG['latency'],
+        latency_jitter: float = BENCHMARK_CONFIG['latency_jitter'],
+        error_rate: float = BENCHMARK_CONFIG['error_rate'],
+        seed: int = BENCHMARK_CONFIG['seed'],
+        workbook_dir: str = BENCHMARK_CONFIG['workbook_dir']
+    ):
+        super().__init__(address, MockWorldBankHandler)
+        self.volumes = volumes
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.seed = seed
+        self.workbook_dir = workbook_dir
+        self.random = random.Random(seed)
+        self.resources = {
+            (endpoint['dataset_id'], endpoint['resource_id']): name
+            for name, endpoint in API_CONFIG['endpoints'].items()
+        }
+        self._workbook_lock = threading.Lock()
+
+    def simulate_latency(self):
+        delay = self.latency + self.random.uniform(0, self.latency_jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+    def should_fail(self) -> bool:
+        return self.error_rate > 0 and self.random.random() < self.error_rate
+
+    def projects_workbook(self) -> str:
+        """Generates the projects workbook once and reuses it across requests and runs"""
+        num_projects = self.volumes.get('projects', 0)
+        file_path = os.path.join(self.workbook_dir, f"all_{num_projects}_{self.seed}.xlsx")
+        with self._workbook_lock:
+            if not os.path.exists(file_path):
+                os.makedirs(self.workbook_dir, exist_ok=True)
+                logger.info(f"Generating projects workbook with {num_projects} projects...")
+                tmp_path = f"{file_path}.tmp"
+                write_projects_workbook(tmp_path, num_projects, self.seed)
+                os.replace(tmp_path, file_path)
+        return file_path
+
+
+class MockWorldBankHandler(BaseHTTPRequestHandler):
+    """Answers datacatalog API pages and the projects workbook download"""
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        self.server.simulate_latency()
+        if self.server.should_fail():
+            self._send_json(503, {'error': 'Simulated service unavailable'})
+            return
+
+        try:
+            if parsed.path == API_PATH:
+                self._send_api_page(parse_qs(parsed.query))
+            elif parsed.path == PROJECTS_PATH:
+                self._send_file(self.server.projects_workbook())
+            else:
+                self._send_json(404, {'error': f"Unknown path {parsed.path}"})
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up, e.g. after a timeout
+            pass
+
+    def _send_api_page(self, params):
+        resource = (params.get('datasetId', [''])[0], params.get('resourceId', [''])[0])
+        endpoint = self.server.resources.get(resource)
+        if endpoint is None:
+            self._send_json(404, {'error': f"Unknown dataset {resource[0]}/{resource[1]}"})
+            return
+
+        try:
+            top = int(params.get('top', [API_CONFIG['records_per_page']])[0])
+            skip = int(params.get('skip', [0])[0])
+        except ValueError:
+            self._send_json(400, {'error': 'top and skip must be integers'})
+            return
+
+        count = self.server.volumes.get(endpoint, 0)
+        rows = generate_api_page(endpoint, skip, top, count, self.server.volumes.get('projects', 1), self.server.seed)
+        self._send_json(200, {'count': count, 'data': rows})
+
+    def _send_json(self, status: int, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_file(self, file_path: str):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+        self.send_header('Content-Length', str(os.path.getsize(file_path)))
+        self.end_headers()
+        with open(file_path, 'rb') as f:
+            shutil.copyfileobj(f, self.wfile)
+
+
+def scaled_volumes(scale: float, volumes: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+    volumes = volumes or BENCHMARK_CONFIG['volumes']
+    return {name: max(int(count * scale), 1) for name, count in volumes.items()}
+
+
+def serve(host: str, port: int, volumes: Dict[str, int], ready=None, **settings):
+    """Runs the stand-in until the process is stopped"""
+    server = MockWorldBankServer((host, port), volumes, **settings)
+    # Generate the workbook before serving so it is not timed as download latency
+    if volumes.get('projects'):
+        server.projects_workbook()
+    if ready is not None:
+        # Tell the parent which port was bound (port 0 picks a free one)
+        ready.put(server.server_address[1])
+    logger.info(f"Serving World Bank API stand-in on http://{host}:{server.server_address[1]}")
+    server.serve_forever()
+
+
+class MockAPIProcess:
+    """
+    Runs the stand-in in a child process so its CPU and memory do not count
+    towards the pipeline being measured.
+    """
+
+    def __init__(self, volumes: Dict[str, int], host: str = '127.0.0.1', port: int = 0, **settings):
+        self.volumes = volumes
+        self.host = host
+        self.port = port
+        self.settings = settings
+        self.process = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}{API_PATH}"
+
+    @property
+    def projects_url(self) -> str:
+        return f"http://{self.host}:{self.port}{PROJECTS_PATH}"
+
+    def start(self):
+        """Starts the child process and waits until it accepts requests"""
+        context = multiprocessing.get_context('spawn')
+        ready = context.Queue()
+        self.process = context.Process(
+            target=serve,
+            args=(self.host, self.port, self.volumes, ready),
+            kwargs=self.settings,
+            daemon=True
+        )
+        self.process.start()
+        # Generating a large workbook can take minutes, so wait as long as the child lives
+        while True:
+            try:
+                self.port = ready.get(timeout=1)
+                return self
+            except queue.Empty:
+                if not self.process.is_alive():
+                    raise RuntimeError("World Bank API stand-in exited before it was ready")
+
+    def stop(self):
+        if self.process is not None:
+            self.process.terminate()
+            self.process.join()
+            self.process = None
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=LOG_CONFIG['level'], format=LOG_CONFIG['format'])
+
+    parser = argparse.ArgumentParser(description="Local stand-in for the World Bank APIs")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--scale', type=float, default=1, help="multiple of the production volumes to serve")
+    parser.add_argument('--latency', type=float, default=BENCHMARK_CONFIG['latency'])
+    parser.add_argument('--latency-jitter', type=float, default=BENCHMARK_CONFIG['latency_jitter'])
+    parser.add_argument('--error-rate', type=float, default=BENCHMARK_CONFIG['error_rate'])
+    parser.add_argument('--seed', type=int, default=BENCHMARK_CONFIG['seed'])
+    args = parser.parse_args()
+
+    serve(
+        args.host,
+        args.port,
+        scaled_volumes(args.scale),
+        latency=args.latency,
+        latency_jitter=args.latency_jitter,
+        error_rate=args.error_rate,
+        seed=args.seed
+    )
@@ -0,0 +1,163 @@
+# pipeline/benchmarks/parse_benchmark.py
+"""
+Benchmark of the project relationship parsers over a corpus of cached pages.
+
+Every page is parsed with the BeautifulSoup reference parser and the lxml
+parser the scraper uses; the results must be identical, and any page where
+they differ is reported. Throughput of the process pool the scraper parses
+in for large scrapes is measured as well.
+
+The corpus is the pages kept in the relationship cache (SCRAPE_CACHE_CONFIG,
+with store_html on) or a directory of .html files given as --corpus; without
+any pages a synthetic corpus shaped like the project detail pages is generated:
+
+    python benchmarks/parse_benchmark.py --corpus /app/data/scrape_cache.sqlite --repeat 3
+"""
+
+import argparse
+import glob
+import logging
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+from typing import Any, Dict, List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from config import SCRAPE_CACHE_CONFIG
+from scrape_cache import ScrapeCache
+from scraper import PARSE_WORKERS, parse_project_relationships, parse_project_relationships_soup
+
+logger = logging.getLogger(__name__)
+
+PROJECT_URL = "https://projects.worldbank.org/en/projects-operations/project-detail/{}"
+
+
+def synthetic_page(rng: random.Random, project_id: str) -> str:
+    """A project detail page with filler markup and a random mix of relationships"""
+    def project_link(other_id):
+        return f'<a href="/en/projects-operations/project-detail/{other_id}">  {other_id} &amp; Co </a>'
+
+    items = [f'<li><span>Project ID</span> <strong>{project_id}</strong></li>',
+             '<li><span>Status</span> <strong>Active</strong></li>']
+    if rng.random() < 0.3:
+        items.append(f'<li><span>Parent Project</span><br/>{project_link(f"P{rng.randint(100000, 199999)}")}</li>')
+    if rng.random() < 0.3:
+        links = ' , '.join(project_link(f"P{rng.randint(100000, 199999)}") for _ in range(rng.randint(1, 4)))
+        items.append(f'<li><span>Associated Projects</span> <!-- related --><p>{links}</p></li>')
+    if rng.random() < 0.1:
+        items.append('<li><span>Associated Project</span> <a href="/en/about">none</a></li>')
+
+    filler = ''.join(
+        f'<div class="section"><h3>Section {i}</h3><p>{"Lorem ipsum dolor sit amet. " * rng.randint(5, 40)}</p>'
+        f'<ul>{"".join(f"<li><a href=/en/topic/{j}>Topic {j}</a></li>" for j in range(rng.randint(3, 15)))}</ul></div>'
+        for i in range(rng.randint(10, 40))
+    )
+    main_detail = f'<div class="main-detail clearfix"><ul>{"".join(items)}</ul></div>' if rng.random() < 0.95 else ''
+    return (f'<!DOCTYPE html><html><head><title>{project_id}</title>'
+            f'<script>window.__state = {{"id": "{project_id}"}};</script></head>'
+            f'<body><header><nav><ul><li><a href="/en/home">Home</a></li></ul></nav></header>'
+            f'<main>{main_detail}{filler}</main><footer>World Bank</footer></body></html>')
+
+
+def load_corpus(corpus: str, limit: int, seed: int) -> List[Tuple[str, str]]:
+    """
+    (url, html) pairs from a relationship cache file or a directory of pages,
+    or synthetic ones if it has no pages
+    """
+    pages = []
+    if os.path.isfile(corpus):
+        with ScrapeCache(corpus) as cache:
+            pages = list(cache.pages(limit))
+    else:
+        for path in sorted(glob.glob(os.path.join(corpus, '*.html')))[:limit]:
+            with open(path, 'r', encoding='utf-8') as f:
+                pages.append((PROJECT_URL.format(os.path.basename(path)[:-len('.html')]), f.read()))
+    if pages:
+        logger.info(f"Loaded {len(pages)} cached pages from {corpus}")
+        return pages
+
+    rng = random.Random(seed)
+    for i in range(limit):
+        project_id = f"P{100000 + i}"
+        pages.append((PROJECT_URL.format(project_id), synthetic_page(rng, project_id)))
+    logger.info(f"No cached pages in {corpus}, generated {len(pages)} synthetic pages")
+    return pages
+
+
+def time_parser(parser, corpus: List[Tuple[str, str]], repeat: int) -> Tuple[List[Dict[str, Any]], float]:
+    """Results of the first pass and the best wall time over `repeat` passes"""
+    best, results = None, None
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        pass_results = [parser(html, url) for url, html in corpus]
+        seconds = time.perf_counter() - start_time
+        best = seconds if best is None else min(best, seconds)
+        results = results or pass_results
+    return results, best
+
+
+def time_pool(corpus: List[Tuple[str, str]], workers: int) -> float:
+    urls, pages = zip(*corpus)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+        # Warm the workers up so process start-up is not measured
+        list(executor.map(parse_project_relationships, pages[:workers], urls[:workers]))
+        start_time = time.perf_counter()
+        list(executor.map(parse_project_relationships, pages, urls, chunksize=16))
+        return time.perf_counter() - start_time
+
+
+def run_parse_benchmark(corpus: List[Tuple[str, str]], repeat: int = 3, workers: int = PARSE_WORKERS) -> Dict[str, Any]:
+    soup_results, soup_seconds = time_parser(parse_project_relationships_soup, corpus, repeat)
+    fast_results, fast_seconds = time_parser(parse_project_relationships, corpus, repeat)
+    mismatches = [expected['url'] for expected, actual in zip(soup_results, fast_results) if expected != actual]
+
+    result = {
+        'pages': len(corpus),
+        'bytes': sum(len(html) for _, html in corpus),
+        'with_relationships': sum(1 for r in soup_results if r['parent_project'] or r['associated_projects']),
+        'soup_ms_per_page': round(soup_seconds * 1000 / len(corpus), 3),
+        'lxml_ms_per_page': round(fast_seconds * 1000 / len(corpus), 3),
+        'speedup': round(soup_seconds / fast_seconds, 2) if fast_seconds else None,
+        'mismatches': mismatches
+    }
+    if workers > 1:
+        pool_seconds = time_pool(corpus, workers)
+        result['pool_workers'] = workers
+        result['pool_pages_per_second'] = round(len(corpus) / pool_seconds, 1) if pool_seconds else None
+    result['lxml_pages_per_second'] = round(len(corpus) / fast_seconds, 1) if fast_seconds else None
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the project relationship parsers")
+    parser.add_argument('--corpus', default=SCRAPE_CACHE_CONFIG['path'],
+                        help="relationship cache file or directory of project pages")
+    parser.add_argument('--limit', type=int, default=2000, help="pages to parse at most")
+    parser.add_argument('--repeat', type=int, default=3, help="passes per parser; the fastest counts")
+    parser.add_argument('--workers', type=int, default=PARSE_WORKERS, help="process pool size (1 skips the pool)")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    # The parsers warn about every page without a main-detail block
+    logging.getLogger('scraper').setLevel(logging.ERROR)
+
+    corpus = load_corpus(args.corpus, args.limit, args.seed)
+    if not corpus:
+        sys.exit("No pages to parse")
+    result = run_parse_benchmark(corpus, args.repeat, args.workers)
+
+    print(f"{result['pages']} pages, {result['bytes'] / 1024 ** 2:.1f} MB, "
+          f"{result['with_relationships']} with relationships")
+    print(f"BeautifulSoup  {result['soup_ms_per_page']:8.3f} ms/page")
+    print(f"lxml           {result['lxml_ms_per_page']:8.3f} ms/page  ({result['speedup']}x, "
+          f"{result['lxml_pages_per_second']} pages/s)")
+    if 'pool_workers' in result:
+        print(f"lxml, {result['pool_workers']} processes  {result['pool_pages_per_second']} pages/s")
+    if result['mismatches']:
+        print(f"{len(result['mismatches'])} pages parsed differently, e.g. {result['mismatches'][:5]}")
+        sys.exit(1)
+    print("Both parsers returned identical results")
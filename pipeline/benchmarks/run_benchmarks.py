@@ -0,0 +1,278 @@
+# pipeline/benchmarks/run_benchmarks.py
+"""
+End-to-end benchmark of the pipeline against the local World Bank API stand-in.
+
+For every scale (multiples of the production volumes in BENCHMARK_CONFIG) each
+dataset is fetched, transformed and loaded one stage at a time through the
+same task functions run_pipeline uses, recording wall time, throughput and
+peak RSS per stage. With a database configured, a full PipelineExecutor run
+is measured as well. Loads go to bench_-prefixed tables, which are dropped
+afterwards.
+
+Results are written to a JSON file and compared with the previous results
+file, so performance changes can be tracked run over run:
+
+    python benchmarks/run_benchmarks.py --scales 1 10 --datasets projects,contract_awards
+"""
+
+import argparse
+import gc
+import glob
+import json
+import logging
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, text
+
+from config import API_CONFIG, BENCHMARK_CONFIG, TABLES
+from executor import PipelineExecutor, load_single_df
+from loader import ensure_data_versions_table
+from metrics import PeakRSSTracker, current_rss_bytes, pop_fetch_totals
+from pipeline import build_dataset_tasks
+from mock_api import MockAPIProcess, scaled_volumes
+
+logger = logging.getLogger(__name__)
+
+
+def measure(func: Callable, *args) -> Tuple[Any, Dict[str, Any]]:
+    """Runs func and returns its result with wall time and peak RSS"""
+    gc.collect()
+    baseline_rss = current_rss_bytes()
+    tracker = PeakRSSTracker().start()
+    start_time = time.perf_counter()
+    result, error = None, None
+    try:
+        result = func(*args)
+    except Exception as e:
+        error = str(e)
+    seconds = time.perf_counter() - start_time
+    peak_rss = tracker.stop()
+    return result, {
+        'seconds': round(seconds, 3),
+        'peak_rss_bytes': peak_rss,
+        # Memory the stage itself added on top of what the process already held
+        'rss_increase_bytes': max(peak_rss - baseline_rss, 0),
+        'error': error
+    }
+
+
+def stage_result(scale, dataset, stage, stats, rows=None, num_bytes=None, table=None, **extra) -> Dict[str, Any]:
+    seconds = stats['seconds']
+    return {
+        'scale': scale,
+        'dataset': dataset,
+        'stage': stage,
+        'table': table,
+        'rows': rows,
+        'bytes': num_bytes,
+        'rows_per_second': round(rows / seconds, 1) if rows and seconds > 0 else None,
+        'bytes_per_second': round(num_bytes / seconds, 1) if num_bytes and seconds > 0 else None,
+        **stats,
+        **extra
+    }
+
+
+def benchmark_task(task, scale: float, engine, table_mapping: Dict[str, str]) -> List[Dict[str, Any]]:
+    """Runs one dataset through fetch, transform and load, measuring each stage separately"""
+    results = []
+
+    pop_fetch_totals(task.name)
+    raw, stats = measure(task.fetch)
+    totals = pop_fetch_totals(task.name)
+    if raw is None and not stats['error']:
+        stats['error'] = "No data fetched"
+    results.append(stage_result(
+        scale, task.name, 'fetch', stats,
+        rows=len(raw['data']) if isinstance(raw, dict) and 'data' in raw else None,
+        num_bytes=totals['bytes'],
+        pages=totals['pages'],
+        retries=totals['retries'],
+        failures=totals['failures']
+    ))
+    if raw is None:
+        return results
+
+    dataframes, stats = measure(task.transform, raw)
+    if task.cleanup:
+        task.cleanup(raw)
+    del raw
+    dataframes = {key: df for key, df in (dataframes or {}).items() if df is not None}
+    if not dataframes and not stats['error']:
+        stats['error'] = "Transform produced no tables"
+    results.append(stage_result(
+        scale, task.name, 'transform', stats,
+        rows=sum(len(df) for df in dataframes.values()),
+        num_bytes=sum(int(df.memory_usage(deep=True).sum()) for df in dataframes.values())
+    ))
+
+    if engine is None:
+        return results
+
+    for table_key in list(dataframes):
+        df = dataframes.pop(table_key)
+        num_rows = len(df)
+        loaded, stats = measure(load_single_df, (table_key, df), table_mapping, engine)
+        del df
+        success = bool(loaded and loaded[1])
+        if not success and not stats['error']:
+            stats['error'] = "Load failed"
+        results.append(stage_result(
+            scale, task.name, 'load', stats, rows=num_rows, table=table_mapping.get(table_key)
+        ))
+    return results
+
+
+def benchmark_end_to_end(tasks, scale: float, engine, table_mapping: Dict[str, str]) -> Dict[str, Any]:
+    """Measures a full pipelined run with all stages overlapping, as in production"""
+    executor = PipelineExecutor(engine, table_mapping)
+    load_results, stats = measure(executor.run, tasks)
+    load_results = load_results or {}
+    expected_tables = [table_key for task in tasks for table_key in task.tables]
+    failed = [table_key for table_key in expected_tables if not load_results.get(table_key)]
+    if failed and not stats['error']:
+        stats['error'] = f"Failed to load: {failed}"
+    return stage_result(
+        scale, 'all', 'end_to_end', stats,
+        tables_loaded=len(expected_tables) - len(failed),
+        tables_failed=len(failed)
+    )
+
+
+def drop_benchmark_tables(engine, table_mapping: Dict[str, str]):
+    with engine.begin() as conn:
+        for table_name in table_mapping.values():
+            conn.execute(text(f"DROP TABLE IF EXISTS {table_name}"))
+
+
+def run_benchmarks(
+    scales: List[float],
+    datasets: Optional[List[str]] = None,
+    engine=None,
+    end_to_end: bool = True,
+    **server_settings
+) -> List[Dict[str, Any]]:
+    table_mapping = {key: f"{BENCHMARK_CONFIG['table_prefix']}{table}" for key, table in TABLES.items()}
+    results = []
+
+    for scale in scales:
+        logger.info(f"Benchmarking at {scale}x production volume...")
+        server = MockAPIProcess(scaled_volumes(scale), **server_settings).start()
+        API_CONFIG['base_url'] = server.base_url
+        API_CONFIG['projects_url'] = server.projects_url
+        try:
+            tasks = build_dataset_tasks(datasets)
+            for task in tasks:
+                results.extend(benchmark_task(task, scale, engine, table_mapping))
+            if engine is not None and end_to_end:
+                results.append(benchmark_end_to_end(tasks, scale, engine, table_mapping))
+        finally:
+            server.stop()
+            if engine is not None:
+                drop_benchmark_tables(engine, table_mapping)
+    return results
+
+
+def latest_results_file(results_dir: str) -> Optional[str]:
+    files = sorted(glob.glob(os.path.join(results_dir, 'benchmark_*.json')))
+    return files[-1] if files else None
+
+
+def result_key(result: Dict[str, Any]) -> Tuple:
+    return (result['scale'], result['dataset'], result['stage'], result.get('table'))
+
+
+def percent_change(base, target) -> str:
+    if not base or target is None:
+        return ''
+    return f"{(target - base) * 100.0 / base:+.1f}%"
+
+
+def print_report(results: List[Dict[str, Any]], baseline: Optional[List[Dict[str, Any]]] = None):
+    """Prints one line per stage, with the change against the baseline run if given"""
+    baseline_by_key = {result_key(result): result for result in baseline or []}
+    header = (f"{'scale':>6} {'dataset':<44} {'stage':<10} {'rows':>11} {'seconds':>9} "
+              f"{'rows/s':>11} {'peak MB':>9} {'+MB':>8} {'d time':>8} {'d peak':>8}")
+    print(header)
+    print('-' * len(header))
+    for result in results:
+        base = baseline_by_key.get(result_key(result), {})
+        name = result['dataset'] if not result.get('table') else f"{result['dataset']}:{result['table']}"
+        print(
+            f"{result['scale']:>6g} {name[:44]:<44} {result['stage']:<10} "
+            f"{result['rows'] if result['rows'] is not None else '':>11} "
+            f"{result['seconds']:>9.2f} "
+            f"{result['rows_per_second'] or '':>11} "
+            f"{result['peak_rss_bytes'] / 1024 ** 2:>9.1f} "
+            f"{result['rss_increase_bytes'] / 1024 ** 2:>8.1f} "
+            f"{percent_change(base.get('seconds'), result['seconds']):>8} "
+            f"{percent_change(base.get('peak_rss_bytes'), result['peak_rss_bytes']):>8}"
+            + (f"  ERROR: {result['error']}" if result.get('error') else '')
+        )
+
+
+if __name__ == "__main__":
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline against a local World Bank API stand-in")
+    parser.add_argument('--scales', type=float, nargs='+', default=BENCHMARK_CONFIG['scales'],
+                        help="multiples of the production volumes to run")
+    parser.add_argument('--datasets', help="comma-separated datasets to benchmark (default: all)")
+    parser.add_argument('--database-url', default=os.getenv('BENCHMARK_DATABASE_URL'),
+                        help="database for the load stage; loads are skipped without one")
+    parser.add_argument('--no-end-to-end', action='store_true', help="skip the full pipelined run")
+    parser.add_argument('--latency', type=float, default=BENCHMARK_CONFIG['latency'])
+    parser.add_argument('--latency-jitter', type=float, default=BENCHMARK_CONFIG['latency_jitter'])
+    parser.add_argument('--error-rate', type=float, default=BENCHMARK_CONFIG['error_rate'])
+    parser.add_argument('--seed', type=int, default=BENCHMARK_CONFIG['seed'])
+    parser.add_argument('--results-dir', default=BENCHMARK_CONFIG['results_dir'])
+    parser.add_argument('--baseline', help="results file to compare against (default: the latest one)")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url) if args.database_url else None
+    if engine is None:
+        logger.warning("No benchmark database configured, skipping the load stage")
+    else:
+        ensure_data_versions_table(engine)
+
+    server_settings = {
+        'latency': args.latency,
+        'latency_jitter': args.latency_jitter,
+        'error_rate': args.error_rate,
+        'seed': args.seed
+    }
+    started_at = datetime.now()
+    results = run_benchmarks(
+        args.scales,
+        datasets=args.datasets.split(',') if args.datasets else None,
+        engine=engine,
+        end_to_end=not args.no_end_to_end,
+        **server_settings
+    )
+
+    baseline_file = args.baseline or latest_results_file(args.results_dir)
+    baseline = None
+    if baseline_file:
+        with open(baseline_file, 'r') as f:
+            baseline = json.load(f)['results']
+        print(f"Comparing with {baseline_file}")
+    print_report(results, baseline)
+
+    os.makedirs(args.results_dir, exist_ok=True)
+    results_file = os.path.join(args.results_dir, f"benchmark_{started_at.strftime('%Y%m%d_%H%M%S')}.json")
+    with open(results_file, 'w') as f:
+        json.dump({
+            'started_at': started_at.isoformat(),
+            'finished_at': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'settings': {**server_settings, 'scales': args.scales, 'volumes': BENCHMARK_CONFIG['volumes']},
+            'results': results
+        }, f, indent=2)
+    print(f"Results written to {results_file}")
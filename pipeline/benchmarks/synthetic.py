@@ -0,0 +1,841 @@
+# pipeline/benchmarks/synthetic.py
+"""
+Synthetic World Bank datasets for load testing.
+
+Every table in config.TABLES is described column by column: vocabularies and
+their weights, null rates, and skewed references to shared pools (countries,
+suppliers, projects, trust funds) whose cardinality grows with the data. The
+values are approximations of the live datasets, close enough to stress
+indexes, joins and group-bys the way production data does.
+
+Rows are generated in fixed blocks seeded by table, block and seed, so any
+range of rows (an API page, a Parquet part) can be produced on its own and the
+same range always holds the same rows. Output can be API-shaped JSON pages,
+Parquet or CSV parts, or a projects all.xlsx:
+
+    python benchmarks/synthetic.py --tables contract_awards --rows contract_awards=300000000 \\
+        --format parquet --workers 16 --output /data/synthetic
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+import zlib
+import concurrent.futures
+from functools import lru_cache
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from config import API_CONFIG, BENCHMARK_CONFIG, LOG_CONFIG, TABLES
+from transformer import standardize_column_name
+
+logger = logging.getLogger(__name__)
+
+# Rows per seeded block; matches the API page size so pages never straddle blocks
+BLOCK_SIZE = 1000
+
+# Average rows per project on the project sheets
+ROWS_PER_PROJECT = {
+    'world_bank_projects': 1,
+    'themes': 3,
+    'sectors': 3,
+    'geo_locations': 2,
+    'financers': 2
+}
+
+# Rendered pool member names kept per renderer; skewed draws mostly hit the cache
+RENDER_CACHE_SIZE = 200000
+
+# Excel caps a sheet at 1,048,576 rows including the title and header rows
+MAX_SHEET_ROWS = 1048576 - 3
+
+PROJECT_URL = 'https://projects.worldbank.org/en/projects-operations/project-detail/{}'
+NOTICE_URL = 'https://projects.worldbank.org/en/projects-operations/procurement-detail/{}'
+
+# (code, name, region)
+COUNTRIES = [
+    ('IN', 'India', 'South Asia'),
+    ('CN', 'China', 'East Asia and Pacific'),
+    ('ID', 'Indonesia', 'East Asia and Pacific'),
+    ('BR', 'Brazil', 'Latin America and Caribbean'),
+    ('BD', 'Bangladesh', 'South Asia'),
+    ('PK', 'Pakistan', 'South Asia'),
+    ('VN', 'Viet Nam', 'East Asia and Pacific'),
+    ('NG', 'Nigeria', 'Western and Central Africa'),
+    ('ET', 'Ethiopia', 'Eastern and Southern Africa'),
+    ('KE', 'Kenya', 'Eastern and Southern Africa'),
+    ('TZ', 'Tanzania', 'Eastern and Southern Africa'),
+    ('MX', 'Mexico', 'Latin America and Caribbean'),
+    ('TR', 'Turkiye', 'Europe and Central Asia'),
+    ('PH', 'Philippines', 'East Asia and Pacific'),
+    ('EG', 'Egypt, Arab Republic of', 'Middle East and North Africa'),
+    ('UG', 'Uganda', 'Eastern and Southern Africa'),
+    ('GH', 'Ghana', 'Western and Central Africa'),
+    ('MA', 'Morocco', 'Middle East and North Africa'),
+    ('AR', 'Argentina', 'Latin America and Caribbean'),
+    ('CO', 'Colombia', 'Latin America and Caribbean'),
+    ('MZ', 'Mozambique', 'Eastern and Southern Africa'),
+    ('MG', 'Madagascar', 'Eastern and Southern Africa'),
+    ('NP', 'Nepal', 'South Asia'),
+    ('UA', 'Ukraine', 'Europe and Central Asia'),
+    ('UZ', 'Uzbekistan', 'Europe and Central Asia'),
+    ('PE', 'Peru', 'Latin America and Caribbean'),
+    ('SN', 'Senegal', 'Western and Central Africa'),
+    ('CD', 'Congo, Democratic Republic of', 'Eastern and Southern Africa'),
+    ('BF', 'Burkina Faso', 'Western and Central Africa'),
+    ('ML', 'Mali', 'Western and Central Africa'),
+    ('ZM', 'Zambia', 'Eastern and Southern Africa'),
+    ('RW', 'Rwanda', 'Eastern and Southern Africa'),
+    ('LK', 'Sri Lanka', 'South Asia'),
+    ('AF', 'Afghanistan', 'South Asia'),
+    ('JO', 'Jordan', 'Middle East and North Africa'),
+    ('TN', 'Tunisia', 'Middle East and North Africa'),
+    ('LB', 'Lebanon', 'Middle East and North Africa'),
+    ('KH', 'Cambodia', 'East Asia and Pacific'),
+    ('LA', "Lao People's Democratic Republic", 'East Asia and Pacific'),
+    ('MN', 'Mongolia', 'East Asia and Pacific'),
+    ('PG', 'Papua New Guinea', 'East Asia and Pacific'),
+    ('HT', 'Haiti', 'Latin America and Caribbean'),
+    ('HN', 'Honduras', 'Latin America and Caribbean'),
+    ('BO', 'Bolivia', 'Latin America and Caribbean'),
+    ('PL', 'Poland', 'Europe and Central Asia'),
+    ('RO', 'Romania', 'Europe and Central Asia'),
+    ('KZ', 'Kazakhstan', 'Europe and Central Asia'),
+    ('GE', 'Georgia', 'Europe and Central Asia'),
+    ('YE', 'Yemen, Republic of', 'Middle East and North Africa'),
+    ('SO', 'Somalia', 'Eastern and Southern Africa')
+]
+
+# Supplier and donor countries are dominated by a few exporters
+SUPPLIER_COUNTRIES = [
+    ('CN', 'China', 'East Asia and Pacific'),
+    ('US', 'United States', 'Other'),
+    ('FR', 'France', 'Other'),
+    ('DE', 'Germany', 'Other'),
+    ('GB', 'United Kingdom', 'Other'),
+    ('JP', 'Japan', 'Other'),
+    ('IN', 'India', 'South Asia'),
+    ('TR', 'Turkiye', 'Europe and Central Asia'),
+    ('KR', 'Korea, Republic of', 'Other'),
+    ('NL', 'Netherlands', 'Other'),
+    ('CA', 'Canada', 'Other'),
+    ('IT', 'Italy', 'Other'),
+    ('ES', 'Spain', 'Other'),
+    ('ZA', 'South Africa', 'Eastern and Southern Africa'),
+    ('BR', 'Brazil', 'Latin America and Caribbean')
+] + COUNTRIES
+
+GLOBAL_PRACTICES = [
+    'Transport', 'Energy & Extractives', 'Water', 'Education', 'Health, Nutrition & Population',
+    'Agriculture and Food', 'Urban, Resilience and Land', 'Social Protection & Jobs',
+    'Governance', 'Finance, Competitiveness and Innovation', 'Environment, Natural Resources & the Blue Economy',
+    'Digital Development', 'Macroeconomics, Trade and Investment', 'Social Sustainability and Inclusion'
+]
+
+MAJOR_SECTORS = [
+    'Agriculture, Fishing and Forestry', 'Education', 'Energy and Extractives', 'Financial Sector',
+    'Health', 'Industry, Trade and Services', 'Information and Communications Technologies',
+    'Public Administration', 'Social Protection', 'Transportation',
+    'Water, Sanitation and Waste Management'
+]
+
+SECTORS = [
+    'Central Government (Central Agencies)', 'Sub-National Government', 'Other Education',
+    'Primary Education', 'Secondary Education', 'Health', 'Public Administration - Health',
+    'Rural and Inter-Urban Roads', 'Urban Transport', 'Energy Transmission and Distribution',
+    'Renewable Energy Solar', 'Hydropower', 'Water Supply', 'Sanitation', 'Irrigation and Drainage',
+    'Crops', 'Livestock', 'Social Protection', 'ICT Infrastructure', 'Banking Institutions',
+    'Other Industry, Trade and Services', 'Public Administration - Transportation'
+]
+
+THEMES_LEVEL_1 = [
+    'Human Development and Gender', 'Environment and Natural Resource Management',
+    'Private Sector Development', 'Public Sector Management', 'Social Development and Protection',
+    'Urban and Rural Development', 'Economic Policy', 'Finance'
+]
+
+THEMES_LEVEL_2 = [
+    'Health', 'Education', 'Gender', 'Climate change', 'Disaster Risk Management',
+    'Environmental policies and institutions', 'Jobs', 'Public Administration',
+    'Social Protection', 'Social Inclusion', 'Rural Development', 'Urban Development',
+    'Finance for Development', 'Private Sector Development'
+]
+
+THEMES_LEVEL_3 = [
+    'Adaptation', 'Mitigation', 'Pandemic Response', 'Health Systems and Policies',
+    'Access to Education', 'Education Financing', 'Women\'s Economic Empowerment',
+    'Rural Infrastructure and service delivery', 'Urban Infrastructure and Service Delivery',
+    'Social safety nets', 'Public Expenditure Management', 'Land Administration and Management',
+    'Water Resource Management', 'Renewable Natural Resources Asset Management'
+]
+
+PROCUREMENT_METHODS = [
+    'Request for Quotations', 'Request for Bids', 'Direct Selection',
+    'Quality And Cost-Based Selection', 'Consultant Qualification Selection',
+    'Individual Consultant Selection', 'Least Cost Selection', 'Limited Competitive Bidding'
+]
+
+LOAN_STATUSES = [
+    'Fully Repaid', 'Repaying', 'Disbursing', 'Disbursing&Repaying', 'Fully Cancelled',
+    'Approved', 'Effective', 'Signed', 'Terminated'
+]
+
+WORDS = [
+    'construction', 'supply', 'rehabilitation', 'consulting', 'services', 'road', 'school',
+    'hospital', 'water', 'equipment', 'training', 'design', 'supervision', 'irrigation',
+    'works', 'vehicles', 'medical', 'rural', 'urban', 'program', 'installation', 'power',
+    'network', 'system', 'capacity', 'assessment', 'management', 'support', 'delivery',
+    'district', 'national', 'regional', 'maintenance', 'laboratory', 'vaccines', 'software'
+]
+
+NAME_PARTS = [
+    ['Global', 'United', 'Sahel', 'Atlas', 'Pacific', 'Green', 'Delta', 'Summit', 'Prime',
+     'Horizon', 'Allied', 'Eastern', 'Capital', 'Metro', 'Golden', 'Nile', 'Andes', 'Royal'],
+    ['Construction', 'Engineering', 'Consulting', 'Medical', 'Trading', 'Systems', 'Builders',
+     'Logistics', 'Energy', 'Solutions', 'Partners', 'Infrastructure', 'Supplies', 'Technologies'],
+    ['Ltd', 'LLC', 'SA', 'SARL', 'GmbH', 'Inc', 'Co.', 'Group', 'JV', 'Plc']
+]
+
+
+@dataclass
+class Pool:
+    """
+    A shared population rows refer to, such as countries or suppliers. Rows
+    pick members with a power-law skew: with skew s the first members are
+    drawn far more often, the way a few suppliers win most contracts.
+    """
+    cardinality: Callable[['GenerationContext'], int]
+    skew: float
+    fields: Dict[str, Callable[[np.ndarray], np.ndarray]]
+
+
+@dataclass
+class Column:
+    """How one column is generated"""
+    name: str
+    kind: str                               # unique, choice, ref, row, date, amount, number, year, text, constant
+    null_rate: float = 0.0
+    values: Optional[Sequence[Any]] = None  # choice vocabulary, or the constant value
+    weights: Optional[Sequence[float]] = None
+    pool: Optional[str] = None              # ref: pool name
+    group: Optional[str] = None             # ref: columns of one group share the drawn member
+    field: Optional[str] = None             # ref: which attribute of the member to emit
+    fmt: Optional[str] = None               # unique: format applied to the row index
+    low: float = 0
+    high: float = 1
+    sigma: float = 1.0                      # amount: lognormal spread around exp(low)
+
+
+@dataclass
+class GenerationContext:
+    """Sizes the pools depend on"""
+    rows: int
+    num_projects: int
+    seed: int = BENCHMARK_CONFIG['seed']
+    pools: Dict[str, Pool] = field(default_factory=dict)
+
+
+def _country_field(countries, position: int) -> Callable[[np.ndarray], np.ndarray]:
+    values = np.array([country[position] for country in countries], dtype=object)
+    return lambda indexes: values[indexes]
+
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def _entity_name(index: int) -> str:
+    first, second, suffix = NAME_PARTS
+    name = (f"{first[index % len(first)]} {second[(index // len(first)) % len(second)]} "
+            f"{suffix[(index // (len(first) * len(second))) % len(suffix)]}")
+    repeat = index // (len(first) * len(second) * len(suffix))
+    return f"{name} {repeat}" if repeat else name
+
+
+def _render(func: Callable[[int], Any]) -> Callable[[np.ndarray], np.ndarray]:
+    """Vectorizes a per-member renderer, rendering each distinct member once"""
+    def render(indexes: np.ndarray) -> np.ndarray:
+        unique, inverse = np.unique(indexes, return_inverse=True)
+        return np.array([func(int(index)) for index in unique], dtype=object)[inverse]
+    return render
+
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def _place_name(index: int) -> str:
+    first = NAME_PARTS[0]
+    kinds = ['Province', 'District', 'Region', 'Town', 'County']
+    repeat = index // (len(first) * len(kinds))
+    name = f"{first[index % len(first)]} {kinds[(index // len(first)) % len(kinds)]}"
+    return f"{name} {repeat}" if repeat else name
+
+
+def project_id(index: int) -> str:
+    return f"P{100000 + index}"
+
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def _project_name(index: int) -> str:
+    words = [WORDS[(index * 7 + offset * 13) % len(WORDS)] for offset in range(3)]
+    return f"{' '.join(words).title()} Project {index % 100 + 1}"
+
+
+POOLS = {
+    'country': Pool(
+        cardinality=lambda ctx: len(COUNTRIES),
+        skew=1.6,
+        fields={'code': _country_field(COUNTRIES, 0), 'name': _country_field(COUNTRIES, 1),
+                'region': _country_field(COUNTRIES, 2)}
+    ),
+    'supplier_country': Pool(
+        cardinality=lambda ctx: len(SUPPLIER_COUNTRIES),
+        skew=2.5,
+        fields={'code': _country_field(SUPPLIER_COUNTRIES, 0), 'name': _country_field(SUPPLIER_COUNTRIES, 1)}
+    ),
+    # Roughly one supplier per three contract awards, growing with the data
+    'supplier': Pool(
+        cardinality=lambda ctx: max(ctx.rows // 3, 100),
+        skew=2.2,
+        fields={'name': _render(_entity_name), 'id': _render(lambda index: str(100000 + index))}
+    ),
+    'project': Pool(
+        cardinality=lambda ctx: max(ctx.num_projects, 1),
+        skew=1.4,
+        fields={'id': _render(project_id), 'name': _render(_project_name)}
+    ),
+    'trust_fund': Pool(
+        cardinality=lambda ctx: max(ctx.rows // 6, 50),
+        skew=1.2,
+        fields={'id': _render(lambda index: f"TF0{index:05d}"),
+                'name': _render(lambda index: f"{_project_name(index).rsplit(' Project', 1)[0]} Trust Fund")}
+    ),
+    'trustee': Pool(
+        cardinality=lambda ctx: max(ctx.rows // 40, 20),
+        skew=1.8,
+        fields={'id': _render(lambda index: f"TF0{90000 + index:05d}"),
+                'name': _render(lambda index: f"{_entity_name(index)} Multi-Donor Trust Fund")}
+    ),
+    # Provinces, districts and towns named in project locations
+    'place': Pool(
+        cardinality=lambda ctx: max(ctx.rows // 4, 100),
+        skew=1.5,
+        fields={'name': _render(_place_name)}
+    ),
+    'donor': Pool(
+        cardinality=lambda ctx: len(SUPPLIER_COUNTRIES),
+        skew=2.0,
+        fields={'name': _country_field(SUPPLIER_COUNTRIES, 1), 'code': _country_field(SUPPLIER_COUNTRIES, 0)}
+    )
+}
+
+
+def _choice(name, values, weights=None, null_rate=0.0) -> Column:
+    return Column(name, 'choice', null_rate=null_rate, values=values, weights=weights)
+
+
+def _ref(name, pool, field_name, group=None, null_rate=0.0) -> Column:
+    return Column(name, 'ref', null_rate=null_rate, pool=pool, field=field_name, group=group or pool)
+
+
+def _date(name, low='1975-01-01', high='2025-12-31', null_rate=0.0) -> Column:
+    return Column(name, 'date', null_rate=null_rate, values=(low, high))
+
+
+def _amount(name, log_mean=13.0, sigma=2.0, null_rate=0.0) -> Column:
+    return Column(name, 'amount', null_rate=null_rate, low=log_mean, sigma=sigma)
+
+
+def _statement_columns(number: str, number_fmt: str, suffix: str, repaid_to: str) -> List[Column]:
+    """Columns shared by the IDA credit and IBRD loan statements"""
+    return [
+        Column('end_of_period', 'constant', values='2025-06-30T00:00:00'),
+        Column(number, 'unique', fmt=number_fmt),
+        _ref('region', 'country', 'region'),
+        _ref('country_code', 'country', 'code'),
+        _ref('country', 'country', 'name'),
+        _choice('borrower', ['Ministry of Finance', 'Ministry of Economy and Finance',
+                             'Government', 'Central Bank', 'Ministry of Planning'], [5, 3, 2, 1, 1]),
+        _amount(f'original_principal_amount{suffix}', 17, 1.3),
+        _amount(f'cancelled_amount{suffix}', 14, 2.0, null_rate=0.4),
+        _amount(f'undisbursed_amount{suffix}', 14, 2.2, null_rate=0.5),
+        _amount(f'disbursed_amount{suffix}', 16.5, 1.5),
+        _amount(f'repaid_to_{repaid_to}{suffix}', 16, 1.8, null_rate=0.2),
+        _amount(f'due_to_{repaid_to}{suffix}', 15, 2.0, null_rate=0.3),
+        _amount(f'exchange_adjustment{suffix}', 12, 2.0, null_rate=0.6),
+        _amount(f'borrowers_obligation{suffix}', 15.5, 2.0, null_rate=0.3),
+        _amount(f'sold_3rd_party{suffix}', 12, 1.5, null_rate=0.95),
+        _amount(f'repaid_3rd_party{suffix}', 12, 1.5, null_rate=0.95),
+        _amount(f'due_3rd_party{suffix}', 12, 1.5, null_rate=0.97),
+        _date('first_repayment_date', '1965-01-01', '2035-12-31', null_rate=0.05),
+        _date('last_repayment_date', '1980-01-01', '2065-12-31', null_rate=0.05),
+        _date('agreement_signing_date', '1961-01-01', '2025-06-30', null_rate=0.02),
+        _date('board_approval_date', '1961-01-01', '2025-06-30'),
+        _date('effective_date_most_recent', '1961-01-01', '2025-06-30', null_rate=0.04),
+        _date('closed_date_most_recent', '1965-01-01', '2032-12-31', null_rate=0.1),
+        _date('last_disbursement_date', '1965-01-01', '2030-12-31', null_rate=0.2),
+        _ref('project_id', 'project', 'id', null_rate=0.15),
+        _ref('project_name', 'project', 'name', null_rate=0.15)
+    ]
+
+
+# Column specs per table key of config.TABLES, in the order the source emits them
+SCHEMAS: Dict[str, List[Column]] = {
+    'world_bank_projects': [
+        Column('project_id', 'row', pool='project', field='id'),
+        _ref('region', 'country', 'region'),
+        _ref('country', 'country', 'name'),
+        _choice('project_status', ['Closed', 'Active', 'Pipeline', 'Dropped'], [65, 20, 8, 7]),
+        _choice('last_stage_reached_name', ['Closed', 'Implementation', 'Board Approved', 'Negotiation',
+                                            'Appraisal', 'Concept Review', 'Identification'],
+                [60, 20, 6, 3, 3, 4, 4], null_rate=0.05),
+        Column('project_name', 'row', pool='project', field='name'),
+        Column('project_development_objective', 'text', null_rate=0.3, low=15, high=60),
+        _ref('implementing_agency', 'supplier', 'name', null_rate=0.45),
+        _date('public_disclosure_date', '1995-01-01', '2025-12-31', null_rate=0.35),
+        _date('board_approval_date', '1947-01-01', '2025-12-31', null_rate=0.08),
+        _date('loan_effective_date', '1947-01-01', '2025-12-31', null_rate=0.2),
+        _date('project_closing_date', '1950-01-01', '2032-12-31', null_rate=0.12),
+        _amount('current_project_cost', 17.5, 1.4, null_rate=0.1),
+        _amount('ibrd_commitment', 18, 1.2, null_rate=0.7),
+        _amount('ida_commitment', 17.3, 1.1, null_rate=0.55),
+        _amount('grant_amount', 15, 1.6, null_rate=0.8),
+        _amount('total_ibrd_ida_and_grant_commitment', 17.5, 1.3, null_rate=0.1),
+        _choice('borrower', ['Ministry of Finance', 'Government', 'Ministry of Economy and Finance',
+                             'Republic', 'Ministry of Planning'], [5, 4, 3, 2, 1], null_rate=0.3),
+        _choice('lending_instrument', ['Investment Project Financing', 'Specific Investment Loan',
+                                       'Development Policy Lending', 'Program-for-Results Financing',
+                                       'Technical Assistance Loan'], [55, 20, 12, 5, 8], null_rate=0.03),
+        _choice('environmental_assessment_category', ['B', 'C', 'A', 'F', 'U'], [45, 35, 8, 7, 5], null_rate=0.3),
+        _choice('environmental_and_social_risk', ['Moderate', 'Substantial', 'High', 'Low'],
+                [40, 35, 15, 10], null_rate=0.75),
+        Column('associated_project', 'ref', null_rate=0.9, pool='project', field='id', group='associated'),
+        _choice('consultant_services_required', ['Yes', 'No'], [3, 2], null_rate=0.35),
+        _choice('financing_type', ['IDA', 'IBRD', 'IBRD/IDA', 'Grant', 'Trust Funds'], [40, 30, 5, 10, 15],
+                null_rate=0.15)
+    ],
+    'themes': [
+        _ref('project_id', 'project', 'id'),
+        _choice('level_1', THEMES_LEVEL_1, [20, 18, 15, 14, 12, 11, 6, 4]),
+        _choice('percentage_1', [10, 20, 25, 30, 40, 50, 100], [10, 15, 10, 15, 10, 20, 20]),
+        _choice('level_2', THEMES_LEVEL_2, null_rate=0.1),
+        _choice('percentage_2', [5, 10, 20, 25, 50], null_rate=0.1),
+        _choice('level_3', THEMES_LEVEL_3, null_rate=0.35),
+        _choice('percentage_3', [5, 10, 15, 20], null_rate=0.35)
+    ],
+    'sectors': [
+        _ref('project_id', 'project', 'id'),
+        _choice('major_sector', MAJOR_SECTORS, [12, 11, 13, 6, 10, 5, 4, 16, 8, 9, 6]),
+        _choice('sector', SECTORS),
+        _choice('sector_percent', [5, 10, 20, 25, 30, 40, 50, 60, 100], [6, 12, 14, 10, 12, 10, 10, 6, 20])
+    ],
+    'geo_locations': [
+        _ref('project_id', 'project', 'id'),
+        Column('geo_loc_id', 'unique', fmt='{}', low=1000000),
+        Column('place_id', 'unique', fmt='{}', low=2000000),
+        _ref('wbg_country_key', 'country', 'code'),
+        _ref('geo_loc_name', 'place', 'name'),
+        Column('geo_latitude_number', 'number', low=-35, high=55),
+        Column('geo_longitude_number', 'number', low=-90, high=130),
+        _ref('admin_unit1_name', 'place', 'name', group='admin_unit1', null_rate=0.1),
+        _ref('admin_unit2_name', 'place', 'name', group='admin_unit2', null_rate=0.5)
+    ],
+    'financers': [
+        _ref('project', 'project', 'id'),
+        _choice('name', ['International Development Association', 'International Bank for Reconstruction and Development',
+                         'Borrower/Recipient', 'Global Environment Facility', 'Multi-Donor Trust Fund',
+                         'Japan Policy and Human Resources Development Fund', 'Local Sources of Borrowing Country'],
+                [35, 25, 18, 6, 8, 3, 5]),
+        _amount('current_amount', 16.5, 1.6, null_rate=0.05),
+        _amount('amount_usd', 16.5, 1.6, null_rate=0.05),
+        _choice('financer_id', ['IDA', 'IBRD', 'BORR', 'GEF', 'MDTF', 'PHRD', 'LOCAL'], [35, 25, 18, 6, 8, 3, 5]),
+        _choice('currency', ['USD', 'XDR', 'EUR', 'JPY'], [80, 12, 6, 2]),
+        _choice('project_financial_type', ['Loan', 'Credit', 'Grant', 'Guarantee', 'Counterpart Funding'],
+                [30, 30, 25, 3, 12])
+    ],
+    # Scraped edges between projects (see enrichment.relationship_edges)
+    'project_relationships': [
+        _ref('project_id', 'project', 'id'),
+        _ref('related_id', 'project', 'id', group='related'),
+        _choice('relation_type', ['associated', 'parent'], [3, 1])
+    ],
+    'credit_statements': _statement_columns('credit_number', 'IDA{:05d}', '_us', 'ida') + [
+        _choice('credit_status', LOAN_STATUSES, [30, 28, 10, 12, 8, 3, 4, 3, 2]),
+        Column('service_charge_rate', 'choice', values=[0.0, 0.75, 1.25, 2.0, 2.5], weights=[10, 50, 20, 10, 10]),
+        _choice('currency_of_commitment', ['XDR', 'USD', 'EUR'], [70, 25, 5]),
+        _amount('credits_held_us', 16, 1.7, null_rate=0.2)
+    ],
+    'loan_statements': _statement_columns('loan_number', 'IBRD{:05d}', '', 'ibrd') + [
+        _ref('guarantor_country_code', 'country', 'code', group='guarantor', null_rate=0.6),
+        _ref('guarantor', 'country', 'name', group='guarantor', null_rate=0.6),
+        _choice('loan_type', ['POOL LOAN', 'CPL', 'SCL', 'SCP USD', 'FSL', 'IFL', 'NPL'], [20, 15, 15, 20, 15, 10, 5]),
+        _choice('loan_status', LOAN_STATUSES, [35, 25, 10, 12, 8, 3, 3, 2, 2]),
+        Column('interest_rate', 'number', null_rate=0.05, low=0, high=9),
+        _choice('currency_of_commitment', ['USD', 'EUR', 'JPY', 'XDR'], [75, 18, 4, 3]),
+        _amount('loans_held', 16, 1.7, null_rate=0.2)
+    ],
+    'contract_awards': [
+        Column('as_of_date', 'constant', values='2025-06-30T00:00:00'),
+        Column('fiscal_year', 'year', low=2000, high=2025),
+        _ref('region', 'country', 'region', group='borrower_country'),
+        _ref('borrower_country', 'country', 'name', group='borrower_country'),
+        _ref('borrower_country_code', 'country', 'code', group='borrower_country'),
+        _ref('project_id', 'project', 'id'),
+        _ref('project_name', 'project', 'name'),
+        _choice('project_global_practice', GLOBAL_PRACTICES, null_rate=0.05),
+        _choice('procurement_category', ['Goods', 'Consultant Services', 'Works', 'Non-consulting Services'],
+                [45, 25, 20, 10]),
+        _choice('procurement_method', PROCUREMENT_METHODS, [35, 25, 10, 8, 8, 6, 4, 4]),
+        Column('wb_contract_number', 'unique', fmt='{}', low=1000000),
+        Column('contract_description', 'text', low=3, high=20),
+        Column('borrower_contract_reference_number', 'unique', null_rate=0.4, fmt='REF-{}'),
+        _date('contract_signing_date', '1999-07-01', '2025-06-30', null_rate=0.02),
+        _ref('supplier_id', 'supplier', 'id', null_rate=0.05),
+        _ref('supplier', 'supplier', 'name'),
+        _ref('supplier_country', 'supplier_country', 'name'),
+        _ref('supplier_country_code', 'supplier_country', 'code'),
+        _amount('supplier_contract_amount_usd', 11.5, 2.2),
+        _choice('review_type', ['Post', 'Prior'], [70, 30])
+    ],
+    'procurement_notices': [
+        Column('id', 'unique', fmt='OP{:08d}'),
+        Column('url', 'unique', fmt=NOTICE_URL.format('OP{:08d}')),
+        _choice('notice_type', ['Invitation for Bids', 'Request for Expression of Interest', 'Contract Award',
+                                'General Procurement Notice', 'Invitation for Prequalification'],
+                [35, 30, 25, 7, 3]),
+        _date('publication_date', '2015-01-01', '2025-12-31'),
+        _ref('project_id', 'project', 'id'),
+        Column('bid_description', 'text', null_rate=0.02, low=4, high=25),
+        _choice('procurement_category', ['Goods', 'Consultant Services', 'Works', 'Non-consulting Services'],
+                [40, 30, 20, 10], null_rate=0.1),
+        _choice('procurement_method', PROCUREMENT_METHODS, [35, 25, 10, 8, 8, 6, 4, 4], null_rate=0.15),
+        _date('deadline_date', '2015-01-01', '2026-06-30', null_rate=0.3),
+        _ref('country_code', 'country', 'code'),
+        _ref('country_name', 'country', 'name'),
+        _ref('region', 'country', 'region'),
+        _choice('sector', SECTORS, null_rate=0.2)
+    ],
+    'corporate_procurement_contract_awards': [
+        _date('award_date', '2010-07-01', '2025-06-30'),
+        _choice('commodity_category', ['IT Services', 'Consulting Services', 'Facilities Management',
+                                       'Travel', 'Publications', 'Telecommunications', 'Office Supplies',
+                                       'Security Services', 'Research Services'], [25, 25, 12, 8, 5, 7, 5, 5, 8]),
+        _amount('contract_award_amount', 12.5, 1.8),
+        Column('contract_description', 'text', low=3, high=15),
+        _choice('fund_source', ['BB', 'TF', 'BB/TF', 'FIF'], [60, 25, 10, 5]),
+        _choice('quarter_and_fiscal_year', [f"Q{quarter} FY{year}" for year in range(2011, 2026) for quarter in range(1, 5)]),
+        Column('selection_number', 'unique', fmt='{}', low=1200000),
+        _ref('supplier', 'supplier', 'name'),
+        _ref('supplier_country', 'supplier_country', 'name'),
+        _ref('supplier_country_code', 'supplier_country', 'code'),
+        _choice('vpu_description', ['Information and Technology Solutions', 'General Services Department',
+                                    'Development Economics', 'Human Resources', 'Treasury',
+                                    'External and Corporate Relations', 'Office of the President'],
+                [30, 25, 12, 10, 10, 8, 5]),
+        _choice('wbg_organization', ['IBRD', 'IFC', 'MIGA', 'ICSID'], [75, 18, 5, 2])
+    ],
+    'trust_fund_commitments': [
+        _choice('execution_type', ['Bank Executed', 'Recipient Executed'], [45, 55]),
+        Column('fiscal_year', 'year', low=2000, high=2025),
+        _choice('fund_classification', ['IBRD/IDA TF', 'FIF', 'Other'], [80, 12, 8]),
+        _amount('new_commitments_us', 13, 2.0, null_rate=0.05),
+        _choice('program_group', ['Global Partnership for Education', 'Climate Investment Funds',
+                                  'Global Financing Facility', 'Health Emergency Preparedness',
+                                  'Ukraine Relief', 'State and Peacebuilding Fund', 'Other'],
+                [8, 10, 7, 5, 6, 4, 60], null_rate=0.3),
+        _ref('trust_fund', 'trust_fund', 'id'),
+        _ref('trust_fund_name', 'trust_fund', 'name'),
+        _choice('trust_fund_status', ['ACTIVE', 'CLOSED', 'PENDINGLY CLOSED'], [40, 55, 5]),
+        _ref('trustee', 'trustee', 'id'),
+        _ref('trustee_name', 'trustee', 'name'),
+        _choice('trustee_status', ['ACTIVE', 'CLOSED', 'PENDINGLY CLOSED'], [55, 40, 5])
+    ],
+    'financial_intermediary_funds_contributions': [
+        Column('as_of_date', 'constant', values='2025-06-30T00:00:00'),
+        _choice('fund_name', ['Global Fund to Fight AIDS, Tuberculosis and Malaria', 'Climate Investment Funds',
+                              'Global Environment Facility', 'Green Climate Fund', 'GAVI Alliance',
+                              'Global Agriculture and Food Security Program', 'Pandemic Fund',
+                              'Adaptation Fund'], [20, 18, 15, 12, 12, 8, 8, 7]),
+        _ref('donor_name', 'donor', 'name'),
+        _ref('donor_country_code', 'donor', 'code', null_rate=0.05),
+        _choice('receipt_type', ['Cash', 'Promissory Note', 'Investment Income'], [70, 25, 5]),
+        _choice('receipt_quarter', ['Q1', 'Q2', 'Q3', 'Q4'], [20, 25, 25, 30]),
+        Column('calendar_year', 'year', low=1994, high=2025),
+        _choice('receipt_currency', ['USD', 'EUR', 'GBP', 'JPY', 'SEK', 'NOK', 'CAD', 'AUD'],
+                [35, 25, 12, 10, 5, 5, 5, 3]),
+        _amount('receipt_amount', 15, 2.0),
+        _choice('contribution_type', ['Grant', 'Capital Contribution', 'Loan'], [80, 15, 5]),
+        _choice('sub_account', ['Main', 'Least Developed Countries', 'Special Climate Change',
+                                'Capacity Building'], [70, 12, 10, 8], null_rate=0.5),
+        _amount('amount_in_usd', 15, 2.0, null_rate=0.02),
+        _choice('sectortheme', ['Climate', 'Health', 'Agriculture', 'Environment', 'Education'],
+                [35, 30, 12, 15, 8], null_rate=0.1)
+    ],
+    'net_flows_and_commitments': [
+        _ref('country', 'country', 'name'),
+        _amount('fees_us', 12, 1.8, null_rate=0.4),
+        _choice('financier', ['IDA', 'IBRD'], [55, 45]),
+        Column('fiscal_year', 'year', low=1990, high=2025),
+        _amount('gross_disbursement_us', 17, 1.6, null_rate=0.1),
+        _amount('ibrd_commitments_us', 18, 1.3, null_rate=0.6),
+        _amount('ida_concessional_commitments_us', 17.5, 1.2, null_rate=0.55),
+        _amount('ida_grant_commitments_us', 16.5, 1.3, null_rate=0.7),
+        _amount('ida_nonconcessional_commitments_us', 16, 1.3, null_rate=0.9),
+        _amount('ida_other_commitments_us', 15, 1.5, null_rate=0.92),
+        _amount('interest_us', 15.5, 1.8, null_rate=0.3),
+        _amount('net_disbursement_us', 16.5, 1.8, null_rate=0.1),
+        _ref('region', 'country', 'region'),
+        _amount('repayments_us', 16.5, 1.7, null_rate=0.25)
+    ]
+}
+
+# Headers of the projects workbook sheets as they appear in all.xlsx
+PROJECT_SHEETS = {
+    'world_bank_projects': ('World Bank Projects', [
+        'Project Id', 'Region', 'Country', 'Project Status', 'Last Stage Reached Name',
+        'Project Name', 'Project Development Objective', 'Implementing Agency',
+        'Public Disclosure Date', 'Board Approval Date', 'Loan Effective Date',
+        'Project Closing Date', 'Current Project Cost', 'IBRD Commitment', 'IDA Commitment',
+        'Grant Amount', 'Total IBRD, IDA and Grant Commitment', 'Borrower',
+        'Lending Instrument', 'Environmental Assessment Category',
+        'Environmental and Social Risk', 'Associated Project', 'Consultant Services Required',
+        'Financing Type'
+    ]),
+    'themes': ('Themes', ['Project Id', 'Level 1', 'Percentage 1', 'Level 2', 'Percentage 2', 'Level 3', 'Percentage 3']),
+    'sectors': ('Sectors', ['Project Id', 'Major Sector', 'Sector', 'Sector Percent']),
+    'geo_locations': ('GEO Locations', [
+        'Project Id', 'Geo Loc Id', 'Place Id', 'WBG Country Key', 'Geo Loc Name',
+        'Geo Latitude Number', 'Geo Longitude Number', 'Admin Unit1 Name', 'Admin Unit2 Name'
+    ]),
+    'financers': ('Financers', [
+        'Project', 'Name', 'Current Amount', 'Amount USD', 'Financer Id', 'Currency',
+        'Project Financial Type'
+    ])
+}
+
+
+def table_rows(table_key: str, scale: float, volumes: Optional[Dict[str, int]] = None) -> int:
+    """Row count of a table at a multiple of the production volumes"""
+    volumes = volumes or BENCHMARK_CONFIG['volumes']
+    if table_key in ROWS_PER_PROJECT:
+        return max(int(volumes['projects'] * scale) * ROWS_PER_PROJECT[table_key], 1)
+    return max(int(volumes[table_key] * scale), 1)
+
+
+def _skewed_indexes(rng: np.random.Generator, size: int, cardinality: int, skew: float) -> np.ndarray:
+    indexes = (cardinality * rng.random(size) ** skew).astype(np.int64)
+    return np.minimum(indexes, cardinality - 1)
+
+
+def _generate_column(column: Column, start: int, size: int, rng: np.random.Generator,
+                     context: GenerationContext, members: Dict[str, np.ndarray]) -> np.ndarray:
+    if column.kind == 'unique':
+        offset = int(column.low)
+        values = np.array([column.fmt.format(offset + index) for index in range(start, start + size)], dtype=object)
+    elif column.kind == 'constant':
+        values = np.full(size, column.values, dtype=object)
+    elif column.kind == 'choice':
+        weights = np.asarray(column.weights if column.weights else [1] * len(column.values), dtype=float)
+        choices = rng.choice(len(column.values), size=size, p=weights / weights.sum())
+        values = np.array(column.values, dtype=object)[choices]
+    elif column.kind == 'ref':
+        pool = context.pools.get(column.pool) or POOLS[column.pool]
+        if column.group not in members:
+            members[column.group] = _skewed_indexes(rng, size, pool.cardinality(context), pool.skew)
+        values = pool.fields[column.field](members[column.group])
+    elif column.kind == 'row':
+        # The pool member this row describes, e.g. the project of a wb_projects row
+        pool = context.pools.get(column.pool) or POOLS[column.pool]
+        values = pool.fields[column.field](np.arange(start, start + size))
+    elif column.kind == 'date':
+        low, high = (np.datetime64(bound, 'D') for bound in column.values)
+        days = rng.integers(0, int((high - low).astype(int)) + 1, size=size)
+        values = np.char.add(np.datetime_as_string(low + days, unit='D'), 'T00:00:00').astype(object)
+    elif column.kind == 'amount':
+        values = np.round(rng.lognormal(column.low, column.sigma, size=size), 2).astype(object)
+    elif column.kind == 'number':
+        values = np.round(rng.uniform(column.low, column.high, size=size), 4).astype(object)
+    elif column.kind == 'year':
+        values = rng.integers(int(column.low), int(column.high) + 1, size=size).astype(str).astype(object)
+    elif column.kind == 'text':
+        lengths = rng.integers(int(column.low), int(column.high) + 1, size=size)
+        words = rng.integers(0, len(WORDS), size=int(lengths.sum()))
+        bounds = np.concatenate(([0], np.cumsum(lengths)))
+        values = np.array([
+            ' '.join(WORDS[word] for word in words[bounds[i]:bounds[i + 1]]).capitalize()
+            for i in range(size)
+        ], dtype=object)
+    else:
+        raise ValueError(f"Unknown column kind '{column.kind}' for {column.name}")
+
+    if column.null_rate > 0:
+        values[rng.random(size) < column.null_rate] = None
+    return values
+
+
+def _generate_block(table_key: str, block: int, context: GenerationContext) -> Dict[str, np.ndarray]:
+    """Generates one full block of rows, clipped to the table size"""
+    start = block * BLOCK_SIZE
+    size = min(BLOCK_SIZE, context.rows - start)
+    rng = np.random.default_rng([context.seed, zlib.crc32(table_key.encode()), block])
+    members: Dict[str, np.ndarray] = {}
+    return {
+        column.name: _generate_column(column, start, size, rng, context, members)
+        for column in SCHEMAS[table_key]
+    }
+
+
+def _generate_range(table_key: str, start: int, stop: int, context: GenerationContext) -> Dict[str, np.ndarray]:
+    """Column arrays for rows start .. stop, cut from the blocks covering them"""
+    stop = min(stop, context.rows)
+    if start >= stop:
+        return {column.name: np.array([], dtype=object) for column in SCHEMAS[table_key]}
+
+    blocks = [_generate_block(table_key, block, context)
+              for block in range(start // BLOCK_SIZE, (stop - 1) // BLOCK_SIZE + 1)]
+    offset = start % BLOCK_SIZE
+    return {
+        column.name: np.concatenate([block[column.name] for block in blocks])[offset:offset + stop - start]
+        for column in SCHEMAS[table_key]
+    }
+
+
+def generate_rows(table_key: str, start: int, stop: int, context: GenerationContext) -> pd.DataFrame:
+    """Rows start .. stop of a synthetic table as a DataFrame"""
+    return pd.DataFrame(_generate_range(table_key, start, stop, context))
+
+
+def generate_api_page(endpoint: str, skip: int, top: int, total: int, num_projects: int,
+                      seed: int = BENCHMARK_CONFIG['seed']) -> List[Dict[str, Any]]:
+    """Rows skip .. skip + top of a synthetic endpoint holding `total` rows, as API records"""
+    context = GenerationContext(rows=total, num_projects=num_projects, seed=seed)
+    columns = _generate_range(endpoint, skip, skip + top, context)
+    return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+
+def write_projects_workbook(file_path: str, num_projects: int, seed: int = BENCHMARK_CONFIG['seed']) -> str:
+    """
+    Writes a synthetic all.xlsx laid out like the real one: a title row, the
+    header row and, on the projects sheet, an extra row the transformer skips.
+    Project Id cells link to the project page like the live file.
+    """
+    workbook = Workbook(write_only=True)
+    for table_key, (sheet_name, headers) in PROJECT_SHEETS.items():
+        worksheet = workbook.create_sheet(sheet_name)
+        worksheet.append([sheet_name])
+        worksheet.append(headers)
+        if table_key == 'world_bank_projects':
+            worksheet.append([None])
+
+        num_rows = num_projects * ROWS_PER_PROJECT[table_key]
+        if num_rows > MAX_SHEET_ROWS:
+            logger.warning(f"Capping sheet '{sheet_name}' at Excel's limit of {MAX_SHEET_ROWS} rows")
+            num_rows = MAX_SHEET_ROWS
+
+        context = GenerationContext(rows=num_rows, num_projects=num_projects, seed=seed)
+        fields = [standardize_column_name(header) for header in headers]
+        link_column = headers[0] == 'Project Id'
+        for start in range(0, num_rows, BLOCK_SIZE * 10):
+            df = generate_rows(table_key, start, start + BLOCK_SIZE * 10, context)[fields]
+            for values in df.itertuples(index=False, name=None):
+                values = list(values)
+                if link_column:
+                    cell = WriteOnlyCell(worksheet, value=values[0])
+                    cell.hyperlink = PROJECT_URL.format(values[0])
+                    values[0] = cell
+                worksheet.append(values)
+    workbook.save(file_path)
+    return file_path
+
+
+def _write_part(table_key: str, start: int, stop: int, context: GenerationContext,
+                output_dir: str, output_format: str) -> int:
+    """Writes rows start .. stop as one output part and returns the row count"""
+    df = generate_rows(table_key, start, stop, context)
+    part = start // max(stop - start, 1)
+    if output_format == 'parquet':
+        df.to_parquet(os.path.join(output_dir, f"part-{part:05d}.parquet"), index=False)
+    elif output_format == 'csv':
+        df.to_csv(os.path.join(output_dir, f"part-{part:05d}.csv"), index=False)
+    elif output_format == 'json':
+        # API-shaped pages, numbered like the fetcher requests them
+        page_size = API_CONFIG['records_per_page']
+        for page_start in range(0, len(df), page_size):
+            page = (start + page_start) // page_size + 1
+            records = df.iloc[page_start:page_start + page_size].to_dict('records')
+            with open(os.path.join(output_dir, f"page-{page:06d}.json"), 'w') as f:
+                json.dump({'count': context.rows, 'data': records}, f)
+    else:
+        raise ValueError(f"Unsupported output format '{output_format}'")
+    return len(df)
+
+
+def write_table(table_key: str, num_rows: int, num_projects: int, output_dir: str, output_format: str,
+                chunk_rows: int, workers: int, seed: int = BENCHMARK_CONFIG['seed']) -> str:
+    """Writes a synthetic table as parts of `chunk_rows` rows, generated in parallel"""
+    table_dir = os.path.join(output_dir, output_format, TABLES[table_key])
+    os.makedirs(table_dir, exist_ok=True)
+    # Keep API pages whole within a part
+    page_size = API_CONFIG['records_per_page']
+    chunk_rows = max(chunk_rows // page_size, 1) * page_size
+
+    context = GenerationContext(rows=num_rows, num_projects=num_projects, seed=seed)
+    start_time = time.time()
+    written = 0
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(_write_part, table_key, start, start + chunk_rows, context, table_dir, output_format)
+            for start in range(0, num_rows, chunk_rows)
+        ]
+        for future in concurrent.futures.as_completed(futures):
+            written += future.result()
+            logger.info(f"{TABLES[table_key]}: {written}/{num_rows} rows "
+                        f"({written / max(time.time() - start_time, 1e-6):.0f} rows/s)")
+    return table_dir
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=LOG_CONFIG['level'], format=LOG_CONFIG['format'])
+
+    parser = argparse.ArgumentParser(description="Generate synthetic World Bank datasets")
+    parser.add_argument('--tables', help="comma-separated table keys from config.TABLES (default: all)")
+    parser.add_argument('--scale', type=float, default=1, help="multiple of the production volumes")
+    parser.add_argument('--rows', action='append', default=[], metavar='TABLE=N',
+                        help="exact row count for a table, overriding --scale")
+    parser.add_argument('--format', choices=['parquet', 'csv', 'json', 'xlsx'], default='parquet',
+                        help="json writes API pages; xlsx writes the projects all.xlsx")
+    parser.add_argument('--output', default=BENCHMARK_CONFIG['synthetic_dir'])
+    parser.add_argument('--chunk-rows', type=int, default=1000000, help="rows per output part")
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--seed', type=int, default=BENCHMARK_CONFIG['seed'])
+    args = parser.parse_args()
+
+    num_projects = int(BENCHMARK_CONFIG['volumes']['projects'] * args.scale)
+    if args.format == 'xlsx':
+        os.makedirs(args.output, exist_ok=True)
+        file_path = write_projects_workbook(os.path.join(args.output, 'all.xlsx'), num_projects, args.seed)
+        logger.info(f"Wrote {file_path}")
+        sys.exit(0)
+
+    row_overrides = {}
+    for override in args.rows:
+        table_key, _, count = override.partition('=')
+        row_overrides[table_key] = int(count)
+    table_keys = args.tables.split(',') if args.tables else list(TABLES)
+    unknown = [table_key for table_key in table_keys if table_key not in SCHEMAS]
+    if unknown:
+        parser.error(f"Unknown tables: {unknown}")
+
+    for table_key in table_keys:
+        num_rows = row_overrides.get(table_key, table_rows(table_key, args.scale))
+        logger.info(f"Generating {num_rows} rows for {TABLES[table_key]}...")
+        table_dir = write_table(
+            table_key, num_rows, num_projects, args.output, args.format,
+            args.chunk_rows, args.workers, args.seed
+        )
+        logger.info(f"Wrote {TABLES[table_key]} to {table_dir}")
@@ -1,11 +1,13 @@
 # pipeline/src/config.py
 """Configuration settings for our data pipeline"""
+import os
 
 # World Bank API configurations
 API_CONFIG = {
-    'projects_url': 'https://search.worldbank.org/api/v3/projects/all.xlsx',
+    'projects_url': os.getenv('WB_PROJECTS_URL', 'https://search.worldbank.org/api/v3/projects/all.xlsx'),
     # 'gef_projects_url': 'https://www.thegef.org/sites/default/files/views_data_export/projects_data_export_1/1741625775/projects.csv',
-    'base_url': 'https://datacatalogapi.worldbank.org/dexapps/fone/api/apiservice',
+    'gef_projects_url': os.getenv('GEF_PROJECTS_URL'),
+    'base_url': os.getenv('WB_API_BASE_URL', 'https://datacatalogapi.worldbank.org/dexapps/fone/api/apiservice'),
     'endpoints': {
         'credit_statements': {
             'dataset_id': 'DS00001',
@@ -64,12 +66,210 @@ TABLES = {
     'loan_statements': 'wb_loan_statements',
     'procurement_notices': 'wb_procurement_notices',
     'financial_intermediary_funds_contributions': 'wb_financial_intermediary_funds_contributions',
-    'net_flows_and_commitments': 'wb_net_flows_and_commitments'
+    'net_flows_and_commitments': 'wb_net_flows_and_commitments',
+    # scraped
+    'project_relationships': 'wb_project_relationships'
 }
 
+# Indexes created on a table after every load, as lists of columns. The
+# first index of the API tables matches the key the backend pages them by
+# (REQUIRED_TABLES), the others its filter columns (LIST_FILTER_COLUMNS).
+TABLE_INDEXES = {
+    'world_bank_projects': [['project_id'], ['country'], ['region'], ['project_status']],
+    'themes': [['project_id', 'level_1', 'level_2', 'level_3']],
+    'sectors': [['project_id', 'major_sector', 'sector']],
+    'geo_locations': [['project_id', 'geo_loc_id', 'place_id']],
+    'financers': [['project', 'financer_id']],
+    'credit_statements': [['credit_number'], ['project_id'], ['country_code']],
+    'contract_awards': [['wb_contract_number', 'project_id'], ['project_id'], ['supplier_id'], ['borrower_country_code']],
+    'project_relationships': [['project_id'], ['related_id'], ['relation_type', 'project_id']]
+}
+
+# Data sources as lazily imported plugins (see plugins.py, sources.py). Hooks
+# are "module:function" references imported only when one of the source's
+# datasets runs. `datasets` maps each dataset to the table keys it produces;
+# a source with `enriches` extends another dataset's tables after its transform
+# and may add the tables listed in its `tables`.
+SOURCE_PLUGINS = {
+    'projects_excel': {
+        'datasets': {'projects': ['world_bank_projects', 'themes', 'sectors', 'geo_locations', 'financers']},
+        'fetch': 'sources:fetch_projects_excel',
+        'transform': 'sources:transform_projects_excel',
+        'cleanup': 'sources:remove_temp_file'
+    },
+    'gef_csv': {
+        # Also needs the gef_projects entry in TABLES
+        'enabled': False,
+        'datasets': {'gef_projects': ['gef_projects']},
+        'fetch': 'sources:fetch_gef_projects_csv',
+        'transform': 'sources:transform_gef_projects_csv',
+        'cleanup': 'sources:remove_temp_file'
+    },
+    'api': {
+        'datasets': {endpoint: [endpoint] for endpoint in API_CONFIG['endpoints']},
+        'fetch': 'sources:fetch_api_endpoint',
+        'transform': 'sources:transform_api_data'
+    },
+    'project_relationships': {
+        'enabled': os.getenv('SCRAPE_PROJECT_RELATIONSHIPS', 'false').lower() == 'true',
+        'enriches': 'projects',
+        'enrich': 'sources:enrich_project_relationships',
+        'tables': ['project_relationships']
+    }
+}
+
+# Cache of scraped project relationships (see scrape_cache.py). Results expire
+# after a number of days depending on the project status; None never expires.
+SCRAPE_CACHE_CONFIG = {
+    'path': os.getenv('SCRAPE_CACHE_PATH', '/app/data/scrape_cache.sqlite'),
+    'store_html': os.getenv('SCRAPE_CACHE_STORE_HTML', 'false').lower() == 'true',  # keep a compressed copy of each page
+    'ttl_days': {
+        'closed': 365,
+        'dropped': 365,
+        'active': 7,
+        'pipeline': 3,
+        'default': 7,       # any other or unknown status
+        'incomplete': 1     # pages that rendered without the relationship block
+    }
+}
+
+# Relationship enrichment job (see enrichment.py). All workers share one rate
+# limit; a run that hits its time budget is resumed by the next one.
+ENRICHMENT_CONFIG = {
+    'requests_per_second': float(os.getenv('SCRAPE_REQUESTS_PER_SECOND', '4')),
+    'burst': 8,
+    'concurrency': int(os.getenv('SCRAPE_CONCURRENCY', '8')),
+    'time_budget_seconds': float(os.getenv('SCRAPE_TIME_BUDGET_SECONDS', str(3 * 3600))),  # 0 for no limit
+    'max_attempts': 3,        # per project and run
+    'progress_every': 250,    # projects between progress log lines
+    # Only scrape projects that are new or changed in these columns since the
+    # last run, or whose cached result expired. Projects with an immutable
+    # status keep their result even once it expired.
+    'incremental': os.getenv('SCRAPE_INCREMENTAL', 'true').lower() == 'true',
+    'change_columns': ['project_status', 'last_stage_reached_name'],
+    'immutable_statuses': ['closed', 'dropped']
+}
+
+# Pipelined executor settings (see executor.py)
+EXECUTOR_CONFIG = {
+    'fetch_workers': 5,       # datasets downloaded concurrently
+    'transform_workers': 2,   # datasets transformed concurrently
+    'queue_size': 2           # items buffered between stages before backpressure applies
+}
+
+# Memory-bounded execution (see memory.py). With a budget set the executor
+# limits datasets in flight and spills data waiting between stages to disk.
+MEMORY_CONFIG = {
+    'budget_bytes': int(float(os.getenv('PIPELINE_MEMORY_BUDGET_MB', '0')) * 1024 ** 2),  # 0 disables the budget
+    'max_datasets_in_flight': int(os.getenv('PIPELINE_MAX_DATASETS_IN_FLIGHT', '2')),
+    'admit_fraction': 0.6,   # new datasets start only below this share of the budget
+    'spill_fraction': 0.8,   # data waiting between stages is spilled above this share
+    'spill_dir': os.getenv('SPILL_DIR', '/app/data/spill')
+}
+
+# Postgres-backed work queue for scaling a run out across worker processes (see workqueue.py)
+WORK_QUEUE_CONFIG = {
+    'enabled': os.getenv('PIPELINE_WORK_QUEUE', 'false').lower() == 'true',  # enqueue runs instead of executing them
+    'tasks_table': 'pipeline_tasks',
+    'results_table': 'pipeline_task_results',
+    'pages_per_task': 20,        # API pages fetched by one task
+    'lease_seconds': 600,        # a task whose worker stops heartbeating is reclaimed after this
+    'heartbeat_interval': 60,
+    'max_attempts': 3,
+    'retry_delay': 30,           # seconds, multiplied by the attempt number
+    'poll_interval': 5,          # seconds between claims when the queue is empty
+    'retention_days': 7          # finished runs are removed from the queue after this
+}
+
+# Prometheus metrics endpoint of the long-running pipeline process (see metrics.py)
+METRICS_CONFIG = {
+    'enabled': os.getenv('METRICS_ENABLED', 'true').lower() == 'true',
+    'host': os.getenv('METRICS_HOST', '0.0.0.0'),
+    'port': int(os.getenv('METRICS_PORT', '9108')),
+    'rss_sample_interval': 0.2  # seconds between RSS samples during transforms
+}
+
+# Run history catalog (see run_history.py)
+RUN_HISTORY_CONFIG = {
+    'enabled': os.getenv('RUN_HISTORY_ENABLED', 'true').lower() == 'true',
+    'runs_table': 'pipeline_runs',
+    'stages_table': 'pipeline_run_stages'
+}
+
+# Per-table data versions, bumped after every successful load or view refresh
+# (see loader.py). The backend keys its response cache and ETags on them.
+# Versions are drawn from one sequence, so concurrent workers never share one.
+DATA_VERSION_CONFIG = {
+    'table': 'pipeline_data_versions',
+    'sequence': 'pipeline_data_version_seq'
+}
+
+# Materialized views over the saved query library (see materializer.py)
+MATERIALIZED_VIEWS_CONFIG = {
+    'queries_dir': os.getenv('QUERIES_DIR', '/app/queries'),
+    'view_prefix': 'mv_',
+    'row_id_column': 'mv_row_id'
+}
+
+# Single-stage runs and profiling from the command line (see stages.py, profiling.py)
+STAGE_CONFIG = {
+    'archive_dir': os.getenv('ARCHIVE_DIR', '/app/data/archive'),    # raw payloads from the fetch stage
+    'staging_dir': os.getenv('STAGING_DIR', '/app/data/staging'),    # transformed tables as Parquet
+    'profile_dir': os.getenv('PROFILE_DIR', '/app/data/profiles'),
+    'profile_sample_interval': 0.005,  # seconds between stack samples in sample mode
+    'profile_top': 25                  # cProfile entries logged per stage
+}
 
 # Fetch interval in seconds (default 1 hour)
 FETCH_INTERVAL = 604800
+# Per-dataset refresh cadences (see scheduler.py). Each entry is either a
+# number of seconds or a cron expression "minute hour day month weekday".
+# Datasets without an entry fall back to FETCH_INTERVAL.
+SCHEDULE_CONFIG = {
+    'default': FETCH_INTERVAL,
+    'datasets': {
+        'procurement_notices': '0 */6 * * *',                           # every 6 hours
+        'contract_awards': '0 1 * * *',                                 # daily
+        'corporate_procurement_contract_awards': '0 1 * * *',           # daily
+        'projects': '0 2 * * *',                                        # daily
+        'credit_statements': '0 3 * * 1',                               # weekly
+        'loan_statements': '0 3 * * 1',                                 # weekly
+        'trust_fund_commitments': '0 4 * * 1',                          # weekly
+        'net_flows_and_commitments': '0 4 1 * *',                       # monthly
+        'financial_intermediary_funds_contributions': '0 5 1 * *'       # monthly
+    },
+    'jitter_seconds': 900,   # random delay added to each due time
+    'retry_delay': 3600,     # failed datasets are retried after this many seconds
+    'max_sleep': 3600,       # longest the scheduler sleeps between checks
+    'state_file': os.getenv('SCHEDULE_STATE_FILE', '/app/state/schedule_state.json')
+}
+
+# Local World Bank API stand-in and benchmark suite (see benchmarks/)
+BENCHMARK_CONFIG = {
+    # Approximate row counts of the live datasets, i.e. the 1x volume.
+    # 'projects' is the number of projects; the other project sheets scale with it.
+    'volumes': {
+        'projects': 22000,
+        'credit_statements': 9500,
+        'loan_statements': 10000,
+        'contract_awards': 230000,
+        'procurement_notices': 150000,
+        'corporate_procurement_contract_awards': 25000,
+        'trust_fund_commitments': 60000,
+        'financial_intermediary_funds_contributions': 15000,
+        'net_flows_and_commitments': 20000,
+        'project_relationships': 6000
+    },
+    'scales': [1, 10, 100],
+    'latency': 0.05,          # seconds added to every stand-in response
+    'latency_jitter': 0.05,   # random extra latency of up to this many seconds
+    'error_rate': 0.0,        # fraction of stand-in requests answered with a 503
+    'seed': 42,
+    'table_prefix': 'bench_', # loads go to bench_<table>, never the real tables
+    'workbook_dir': os.getenv('BENCHMARK_WORKBOOK_DIR', '/tmp/wb_benchmark'),
+    'synthetic_dir': os.getenv('SYNTHETIC_DATA_DIR', '/tmp/wb_synthetic'),
+    'results_dir': os.getenv('BENCHMARK_RESULTS_DIR', '/app/benchmarks/results')
+}
 
 # Logging configuration
 LOG_CONFIG = {
@@ -0,0 +1,460 @@
+# pipeline/src/enrichment.py
+"""
+Rate-limited, resumable enrichment of projects with their relationships.
+
+RelationshipEnrichmentJob scrapes every project without a fresh result in
+the relationship cache with a fixed number of concurrent workers, all taking
+their requests from one token bucket so the site sees a steady rate however
+many workers run. Each result is written to the cache as soon as it is
+parsed, and a progress ledger next to the cache records which projects of
+the current run are done or failed. A run that hits its time budget or is
+interrupted leaves its ledger behind and the next run resumes it.
+
+In incremental mode (the default) a run only scrapes projects that are new,
+changed in one of ENRICHMENT_CONFIG['change_columns'] since the last run, or
+have no fresh cached result; closed and dropped projects with a result are
+never scraped again. The project fields each run saw are kept in the ledger,
+so scrape volume follows the churn of the portfolio rather than its size.
+
+The job runs as part of the projects dataset (see sources.py) or on its own
+against the loaded projects table:
+
+    python src/enrichment.py --time-budget 3600
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import pandas as pd
+from config import ENRICHMENT_CONFIG
+from scrape_cache import ScrapeCache
+from scraper import (BrowserPool, HTTP_FIRST, async_cleanup_browsers, create_http_session, fetch_page,
+                     has_main_detail, log_scrape_stats, parse_page, start_parse_pool, stop_parse_pool)
+
+logger = logging.getLogger(__name__)
+
+CREATE_LEDGER_SQL = [
+    """
+    CREATE TABLE IF NOT EXISTS enrichment_runs (
+        run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        started_at REAL NOT NULL,
+        finished_at REAL,
+        total INTEGER NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS enrichment_progress (
+        run_id INTEGER NOT NULL,
+        project_id TEXT NOT NULL,
+        url TEXT NOT NULL,
+        status TEXT,
+        state TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        error TEXT,
+        updated_at REAL,
+        PRIMARY KEY (run_id, project_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS project_snapshots (
+        project_id TEXT PRIMARY KEY,
+        fingerprint TEXT NOT NULL,
+        updated_at REAL NOT NULL
+    )
+    """
+]
+
+
+class TokenBucket:
+    """
+    Allows `rate` acquisitions per second on average and bursts of up to
+    `burst`. Create it inside the event loop it is used from.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class ProgressLedger:
+    """
+    Per-project progress of enrichment runs and the project fields the last
+    run saw, kept in the relationship cache file
+    """
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            for statement in CREATE_LEDGER_SQL:
+                self._conn.execute(statement)
+
+    def close(self):
+        self._conn.close()
+
+    def unfinished_run(self) -> Optional[int]:
+        row = self._conn.execute(
+            "SELECT run_id FROM enrichment_runs WHERE finished_at IS NULL ORDER BY run_id DESC LIMIT 1"
+        ).fetchone()
+        return row[0] if row else None
+
+    def start(self, projects: Dict[str, Tuple[str, Optional[str]]]) -> int:
+        """Starts a run over {project_id: (url, status)} and returns its ID"""
+        now = time.time()
+        with self._conn:
+            run_id = self._conn.execute(
+                "INSERT INTO enrichment_runs (started_at, total) VALUES (?, ?)", (now, len(projects))
+            ).lastrowid
+            self._conn.executemany(
+                "INSERT INTO enrichment_progress (run_id, project_id, url, status, updated_at) VALUES (?, ?, ?, ?, ?)",
+                [(run_id, project_id, url, status, now) for project_id, (url, status) in projects.items()]
+            )
+        return run_id
+
+    def pending(self, run_id: int, max_attempts: int) -> List[Tuple[str, str, Optional[str], int]]:
+        """(project_id, url, status, attempts) of the projects still to scrape in a run"""
+        return self._conn.execute(
+            "SELECT project_id, url, status, attempts FROM enrichment_progress "
+            "WHERE run_id = ? AND state != 'done' AND attempts < ? ORDER BY project_id",
+            (run_id, max_attempts)
+        ).fetchall()
+
+    def mark(self, run_id: int, project_id: str, done: bool, error: Optional[str] = None):
+        with self._conn:
+            self._conn.execute(
+                "UPDATE enrichment_progress SET state = ?, attempts = attempts + 1, error = ?, updated_at = ? "
+                "WHERE run_id = ? AND project_id = ?",
+                ('done' if done else 'failed', error, time.time(), run_id, project_id)
+            )
+
+    def finish(self, run_id: int):
+        with self._conn:
+            self._conn.execute("UPDATE enrichment_runs SET finished_at = ? WHERE run_id = ?", (time.time(), run_id))
+
+    def done(self, run_id: int) -> Set[str]:
+        return {row[0] for row in self._conn.execute(
+            "SELECT project_id FROM enrichment_progress WHERE run_id = ? AND state = 'done'", (run_id,)
+        )}
+
+    def snapshots(self) -> Dict[str, str]:
+        """Fingerprint of every project as of the last run that saw it"""
+        return dict(self._conn.execute("SELECT project_id, fingerprint FROM project_snapshots").fetchall())
+
+    def save_snapshots(self, fingerprints: Dict[str, str]):
+        now = time.time()
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO project_snapshots (project_id, fingerprint, updated_at) VALUES (?, ?, ?)",
+                [(project_id, fingerprint, now) for project_id, fingerprint in fingerprints.items()]
+            )
+
+    def summary(self, run_id: int) -> Dict[str, int]:
+        return dict(self._conn.execute(
+            "SELECT state, COUNT(*) FROM enrichment_progress WHERE run_id = ? GROUP BY state", (run_id,)
+        ).fetchall())
+
+
+def project_fingerprint(values: Iterable[Any]) -> str:
+    """Fingerprint of a project's change columns, compared between runs"""
+    return json.dumps([None if value is None or (isinstance(value, float) and value != value) else str(value)
+                       for value in values])
+
+
+class RelationshipEnrichmentJob:
+    """
+    Scrapes the relationships of every given project without a fresh cached
+    result, within `time_budget` seconds (0 for no limit). Settings left as
+    None come from ENRICHMENT_CONFIG.
+    """
+
+    def __init__(self, cache: ScrapeCache, rate: float = None, burst: int = None, concurrency: int = None,
+                 time_budget: float = None, max_attempts: int = None):
+        self.cache = cache
+        self.rate = ENRICHMENT_CONFIG['requests_per_second'] if rate is None else rate
+        self.burst = burst or ENRICHMENT_CONFIG['burst']
+        self.concurrency = concurrency or ENRICHMENT_CONFIG['concurrency']
+        self.time_budget = ENRICHMENT_CONFIG['time_budget_seconds'] if time_budget is None else time_budget
+        self.max_attempts = max_attempts or ENRICHMENT_CONFIG['max_attempts']
+        self.ledger = ProgressLedger(cache.path)
+
+    def close(self):
+        self.ledger.close()
+
+    def select(self, projects: Dict[str, Tuple[str, Optional[str]]],
+               fingerprints: Optional[Dict[str, str]] = None) -> Dict[str, Tuple[str, Optional[str]]]:
+        """
+        The projects to scrape: those without a fresh cached result, or with
+        `fingerprints` those that are new or changed since the last run, or
+        whose result expired unless their status is immutable.
+        """
+        fresh = self.cache.get_many(projects)
+        if fingerprints is None:
+            stale = {project_id: value for project_id, value in projects.items() if project_id not in fresh}
+            logger.info(f"{len(fresh)} projects have cached relationships, {len(stale)} to scrape")
+            return stale
+
+        stored = self.cache.get_many(projects, include_expired=True)
+        snapshots = self.ledger.snapshots()
+        immutable = {status.lower() for status in ENRICHMENT_CONFIG['immutable_statuses']}
+        selected, reasons = {}, {'new': 0, 'changed': 0, 'expired': 0}
+        for project_id, (url, status) in projects.items():
+            previous = snapshots.get(project_id)
+            if project_id not in stored:
+                reason = 'new'
+            elif previous is not None and previous != fingerprints.get(project_id):
+                reason = 'changed'
+            elif project_id in fresh or (status or '').strip().lower() in immutable:
+                continue
+            else:
+                reason = 'expired'
+            selected[project_id] = (url, status)
+            reasons[reason] += 1
+        logger.info(f"Incremental enrichment: {len(selected)} of {len(projects)} projects to scrape "
+                    f"({reasons['new']} new, {reasons['changed']} changed, {reasons['expired']} expired)")
+        return selected
+
+    def run(self, projects: Dict[str, Tuple[str, Optional[str]]],
+            fingerprints: Optional[Dict[str, str]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Enriches {project_id: (url, status)} and returns the stored results of
+        those projects, including the ones scraped by earlier runs. With
+        `fingerprints` ({project_id: fingerprint}, see project_fingerprint)
+        only new and changed projects are scraped.
+        """
+        selected = self.select(projects, fingerprints)
+        run_id = self.ledger.unfinished_run()
+        if run_id is not None:
+            logger.info(f"Resuming enrichment run {run_id} ({self.ledger.summary(run_id)})")
+        else:
+            run_id = self.ledger.start(selected)
+
+        pending = self.ledger.pending(run_id, self.max_attempts)
+        if pending:
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            try:
+                loop.run_until_complete(self._scrape(run_id, pending))
+            finally:
+                loop.run_until_complete(async_cleanup_browsers())
+                loop.close()
+                stop_parse_pool()
+                log_scrape_stats()
+
+        if fingerprints is not None:
+            # Projects left unscraped keep their old snapshot, so the next run picks them again
+            done = self.ledger.done(run_id)
+            self.ledger.save_snapshots({
+                project_id: fingerprint for project_id, fingerprint in fingerprints.items()
+                if project_id not in selected or project_id in done
+            })
+
+        if not self.ledger.pending(run_id, self.max_attempts):
+            self.ledger.finish(run_id)
+            logger.info(f"Enrichment run {run_id} finished: {self.ledger.summary(run_id)}")
+        else:
+            logger.info(f"Enrichment run {run_id} stopped with projects left, the next run resumes it: "
+                        f"{self.ledger.summary(run_id)}")
+        return self.cache.get_many(projects, include_expired=fingerprints is not None)
+
+    async def _scrape(self, run_id: int, pending: List[Tuple[str, str, Optional[str], int]]):
+        deadline = time.monotonic() + self.time_budget if self.time_budget else None
+        limiter = TokenBucket(self.rate, self.burst)
+        queue: asyncio.Queue = asyncio.Queue()
+        for item in pending:
+            queue.put_nowait(item)
+        counts = {'done': 0, 'failed': 0}
+        started = time.monotonic()
+        start_parse_pool(len(pending))
+        logger.info(f"Scraping {len(pending)} projects with {self.concurrency} workers at "
+                    f"{self.rate} requests/s" + (f" within {self.time_budget}s" if deadline else ""))
+
+        async def worker(pool, session):
+            while not queue.empty():
+                if deadline is not None and time.monotonic() >= deadline:
+                    return
+                project_id, url, status, attempts = queue.get_nowait()
+                error = None
+                try:
+                    html = await fetch_page(url, pool, session, limiter)
+                    if html:
+                        result = await parse_page(html, url)
+                        self.cache.put(result, status=status, html=html, complete=has_main_detail(html))
+                    else:
+                        error = "fetch failed"
+                except Exception as e:
+                    logger.error(f"Error enriching {project_id}: {str(e)}")
+                    error = str(e)
+                self.ledger.mark(run_id, project_id, error is None, error)
+
+                if error is None:
+                    counts['done'] += 1
+                elif attempts + 1 < self.max_attempts:
+                    # Retry at the back of the queue, after the projects not tried yet
+                    queue.put_nowait((project_id, url, status, attempts + 1))
+                    continue
+                else:
+                    counts['failed'] += 1
+
+                processed = counts['done'] + counts['failed']
+                if processed % ENRICHMENT_CONFIG['progress_every'] == 0:
+                    rate = processed / (time.monotonic() - started)
+                    logger.info(f"Enriched {processed}/{len(pending)} projects ({counts['failed']} failed), "
+                                f"{rate:.1f}/s, about {(len(pending) - processed) / rate / 60:.0f} min left")
+
+        async with BrowserPool() as pool:
+            session = create_http_session() if HTTP_FIRST else None
+            try:
+                await asyncio.gather(*(worker(pool, session) for _ in range(self.concurrency)))
+            finally:
+                if session is not None:
+                    await session.close()
+        if deadline is not None and time.monotonic() >= deadline and not queue.empty():
+            logger.warning(f"Time budget of {self.time_budget}s reached with {queue.qsize()} projects left")
+
+
+def enrich_dataframe_with_relationships(df, url_column='project_id_url', use_cache=True,
+                                        status_column='project_status', time_budget: float = None):
+    """
+    Enriches a dataframe with the parent and associated projects of every
+    project. Results already in the cache are used as they are; the rest are
+    scraped by a RelationshipEnrichmentJob within its time budget, only for
+    new and changed projects in incremental mode. Without `use_cache` every
+    project is scraped and nothing is kept afterwards.
+    """
+    logger.info(f"Enriching {len(df)} projects with relationship data...")
+
+    # Initialize columns
+    if 'parent_project' not in df.columns:
+        df['parent_project'] = None
+    if 'associated_projects' not in df.columns:
+        df['associated_projects'] = "[]"
+
+    projects = {}
+    id_to_idx_map = {}
+    status_values = df[status_column] if status_column in df.columns else [None] * len(df)
+    for idx, (url, status) in enumerate(zip(df[url_column], status_values)):
+        if url and isinstance(url, str):
+            project_id = url.split('/')[-1]
+            projects[project_id] = (url, status if isinstance(status, str) else None)
+            id_to_idx_map[project_id] = idx
+
+    if not projects:
+        logger.warning("No valid URLs found in the dataframe")
+        return df
+
+    fingerprints = None
+    change_columns = [column for column in ENRICHMENT_CONFIG['change_columns'] if column in df.columns]
+    if ENRICHMENT_CONFIG['incremental'] and change_columns:
+        row_fingerprints = [project_fingerprint(row) for row in df[change_columns].itertuples(index=False, name=None)]
+        fingerprints = {project_id: row_fingerprints[idx] for project_id, idx in id_to_idx_map.items()}
+
+    if use_cache:
+        results = enrich_projects(ScrapeCache(), projects, fingerprints, time_budget=time_budget)
+    else:
+        with tempfile.TemporaryDirectory() as scratch_dir:
+            results = enrich_projects(ScrapeCache(os.path.join(scratch_dir, 'relationships.sqlite')),
+                                      projects, time_budget=time_budget)
+
+    # Update the dataframe with results
+    for project_id, result in results.items():
+        idx = id_to_idx_map[project_id]
+
+        # Extract parent project ID if available
+        if result.get("parent_project"):
+            df.at[idx, 'parent_project'] = result["parent_project"]["id"]
+
+        # Extract associated project IDs if available
+        if result.get("associated_projects"):
+            df.at[idx, 'associated_projects'] = json.dumps([ap["id"] for ap in result["associated_projects"]])
+
+    logger.info(f"Added relationship data for {len(results)} out of {len(projects)} projects")
+    return df
+
+
+def relationship_edges(df, url_column='project_id_url') -> pd.DataFrame:
+    """
+    Edge table of an enriched projects dataframe: one (project_id, related_id,
+    relation_type) row per parent ('parent') and associated project ('associated')
+    """
+    edges = []
+    for url, parent, associated in zip(df[url_column], df['parent_project'], df['associated_projects']):
+        if not url or not isinstance(url, str):
+            continue
+        project_id = url.split('/')[-1]
+        if parent and isinstance(parent, str):
+            edges.append((project_id, parent, 'parent'))
+        if associated and isinstance(associated, str):
+            edges.extend((project_id, related_id, 'associated') for related_id in json.loads(associated))
+    return pd.DataFrame(edges, columns=['project_id', 'related_id', 'relation_type']).drop_duplicates(ignore_index=True)
+
+
+def enrich_projects(cache: ScrapeCache, projects: Dict[str, Tuple[str, Optional[str]]],
+                    fingerprints: Optional[Dict[str, str]] = None, **job_settings) -> Dict[str, Dict[str, Any]]:
+    """Runs an enrichment job over {project_id: (url, status)}, closing the cache afterwards"""
+    job = RelationshipEnrichmentJob(cache, **job_settings)
+    try:
+        return job.run(projects, fingerprints)
+    finally:
+        job.close()
+        cache.close()
+
+
+if __name__ == "__main__":
+    import argparse
+    from dotenv import load_dotenv
+    from sqlalchemy import create_engine, text
+    from config import LOG_CONFIG, TABLES
+
+    logging.basicConfig(level=LOG_CONFIG['level'], format=LOG_CONFIG['format'])
+
+    parser = argparse.ArgumentParser(description="Scrape the relationships of the loaded projects into the relationship cache")
+    parser.add_argument('--time-budget', type=float, help="seconds to scrape for at most, 0 for no limit")
+    parser.add_argument('--rate', type=float, help="requests per second to the projects site")
+    parser.add_argument('--concurrency', type=int, help="projects scraped concurrently")
+    parser.add_argument('--limit', type=int, help="only consider this many projects")
+    parser.add_argument('--full', action='store_true', help="scrape every project without a fresh result, changed or not")
+    args = parser.parse_args()
+
+    load_dotenv()
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        raise ValueError("DATABASE_URL environment variable is not set")
+    engine = create_engine(database_url)
+
+    with engine.connect() as conn:
+        rows = conn.execute(text(
+            f"SELECT project_id_url, project_status, {', '.join(ENRICHMENT_CONFIG['change_columns'])} "
+            f"FROM {TABLES['world_bank_projects']} "
+            f"WHERE project_id_url IS NOT NULL ORDER BY project_id_url"
+            + (" LIMIT :limit" if args.limit else "")
+        ), {'limit': args.limit} if args.limit else {}).fetchall()
+    projects = {row[0].split('/')[-1]: (row[0], row[1]) for row in rows}
+    fingerprints = None
+    if ENRICHMENT_CONFIG['incremental'] and not args.full:
+        fingerprints = {row[0].split('/')[-1]: project_fingerprint(row[2:]) for row in rows}
+
+    results = enrich_projects(ScrapeCache(), projects, fingerprints, time_budget=args.time_budget,
+                              rate=args.rate, concurrency=args.concurrency)
+    print(f"{len(results)} of {len(projects)} projects have relationship results")
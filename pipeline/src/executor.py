@@ -0,0 +1,416 @@
+# pipeline/src/executor.py
+"""
+Pipelined executor for the data pipeline.
+
+Instead of fetching every source, then transforming everything, then loading
+everything, each dataset flows fetch -> transform -> load on its own. The
+stages are connected by bounded queues, so a slow stage applies backpressure
+to the one before it while fast datasets reach the database early.
+
+Under a memory budget (see memory.py) datasets are admitted one at a time as
+memory allows, and data waiting between stages is spilled to disk when RSS
+approaches the budget. The peak RSS of every stage is recorded either way.
+"""
+
+import logging
+import queue
+import threading
+import time
+import concurrent.futures
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from config import EXECUTOR_CONFIG, TABLE_INDEXES
+from memory import MemoryBudget, restore
+from metrics import (
+    STAGE_PEAK_RSS,
+    PeakRSSTracker,
+    track_transform,
+    record_transform_output,
+    record_load,
+    pop_fetch_totals
+)
+from profiling import profile_stage
+from materializer import (
+    discover_materialized_queries,
+    get_dependent_views,
+    drop_materialized_view,
+    refresh_views_for_tables
+)
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a queue's input
+_DONE = object()
+
+
+@dataclass
+class DatasetTask:
+    """One dataset flowing through fetch -> transform -> load"""
+    name: str
+    fetch: Callable[[], Any]
+    transform: Callable[[Any], Dict[str, pd.DataFrame]]
+    tables: List[str]
+    cleanup: Optional[Callable[[Any], None]] = None
+    # Tables added by an enrichment, which may fail without failing the dataset
+    optional_tables: List[str] = field(default_factory=list)
+
+    @property
+    def required_tables(self) -> List[str]:
+        return [table_key for table_key in self.tables if table_key not in self.optional_tables]
+
+
+def load_single_df(item, table_mapping, engine, materialized_queries=()):
+    """Worker function to load a single dataframe - defined outside for visibility"""
+    from loader import bump_data_version, create_table_indexes, load_dataframe, replace_table_contents
+
+    table_key, df = item
+    try:
+        if table_key in table_mapping:
+            df = restore(df)
+            table_name = table_mapping[table_key]
+            logger.info(f"Loading {table_key} data...")
+
+            # Keep tables that materialized views read from in place when possible
+            dependent_views = get_dependent_views(table_name, materialized_queries)
+            success = bool(dependent_views) and replace_table_contents(df, table_name, engine)
+
+            if not success:
+                # Postgres will not drop a table while views depend on it
+                for mq in dependent_views:
+                    drop_materialized_view(engine, mq)
+
+                success = load_dataframe(df, table_name, engine, create_backup=False)
+
+            if success and table_key in TABLE_INDEXES:
+                create_table_indexes(engine, table_name, TABLE_INDEXES[table_key])
+            if success:
+                bump_data_version(engine, table_name)
+            return table_key, success
+        else:
+            logger.warning(f"No table mapping found for {table_key}")
+            return table_key, False
+    except Exception as e:
+        logger.error(f"Error loading {table_key}: {str(e)}")
+        return table_key, False
+
+
+class PipelineExecutor:
+    """
+    Runs dataset tasks through fetch, transform and load stages concurrently.
+
+    Fetches run on a thread pool, transforms on a few worker threads and loads
+    on a single thread (loads stay sequential to avoid contention in Postgres).
+    """
+
+    def __init__(
+        self,
+        engine: Any,
+        table_mapping: Dict[str, str],
+        fetch_workers: int = EXECUTOR_CONFIG['fetch_workers'],
+        transform_workers: int = EXECUTOR_CONFIG['transform_workers'],
+        queue_size: int = EXECUTOR_CONFIG['queue_size'],
+        recorder: Optional[Any] = None,
+        profiler: Optional[Any] = None,
+        budget: Optional[MemoryBudget] = None
+    ):
+        self.engine = engine
+        self.recorder = recorder
+        self.profiler = profiler
+        self.budget = budget or MemoryBudget()
+        self.table_mapping = table_mapping
+        self.fetch_workers = fetch_workers
+        self.transform_workers = transform_workers
+        self.transform_queue = queue.Queue(maxsize=queue_size)
+        self.load_queue = queue.Queue(maxsize=queue_size)
+        self.results: Dict[str, bool] = {}
+        self.table_datasets: Dict[str, str] = {}
+        self.table_bytes: Dict[str, int] = {}
+        self.stage_peaks: Dict[str, int] = {}
+        self.materialized_queries = []
+        self._pending_tables: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._start_time = None
+
+    def run(self, tasks: List[DatasetTask]) -> Dict[str, bool]:
+        """
+        Runs all tasks to completion and returns the load result per table key.
+        """
+        self._start_time = time.time()
+        self.results = {}
+        self.table_datasets = {key: task.name for task in tasks for key in task.tables}
+        self.table_bytes = {}
+        self.stage_peaks = {}
+        self._pending_tables = {}
+        self.materialized_queries = discover_materialized_queries()
+        if self.budget.enabled:
+            logger.info(f"Running under a memory budget of {self.budget.budget_bytes / 1024 ** 2:.0f} MB "
+                        f"with at most {self.budget.max_in_flight} datasets in flight")
+
+        scheduled_tables = {
+            self.table_mapping[key] for task in tasks for key in task.tables
+            if key in self.table_mapping
+        }
+
+        transform_threads = [
+            threading.Thread(target=self._transform_worker, name=f"transform-{i}", daemon=True)
+            for i in range(self.transform_workers)
+        ]
+        load_thread = threading.Thread(
+            target=self._load_worker, args=(scheduled_tables,), name="load", daemon=True
+        )
+
+        for thread in transform_threads:
+            thread.start()
+        load_thread.start()
+
+        try:
+            self._fetch_stage(tasks)
+        finally:
+            # Fetching is done (or failed): stop the transform workers, then the loader
+            for _ in transform_threads:
+                self.transform_queue.put(_DONE)
+            for thread in transform_threads:
+                thread.join()
+            self.load_queue.put(_DONE)
+            load_thread.join()
+
+        logger.info("Peak RSS per stage: " + ', '.join(
+            f"{stage} {peak / 1024 ** 2:.0f} MB" for stage, peak in self.stage_peaks.items()
+        ) + (f" ({self.budget.spilled_bytes / 1024 ** 2:.0f} MB spilled)" if self.budget.spilled_bytes else ''))
+        return self.results
+
+    def _elapsed(self) -> float:
+        return time.time() - self._start_time
+
+    def _record_stage(self, stage: str, **kwargs):
+        if self.recorder is not None:
+            self.recorder.record_stage(stage, **kwargs)
+
+    def _record_peak(self, stage: str, name: str, peak_rss: int):
+        # Stages overlap, so this is the process peak while the stage ran
+        STAGE_PEAK_RSS.labels(stage=stage, name=name).set(peak_rss)
+        with self._lock:
+            self.stage_peaks[stage] = max(self.stage_peaks.get(stage, 0), peak_rss)
+
+    def _finish_table(self, dataset: str):
+        """Counts off a loaded table and releases the dataset's budget slot after its last one"""
+        with self._lock:
+            remaining = self._pending_tables.get(dataset, 1) - 1
+            self._pending_tables[dataset] = remaining
+        if remaining <= 0:
+            self.budget.release(dataset)
+
+    def _spill_if_needed(self, name: str, data: Any) -> Any:
+        return self.budget.spill(name, data) if self.budget.should_spill() else data
+
+    def _fetch_stage(self, tasks: List[DatasetTask]):
+        """Fetches every dataset, handing each one to the transform stage as soon as it arrives"""
+        def fetch_task(task: DatasetTask):
+            started_at = datetime.now()
+            pop_fetch_totals(task.name)
+            raw, error = None, None
+            # Blocks while too many datasets are in flight for the memory budget
+            self.budget.acquire(task.name)
+            tracker = PeakRSSTracker().start()
+            try:
+                logger.info(f"Fetching data for {task.name}...")
+                with profile_stage(self.profiler, 'fetch', task.name):
+                    raw = task.fetch()
+                if raw is None:
+                    error = "No data fetched"
+            except Exception as e:
+                error = str(e)
+            peak_rss = tracker.stop()
+            self._record_peak('fetch', task.name, peak_rss)
+
+            totals = pop_fetch_totals(task.name)
+            self._record_stage(
+                'fetch',
+                started_at=started_at,
+                finished_at=datetime.now(),
+                status='failed' if error else 'success',
+                dataset=task.name,
+                rows=len(raw['data']) if isinstance(raw, dict) and 'data' in raw else None,
+                num_bytes=totals['bytes'],
+                retries=totals['retries'],
+                failures=totals['failures'],
+                peak_rss_bytes=peak_rss,
+                error=error
+            )
+            if error:
+                logger.error(f"Error fetching {task.name}: {error}")
+                self.budget.release(task.name)
+                return
+            logger.info(f"Fetched {task.name} after {self._elapsed():.2f} seconds")
+            try:
+                # Blocks while the transform stage is saturated
+                self.transform_queue.put((task, self._spill_if_needed(task.name, raw)))
+            except Exception as e:
+                logger.error(f"Could not hand {task.name} to the transform stage: {str(e)}")
+                self._fail_tables(task.tables)
+                self.budget.release(task.name)
+            del raw
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.fetch_workers) as executor:
+            futures = [executor.submit(fetch_task, task) for task in tasks]
+            for future in concurrent.futures.as_completed(futures):
+                future.result()
+
+    def _transform_worker(self):
+        """Transforms fetched datasets and queues each resulting table for loading"""
+        while True:
+            item = self.transform_queue.get()
+            if item is _DONE:
+                return
+
+            task, raw = item
+            del item
+            # Tables of this dataset already handed to the loader, which accounts for them from there
+            handed_over = []
+            expected = None
+            try:
+                started_at = datetime.now()
+                error = None
+                tracker = None
+                try:
+                    logger.info(f"Processing data for {task.name}...")
+                    with track_transform(task.name) as tracker, profile_stage(self.profiler, 'transform', task.name):
+                        raw = restore(raw)
+                        dataframes = task.transform(raw) or {}
+                except Exception as e:
+                    logger.error(f"Error processing {task.name}: {str(e)}")
+                    error = str(e)
+                    dataframes = {}
+                finally:
+                    if task.cleanup:
+                        try:
+                            task.cleanup(raw)
+                        except Exception as e:
+                            logger.warning(f"Could not clean up after {task.name}: {str(e)}")
+                # Drop the raw payload before blocking on the load queue
+                del raw
+
+                peak_rss = tracker.peak if tracker is not None else 0
+                dataframes = {table_key: df for table_key, df in dataframes.items() if df is not None}
+                for table_key, df in dataframes.items():
+                    self.table_bytes[table_key] = record_transform_output(table_key, df)
+                self._record_peak('transform', task.name, peak_rss)
+                self._record_stage(
+                    'transform',
+                    started_at=started_at,
+                    finished_at=datetime.now(),
+                    status='failed' if error or not dataframes else 'success',
+                    dataset=task.name,
+                    rows=sum(len(df) for df in dataframes.values()),
+                    num_bytes=sum(self.table_bytes[table_key] for table_key in dataframes),
+                    peak_rss_bytes=peak_rss,
+                    error=error
+                )
+
+                if not dataframes:
+                    self.budget.release(task.name)
+                    continue
+                expected = list(dataframes)
+                with self._lock:
+                    self._pending_tables[task.name] = len(expected)
+                for table_key in expected:
+                    # Hand each table over without keeping a reference here
+                    df = self._spill_if_needed(table_key, dataframes.pop(table_key))
+                    # Blocks while the loader is busy
+                    self.load_queue.put((table_key, df))
+                    handed_over.append(table_key)
+                    del df
+            except Exception as e:
+                # Keep draining the queue: a dead worker would leave run() blocked on a put or join
+                logger.error(f"Transform stage failed for {task.name}: {str(e)}")
+                self._fail_tables([table_key for table_key in task.tables if table_key not in handed_over])
+                if expected is None:
+                    self.budget.release(task.name)
+                else:
+                    for _ in range(len(expected) - len(handed_over)):
+                        self._finish_table(task.name)
+
+    def _fail_tables(self, table_keys: List[str]):
+        """Records tables that never reached the database as failed loads"""
+        with self._lock:
+            for table_key in table_keys:
+                self.results.setdefault(table_key, False)
+
+    def _load_worker(self, scheduled_tables):
+        """
+        Loads tables one at a time and refreshes materialized views as soon as
+        all the tables they depend on in this run have been loaded.
+        """
+        loaded_tables = set()
+        refreshed_views = set()
+
+        while True:
+            item = self.load_queue.get()
+            if item is _DONE:
+                break
+
+            table_key = item[0]
+            tracker = None
+            finished = False
+            try:
+                num_rows = len(item[1])
+                started_at = datetime.now()
+                load_start = time.time()
+                tracker = PeakRSSTracker().start()
+                with profile_stage(self.profiler, 'load', table_key):
+                    table_key, success = load_single_df(
+                        item, self.table_mapping, self.engine, self.materialized_queries
+                    )
+                del item
+                peak_rss = tracker.stop()
+                record_load(table_key, num_rows, time.time() - load_start, success)
+                self._record_peak('load', table_key, peak_rss)
+                self._record_stage(
+                    'load',
+                    started_at=started_at,
+                    finished_at=datetime.now(),
+                    status='success' if success else 'failed',
+                    dataset=self.table_datasets.get(table_key),
+                    table_name=self.table_mapping.get(table_key, table_key),
+                    rows=num_rows,
+                    num_bytes=self.table_bytes.get(table_key),
+                    peak_rss_bytes=peak_rss
+                )
+                with self._lock:
+                    self.results[table_key] = success
+                finished = True
+                self._finish_table(self.table_datasets.get(table_key, table_key))
+                if not success:
+                    continue
+
+                logger.info(f"Loaded {table_key} after {self._elapsed():.2f} seconds")
+                table_name = self.table_mapping[table_key]
+                loaded_tables.add(table_name)
+                ready_views = [
+                    mq for mq in get_dependent_views(table_name, self.materialized_queries)
+                    if scheduled_tables.intersection(mq.depends_on) <= loaded_tables
+                ]
+                refreshed_views.update(mq.view_name for mq in ready_views)
+                refresh_views_for_tables(self.engine, [table_name], ready_views)
+            except Exception as e:
+                # Keep draining the queue: a dead loader would leave run() blocked on a put or join
+                if finished:
+                    logger.error(f"Error refreshing views after loading {table_key}: {str(e)}")
+                    continue
+                logger.error(f"Load stage failed for {table_key}: {str(e)}")
+                if tracker is not None:
+                    tracker.stop()
+                with self._lock:
+                    self.results[table_key] = False
+                self._finish_table(self.table_datasets.get(table_key, table_key))
+
+        # Views whose other dependencies failed still reflect the tables that did load
+        remaining_views = [mq for mq in self.materialized_queries if mq.view_name not in refreshed_views]
+        try:
+            refresh_views_for_tables(self.engine, loaded_tables, remaining_views)
+        except Exception as e:
+            logger.error(f"Error refreshing the remaining materialized views: {str(e)}")
@@ -8,6 +8,7 @@ from config import API_CONFIG
 from typing import Dict, Any, Optional, List
 from dataclasses import dataclass
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from metrics import record_request, record_page, record_retry, record_fetch_failure
 
 @dataclass
 class WorldBankAPIConfig:
@@ -16,6 +17,7 @@ class WorldBankAPIConfig:
     dataset_id: str
     resource_id: str
     records_per_page: int
+    endpoint_name: str = ''
 
     def get_url(self, page: int) -> str:
         """Constructs the URL for a specific page"""
@@ -32,7 +34,8 @@ def create_api_config(endpoint_name: str) -> WorldBankAPIConfig:
         base_url=str(API_CONFIG['base_url']),
         dataset_id=str(endpoint_config['dataset_id']),
         resource_id=str(endpoint_config['resource_id']),
-        records_per_page=int(API_CONFIG['records_per_page'])
+        records_per_page=int(API_CONFIG['records_per_page']),
+        endpoint_name=endpoint_name
     )
 
 def fetch_page_data(config: WorldBankAPIConfig, page: int) -> List[Dict[str, Any]]:
@@ -43,9 +46,12 @@ def fetch_page_data(config: WorldBankAPIConfig, page: int) -> List[Dict[str, Any
     while retry_count < API_CONFIG['max_retries']:
         try:
             logging.info(f"Fetching page {page}")
+            request_start = time.time()
             response = requests.get(url, timeout=API_CONFIG['timeout'])
+            record_request(config.endpoint_name, time.time() - request_start, len(response.content))
             response.raise_for_status()
             data = response.json()
+            record_page(config.endpoint_name)
 
             if 'data' not in data or not data['data']:
                 return []
@@ -54,12 +60,34 @@ def fetch_page_data(config: WorldBankAPIConfig, page: int) -> List[Dict[str, Any
 
         except requests.RequestException as e:
             retry_count += 1
+            record_retry(config.endpoint_name)
             logging.warning(f"Retry {retry_count}/{API_CONFIG['max_retries']} for page {page} after error: {str(e)}")
             time.sleep(API_CONFIG['retry_delay'])
 
     logging.error(f"Failed to fetch page {page} after {API_CONFIG['max_retries']} retries.")
+    record_fetch_failure(config.endpoint_name)
     return []
 
+def fetch_record_count(config: WorldBankAPIConfig) -> Optional[int]:
+    """Returns the total number of records an endpoint reports, or None if it cannot be read"""
+    url = config.get_url(1)
+    for retry_count in range(1, API_CONFIG['max_retries'] + 1):
+        try:
+            request_start = time.time()
+            response = requests.get(url, timeout=API_CONFIG['timeout'])
+            record_request(config.endpoint_name, time.time() - request_start, len(response.content))
+            response.raise_for_status()
+            data = response.json()
+            return int(data.get('count', len(data.get('data') or [])))
+        except (requests.RequestException, ValueError) as e:
+            record_retry(config.endpoint_name)
+            logging.warning(f"Retry {retry_count}/{API_CONFIG['max_retries']} for record count after error: {str(e)}")
+            time.sleep(API_CONFIG['retry_delay'])
+
+    logging.error(f"Failed to read the record count of {config.endpoint_name}.")
+    record_fetch_failure(config.endpoint_name)
+    return None
+
 def fetch_paginated_data(endpoint_name: str) -> Dict[str, Any]:
     """
     Fetches all data from a World Bank API endpoint with pagination support.
@@ -126,6 +154,7 @@ def fetch_projects_excel(url: str, tmp_path: str = "/tmp") -> Optional[str]:
         Path to the downloaded file or None if download failed
     """
     try:
+        request_start = time.time()
         response = requests.get(url, stream=True)
         response.raise_for_status()
         
@@ -136,11 +165,15 @@ def fetch_projects_excel(url: str, tmp_path: str = "/tmp") -> Optional[str]:
         os.makedirs(tmp_path, exist_ok=True)
         
         # Write the file in chunks to handle large files efficiently
+        num_bytes = 0
         with open(file_path, 'wb') as f:
             for chunk in response.iter_content(chunk_size=8192):
                 if chunk:
                     f.write(chunk)
+                    num_bytes += len(chunk)
         
+        record_request('projects', time.time() - request_start, num_bytes)
+        record_page('projects')
         logging.info(f"Successfully downloaded projects file to {file_path}")
         return file_path
         
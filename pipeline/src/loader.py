@@ -7,11 +7,14 @@ transformed data into our database while providing detailed feedback about the p
 
 import pandas as pd
 import logging
+import time
 from typing import Optional, Any, Dict
 from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.engine.base import Engine
 from datetime import datetime
 
+from config import DATA_VERSION_CONFIG
+
 # Setup logging for this module
 logger = logging.getLogger(__name__)
 
@@ -168,4 +171,106 @@ def load_dataframe(
         
     except Exception as e:
         logger.error(f"Error loading data to {table_name}: {str(e)}")
-        return False
\ No newline at end of file
+        return False
+
+def replace_table_contents(df: pd.DataFrame, table_name: str, engine: Any) -> bool:
+    """
+    Replaces the rows of an existing table without dropping it.
+
+    Tables that materialized views depend on cannot be dropped, so instead of
+    if_exists='replace' the table is truncated and refilled in one transaction.
+    Returns False when the DataFrame no longer fits the table (for example new
+    columns), so the caller can fall back to a full replace.
+    """
+    try:
+        inspector = inspect(engine)
+        if not inspector.has_table(table_name):
+            return False
+
+        existing_columns = {col['name'] for col in inspector.get_columns(table_name)}
+        if set(df.columns) != existing_columns:
+            logger.info(f"Columns of {table_name} changed, cannot reload in place")
+            return False
+
+        logger.info(f"Reloading {len(df)} rows into existing table: {table_name}")
+        with engine.begin() as conn:
+            conn.execute(text(f"TRUNCATE TABLE {table_name}"))
+            df.to_sql(
+                table_name,
+                conn,
+                if_exists='append',
+                index=False,
+                method='multi',
+                chunksize=10000
+            )
+        return True
+
+    except Exception as e:
+        logger.error(f"Error reloading data into {table_name}: {str(e)}")
+        return False
+
+def create_table_indexes(engine: Any, table_name: str, indexes) -> bool:
+    """
+    Creates the given indexes (lists of columns) on a table if they do not
+    exist yet. A full replace drops a table's indexes, so this runs after
+    every load.
+    """
+    try:
+        with engine.begin() as conn:
+            for columns in indexes:
+                index_name = f"{table_name}_{'_'.join(columns)}_idx"
+                conn.execute(text(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table_name} ({', '.join(columns)})"))
+        logger.info(f"Indexed {table_name} on {indexes}")
+        return True
+    except Exception as e:
+        logger.error(f"Error creating indexes on {table_name}: {str(e)}")
+        return False
+
+def ensure_data_versions_table(engine: Any) -> bool:
+    """
+    Creates the data versions table and its sequence, once at startup. A
+    sequence left behind a table from before it existed is moved past the
+    versions already handed out.
+    """
+    versions_table = DATA_VERSION_CONFIG['table']
+    sequence = DATA_VERSION_CONFIG['sequence']
+    try:
+        with engine.begin() as conn:
+            conn.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {versions_table} ("
+                f"table_name TEXT PRIMARY KEY, version BIGINT NOT NULL, updated_at TIMESTAMP NOT NULL)"
+            ))
+            conn.execute(text(f"CREATE SEQUENCE IF NOT EXISTS {sequence}"))
+            conn.execute(text(
+                f"SELECT setval('{sequence}', MAX(version)) FROM {versions_table} "
+                f"HAVING MAX(version) >= (SELECT last_value FROM {sequence})"
+            ))
+        return True
+    except Exception as e:
+        logger.error(f"Error creating the data versions table: {str(e)}")
+        return False
+
+
+def bump_data_version(engine: Any, table_name: str) -> Optional[int]:
+    """
+    Records that a table's contents changed. Every bump takes the next value
+    of one sequence shared by all tables, so the highest version also changes
+    whenever any table does and concurrent workers never write the same one.
+    Returns the new version, or None on failure.
+    """
+    versions_table = DATA_VERSION_CONFIG['table']
+    try:
+        with engine.begin() as conn:
+            version = conn.execute(
+                text(f"INSERT INTO {versions_table} (table_name, version, updated_at) "
+                     f"VALUES (:table_name, nextval('{DATA_VERSION_CONFIG['sequence']}'), :updated_at) "
+                     f"ON CONFLICT (table_name) DO UPDATE SET version = EXCLUDED.version, updated_at = EXCLUDED.updated_at "
+                     f"RETURNING version"),
+                {'table_name': table_name, 'updated_at': datetime.now()}
+            ).scalar()
+        logger.info(f"Data version of {table_name} is now {version}")
+        return version
+    except Exception as e:
+        logger.warning(f"Could not bump the data version of {table_name}, so cached API responses "
+                       f"for it were not invalidated: {str(e)}")
+        return None
@@ -0,0 +1,209 @@
+# pipeline/src/materializer.py
+"""
+Functions for maintaining materialized views over the saved query library.
+
+A query file opts in by starting with directive comments, for example:
+
+    -- @materialize
+    -- @depends_on: wb_contract_awards
+    -- @order_by: project_id DESC, supplier_country DESC
+
+After the tables a query depends on are loaded, the pipeline creates the
+matching materialized view (with a unique index) or refreshes it
+concurrently, so the backend can serve the precomputed result.
+
+A view keeps its query's row order only when @order_by repeats that order in
+terms of the query's output columns; the ORDER BY inside the query itself is
+not carried through the view, so without the directive the order is
+unspecified.
+"""
+
+import logging
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine.base import Engine
+
+from config import MATERIALIZED_VIEWS_CONFIG
+from loader import bump_data_version
+
+logger = logging.getLogger(__name__)
+
+DIRECTIVE_PATTERN = re.compile(r'^--\s*@(\w+)\s*(?::\s*(.*))?$')
+ORDER_BY_PATTERN = re.compile(r'\border\s+by\b', re.IGNORECASE)
+
+
+@dataclass
+class MaterializedQuery:
+    """A saved query file that should be served from a materialized view"""
+    query_path: str
+    view_name: str
+    sql: str
+    depends_on: List[str] = field(default_factory=list)
+    order_by: Optional[str] = None
+
+
+def parse_query_directives(sql: str) -> Dict[str, str]:
+    """
+    Reads the `-- @key: value` directive comments at the top of a query file.
+    Parsing stops at the first line that is not a comment.
+    """
+    directives = {}
+    for line in sql.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if not line.startswith('--'):
+            break
+        match = DIRECTIVE_PATTERN.match(line)
+        if match:
+            directives[match.group(1).lower()] = (match.group(2) or '').strip()
+    return directives
+
+
+def get_materialized_view_name(query_path: str) -> str:
+    """
+    Builds the view name for a query file, e.g.
+    'Madagascar/contract_percentage_by_country.sql' becomes
+    'mv_madagascar_contract_percentage_by_country'
+    """
+    name = re.sub(r'\.sql$', '', str(query_path), flags=re.IGNORECASE).lower()
+    name = re.sub(r'[^a-z0-9]+', '_', name).strip('_')
+    return f"{MATERIALIZED_VIEWS_CONFIG['view_prefix']}{name}"[:63]
+
+
+def discover_materialized_queries(queries_dir: Optional[str] = None) -> List[MaterializedQuery]:
+    """Finds every query file marked with the @materialize directive"""
+    queries_path = Path(queries_dir or MATERIALIZED_VIEWS_CONFIG['queries_dir'])
+    if not queries_path.exists():
+        logger.warning(f"Queries directory {queries_path} not found, no materialized views to maintain")
+        return []
+
+    materialized = []
+    for sql_file in sorted(queries_path.rglob('*.sql')):
+        try:
+            sql = sql_file.read_text(encoding='utf-8')
+        except Exception as e:
+            logger.error(f"Error reading query file {sql_file}: {str(e)}")
+            continue
+
+        directives = parse_query_directives(sql)
+        if 'materialize' not in directives:
+            continue
+
+        query_path = str(sql_file.relative_to(queries_path))
+        depends_on = [table.strip() for table in directives.get('depends_on', '').split(',') if table.strip()]
+        if not depends_on:
+            logger.warning(f"Materialized query {query_path} has no @depends_on tables and will never refresh")
+        order_by = directives.get('order_by') or None
+        if not order_by and ORDER_BY_PATTERN.search(sql):
+            logger.warning(f"Materialized query {query_path} has an ORDER BY but no @order_by, its view rows are unordered")
+
+        materialized.append(MaterializedQuery(
+            query_path=query_path,
+            view_name=get_materialized_view_name(query_path),
+            sql=sql.strip().rstrip(';'),
+            depends_on=depends_on,
+            order_by=order_by
+        ))
+
+    return materialized
+
+
+def get_dependent_views(table_name: str, materialized_queries: Iterable[MaterializedQuery]) -> List[MaterializedQuery]:
+    """Returns the materialized queries that read from the given table"""
+    return [mq for mq in materialized_queries if table_name in mq.depends_on]
+
+
+def view_exists(engine: Engine, view_name: str) -> bool:
+    """Checks whether a materialized view already exists"""
+    with engine.connect() as conn:
+        result = conn.execute(
+            text("SELECT 1 FROM pg_matviews WHERE matviewname = :name"),
+            {'name': view_name}
+        )
+        return result.scalar() is not None
+
+
+def drop_materialized_view(engine: Engine, mq: MaterializedQuery) -> bool:
+    """
+    Drops a materialized view. Needed before its base table is replaced,
+    since Postgres will not drop a table that a view depends on.
+    """
+    try:
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP MATERIALIZED VIEW IF EXISTS {mq.view_name}"))
+        logger.info(f"Dropped materialized view {mq.view_name}")
+        return True
+    except Exception as e:
+        logger.error(f"Error dropping materialized view {mq.view_name}: {str(e)}")
+        return False
+
+
+def create_materialized_view(engine: Engine, mq: MaterializedQuery) -> bool:
+    """
+    Creates the materialized view for a query. A row number column backs the
+    unique index that REFRESH ... CONCURRENTLY requires; it follows the
+    @order_by directive, since an ORDER BY inside the wrapped query is not
+    guaranteed to survive the outer window.
+    """
+    row_id = MATERIALIZED_VIEWS_CONFIG['row_id_column']
+    window = f"ORDER BY {mq.order_by}" if mq.order_by else ''
+    try:
+        with engine.begin() as conn:
+            conn.execute(text(
+                f"CREATE MATERIALIZED VIEW {mq.view_name} AS "
+                f"SELECT row_number() OVER ({window}) AS {row_id}, q.* FROM (\n{mq.sql}\n) q"
+            ))
+            conn.execute(text(
+                f"CREATE UNIQUE INDEX {mq.view_name}_{row_id}_idx ON {mq.view_name} ({row_id})"
+            ))
+        logger.info(f"Created materialized view {mq.view_name} for {mq.query_path}")
+        return True
+    except Exception as e:
+        logger.error(f"Error creating materialized view {mq.view_name}: {str(e)}")
+        return False
+
+
+def refresh_materialized_view(engine: Engine, mq: MaterializedQuery) -> bool:
+    """
+    Refreshes a materialized view concurrently so readers are never blocked,
+    creating it first if it does not exist yet.
+    """
+    if not view_exists(engine, mq.view_name):
+        return create_materialized_view(engine, mq)
+
+    try:
+        # REFRESH ... CONCURRENTLY cannot run inside a transaction block
+        with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+            conn.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {mq.view_name}"))
+        logger.info(f"Refreshed materialized view {mq.view_name}")
+        return True
+    except Exception as e:
+        logger.error(f"Error refreshing materialized view {mq.view_name}: {str(e)}")
+        return False
+
+
+def refresh_views_for_tables(
+    engine: Engine,
+    loaded_tables: Iterable[str],
+    materialized_queries: Optional[List[MaterializedQuery]] = None
+) -> Dict[str, bool]:
+    """
+    Creates or refreshes every materialized view that depends on at least one
+    of the freshly loaded tables.
+    """
+    if materialized_queries is None:
+        materialized_queries = discover_materialized_queries()
+
+    loaded_tables = set(loaded_tables)
+    results = {}
+    for mq in materialized_queries:
+        if loaded_tables.intersection(mq.depends_on):
+            results[mq.view_name] = refresh_materialized_view(engine, mq)
+            if results[mq.view_name]:
+                bump_data_version(engine, mq.view_name)
+    return results
@@ -0,0 +1,163 @@
+# pipeline/src/memory.py
+"""
+Memory budget for the pipelined executor.
+
+With a budget set, the executor admits a new dataset only while few enough
+are in flight and process RSS is comfortably below the budget, and spills
+payloads waiting between stages to local files once RSS approaches it. The
+waiting data then costs disk instead of memory until the next stage picks
+it up. Without a budget (the default) nothing is limited or spilled.
+"""
+
+import gc
+import json
+import logging
+import os
+import threading
+import uuid
+from dataclasses import dataclass
+from typing import Any
+
+import pandas as pd
+
+from config import MEMORY_CONFIG
+from metrics import SPILLED_BYTES, current_rss_bytes
+
+logger = logging.getLogger(__name__)
+
+
+def _remove_file(path: str):
+    """Deletes a spill file, if it is there"""
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+@dataclass
+class SpilledData:
+    """A DataFrame or raw payload written to disk while it waits for the next stage"""
+    path: str
+    kind: str   # parquet, pickle or json
+    rows: int
+
+    def __len__(self):
+        return self.rows
+
+    def restore(self) -> Any:
+        """Reads the data back and deletes the spill file"""
+        try:
+            if self.kind == 'parquet':
+                return pd.read_parquet(self.path)
+            if self.kind == 'pickle':
+                return pd.read_pickle(self.path)
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        finally:
+            _remove_file(self.path)
+
+
+def restore(data: Any) -> Any:
+    """Returns spilled data from disk, anything else unchanged"""
+    return data.restore() if isinstance(data, SpilledData) else data
+
+
+class MemoryBudget:
+    """
+    Admission control and spill decisions against a peak-RSS budget.
+    A budget of 0 disables both.
+    """
+
+    def __init__(
+        self,
+        budget_bytes: int = MEMORY_CONFIG['budget_bytes'],
+        max_in_flight: int = MEMORY_CONFIG['max_datasets_in_flight'],
+        admit_fraction: float = MEMORY_CONFIG['admit_fraction'],
+        spill_fraction: float = MEMORY_CONFIG['spill_fraction'],
+        spill_dir: str = MEMORY_CONFIG['spill_dir']
+    ):
+        self.budget_bytes = budget_bytes
+        self.max_in_flight = max_in_flight
+        self.admit_fraction = admit_fraction
+        self.spill_fraction = spill_fraction
+        self.spill_dir = spill_dir
+        self.in_flight = set()
+        self.spilled_bytes = 0
+        self._condition = threading.Condition()
+
+    @property
+    def enabled(self) -> bool:
+        return self.budget_bytes > 0
+
+    def _can_admit(self) -> bool:
+        # An idle pipeline always admits, so a dataset larger than the budget still runs
+        if not self.in_flight:
+            return True
+        return (len(self.in_flight) < self.max_in_flight
+                and current_rss_bytes() < self.budget_bytes * self.admit_fraction)
+
+    def acquire(self, dataset: str):
+        """Blocks until the dataset may start"""
+        if not self.enabled:
+            return
+        with self._condition:
+            while not self._can_admit():
+                # Re-check periodically: RSS also drops without a release
+                self._condition.wait(timeout=1)
+            self.in_flight.add(dataset)
+            logger.info(f"Admitted {dataset} ({len(self.in_flight)} in flight, "
+                        f"RSS {current_rss_bytes() / 1024 ** 2:.0f} MB of {self.budget_bytes / 1024 ** 2:.0f} MB)")
+
+    def release(self, dataset: str):
+        """Marks a dataset as finished and frees what it left behind"""
+        if not self.enabled:
+            return
+        # Large transforms (openpyxl workbooks in particular) leave reference cycles behind
+        gc.collect()
+        with self._condition:
+            self.in_flight.discard(dataset)
+            self._condition.notify_all()
+
+    def should_spill(self) -> bool:
+        return self.enabled and current_rss_bytes() >= self.budget_bytes * self.spill_fraction
+
+    def spill(self, name: str, data: Any) -> Any:
+        """
+        Writes a DataFrame (Parquet, or pickle for columns Parquet cannot type)
+        or a JSON payload to the spill directory and returns a SpilledData
+        handle. Anything else, or a failed write, is returned as it was.
+        """
+        if not isinstance(data, (pd.DataFrame, dict)):
+            return data
+        base_path = os.path.join(self.spill_dir, f"{name}-{uuid.uuid4().hex}")
+        spilled = None
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            if isinstance(data, pd.DataFrame):
+                try:
+                    spilled = SpilledData(f"{base_path}.parquet", 'parquet', len(data))
+                    data.to_parquet(spilled.path, index=False)
+                except Exception:
+                    # Mixed-type object columns cannot be written as Parquet;
+                    # drop whatever part of the file was written first
+                    _remove_file(spilled.path)
+                    spilled = SpilledData(f"{base_path}.pkl", 'pickle', len(data))
+                    data.to_pickle(spilled.path)
+            else:
+                spilled = SpilledData(f"{base_path}.json", 'json', len(data.get('data', [])))
+                with open(spilled.path, 'w') as f:
+                    json.dump(data, f, default=str)
+        except Exception as e:
+            logger.error(f"Could not spill {name}, keeping it in memory: {str(e)}")
+            if spilled is not None:
+                _remove_file(spilled.path)
+            return data
+
+        num_bytes = os.path.getsize(spilled.path)
+        # Transform workers and fetch threads spill concurrently
+        with self._condition:
+            self.spilled_bytes += num_bytes
+        SPILLED_BYTES.inc(num_bytes)
+        logger.info(f"Spilled {name} to {spilled.path} ({num_bytes / 1024 ** 2:.1f} MB) "
+                    f"at RSS {current_rss_bytes() / 1024 ** 2:.0f} MB")
+        return spilled
@@ -0,0 +1,219 @@
+# pipeline/src/metrics.py
+"""
+Prometheus metrics for the pipeline stages.
+
+Fetch metrics are labelled by endpoint, transform metrics by dataset and
+load metrics by table, so regressions can be traced to a single source.
+The long-running pipeline process serves them over HTTP for scraping.
+"""
+
+import logging
+import os
+import resource
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict
+
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+
+from config import METRICS_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Per-endpoint fetch totals for the current run, read back by the run history
+_fetch_totals: Dict[str, Dict[str, int]] = defaultdict(lambda: {'pages': 0, 'bytes': 0, 'retries': 0, 'failures': 0})
+_fetch_totals_lock = threading.Lock()
+
+# Fetch stage
+FETCH_PAGES = Counter(
+    'pipeline_fetch_pages_total', 'Pages fetched per endpoint', ['endpoint']
+)
+FETCH_BYTES = Counter(
+    'pipeline_fetch_bytes_total', 'Response bytes downloaded per endpoint', ['endpoint']
+)
+FETCH_RETRIES = Counter(
+    'pipeline_fetch_retries_total', 'Failed requests that were retried per endpoint', ['endpoint']
+)
+FETCH_FAILURES = Counter(
+    'pipeline_fetch_failures_total', 'Pages given up on after all retries per endpoint', ['endpoint']
+)
+FETCH_REQUEST_SECONDS = Histogram(
+    'pipeline_fetch_request_seconds', 'Latency of a single HTTP request per endpoint', ['endpoint'],
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+)
+
+# Transform stage
+TRANSFORM_SECONDS = Gauge(
+    'pipeline_transform_seconds', 'Duration of the last transform per dataset', ['dataset']
+)
+TRANSFORM_PEAK_RSS = Gauge(
+    'pipeline_transform_peak_rss_bytes',
+    'Peak process RSS observed while the last transform of a dataset ran', ['dataset']
+)
+TRANSFORM_OUTPUT_BYTES = Gauge(
+    'pipeline_transform_output_bytes', 'In-memory size of the last transformed DataFrame per table', ['table']
+)
+
+# Load stage
+LOAD_ROWS = Counter(
+    'pipeline_load_rows_total', 'Rows loaded into PostgreSQL per table', ['table']
+)
+LOAD_SECONDS = Gauge(
+    'pipeline_load_seconds', 'Duration of the last load per table', ['table']
+)
+LOAD_ROWS_PER_SECOND = Gauge(
+    'pipeline_load_rows_per_second', 'Throughput of the last load per table', ['table']
+)
+LOAD_FAILURES = Counter(
+    'pipeline_load_failures_total', 'Failed loads per table', ['table']
+)
+
+# Relationship scraping
+SCRAPE_PAGES = Counter(
+    'pipeline_scrape_pages_total',
+    'Project pages scraped per path (cache, http, browser or failed)', ['path']
+)
+SCRAPE_PAGE_SECONDS = Histogram(
+    'pipeline_scrape_page_seconds', 'Time to fetch one project page per path', ['path'],
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+)
+SCRAPER_BROWSERS = Gauge(
+    'pipeline_scraper_browsers', 'Browsers currently running in the scraper pools'
+)
+SCRAPER_BROWSER_RSS = Gauge(
+    'pipeline_scraper_browser_rss_bytes', 'Resident memory of all scraper browser processes'
+)
+SCRAPER_BROWSER_RECYCLES = Counter(
+    'pipeline_scraper_browser_recycles_total',
+    'Browsers closed by the pool per reason (pages, rss, cpu, unhealthy, killed_rss, killed_cpu)', ['reason']
+)
+
+# Whole run
+RUN_SECONDS = Gauge(
+    'pipeline_run_seconds', 'Duration of the last pipeline run'
+)
+RUN_LAST_SUCCESS = Gauge(
+    'pipeline_run_last_success_timestamp_seconds', 'Unix time a dataset last completed successfully', ['dataset']
+)
+
+# Memory
+STAGE_PEAK_RSS = Gauge(
+    'pipeline_stage_peak_rss_bytes',
+    'Peak process RSS observed during the last fetch, transform or load per dataset or table', ['stage', 'name']
+)
+SPILLED_BYTES = Counter(
+    'pipeline_spilled_bytes_total', 'Bytes spilled to disk under the memory budget'
+)
+
+
+def start_metrics_server() -> bool:
+    """Starts the HTTP endpoint Prometheus scrapes, if enabled in the config"""
+    if not METRICS_CONFIG['enabled']:
+        return False
+    try:
+        start_http_server(METRICS_CONFIG['port'], addr=METRICS_CONFIG['host'])
+        logger.info(f"Serving metrics on {METRICS_CONFIG['host']}:{METRICS_CONFIG['port']}")
+        return True
+    except Exception as e:
+        logger.error(f"Could not start metrics server: {str(e)}")
+        return False
+
+
+def current_rss_bytes() -> int:
+    """Resident set size of this process, falling back to the lifetime peak off Linux"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss is in kilobytes on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class PeakRSSTracker:
+    """Samples process RSS on a background thread and keeps the highest value seen"""
+
+    def __init__(self, interval: float = METRICS_CONFIG['rss_sample_interval']):
+        self.interval = interval
+        self.peak = current_rss_bytes()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, current_rss_bytes())
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self) -> int:
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss_bytes())
+        return self.peak
+
+
+@contextmanager
+def track_transform(dataset: str):
+    """Records duration and peak RSS of a transform"""
+    tracker = PeakRSSTracker().start()
+    start_time = time.time()
+    try:
+        yield tracker
+    finally:
+        TRANSFORM_SECONDS.labels(dataset=dataset).set(time.time() - start_time)
+        TRANSFORM_PEAK_RSS.labels(dataset=dataset).set(tracker.stop())
+
+
+def record_transform_output(table: str, df) -> int:
+    """Records and returns the in-memory size of a transformed DataFrame"""
+    try:
+        num_bytes = int(df.memory_usage(deep=True).sum())
+        TRANSFORM_OUTPUT_BYTES.labels(table=table).set(num_bytes)
+        return num_bytes
+    except Exception as e:
+        logger.debug(f"Could not measure DataFrame size for {table}: {str(e)}")
+        return 0
+
+
+def record_load(table: str, rows: int, seconds: float, success: bool) -> None:
+    if not success:
+        LOAD_FAILURES.labels(table=table).inc()
+        return
+    LOAD_ROWS.labels(table=table).inc(rows)
+    LOAD_SECONDS.labels(table=table).set(seconds)
+    LOAD_ROWS_PER_SECOND.labels(table=table).set(rows / seconds if seconds > 0 else 0)
+
+
+def _add_fetch_total(endpoint: str, key: str, amount: int = 1) -> None:
+    with _fetch_totals_lock:
+        _fetch_totals[endpoint][key] += amount
+
+
+def record_request(endpoint: str, seconds: float, num_bytes: int) -> None:
+    FETCH_REQUEST_SECONDS.labels(endpoint=endpoint).observe(seconds)
+    FETCH_BYTES.labels(endpoint=endpoint).inc(num_bytes)
+    _add_fetch_total(endpoint, 'bytes', num_bytes)
+
+
+def record_page(endpoint: str) -> None:
+    FETCH_PAGES.labels(endpoint=endpoint).inc()
+    _add_fetch_total(endpoint, 'pages')
+
+
+def record_retry(endpoint: str) -> None:
+    FETCH_RETRIES.labels(endpoint=endpoint).inc()
+    _add_fetch_total(endpoint, 'retries')
+
+
+def record_fetch_failure(endpoint: str) -> None:
+    FETCH_FAILURES.labels(endpoint=endpoint).inc()
+    _add_fetch_total(endpoint, 'failures')
+
+
+def pop_fetch_totals(endpoint: str) -> Dict[str, int]:
+    """Returns and resets the pages/bytes/retries/failures counted for an endpoint"""
+    with _fetch_totals_lock:
+        return dict(_fetch_totals.pop(endpoint, {'pages': 0, 'bytes': 0, 'retries': 0, 'failures': 0}))
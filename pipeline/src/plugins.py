@@ -0,0 +1,102 @@
+# pipeline/src/plugins.py
+"""
+Registry of data source plugins.
+
+Sources are described in SOURCE_PLUGINS by "module:function" references to
+their hooks (see sources.py). The registry never imports a hook's module
+up front: each hook is resolved the first time it is called, so starting
+the pipeline or a worker only pays for the sources it actually runs.
+"""
+
+import importlib
+import logging
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional
+
+from config import SOURCE_PLUGINS
+from executor import DatasetTask
+
+logger = logging.getLogger(__name__)
+
+
+class LazyHook:
+    """A "module:function" reference imported on first call"""
+
+    def __init__(self, reference: str):
+        self.reference = reference
+        self._func: Optional[Callable] = None
+
+    def resolve(self) -> Callable:
+        if self._func is None:
+            module_name, _, func_name = self.reference.partition(':')
+            self._func = getattr(importlib.import_module(module_name), func_name)
+            logger.debug(f"Loaded plugin hook {self.reference}")
+        return self._func
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+    def __repr__(self):
+        return f"LazyHook({self.reference!r})"
+
+
+@dataclass
+class SourcePlugin:
+    """
+    One data source: the datasets it provides with their table keys, or the
+    dataset it enriches with the tables the enrichment adds, and the hooks
+    implementing it.
+    """
+    name: str
+    datasets: Dict[str, List[str]] = field(default_factory=dict)
+    fetch: Optional[str] = None
+    transform: Optional[str] = None
+    cleanup: Optional[str] = None
+    enriches: Optional[str] = None
+    enrich: Optional[str] = None
+    tables: List[str] = field(default_factory=list)
+    enabled: bool = True
+
+
+def load_plugins(plugins: Dict[str, Dict[str, Any]] = SOURCE_PLUGINS) -> List[SourcePlugin]:
+    """Returns the enabled plugins in configuration order"""
+    loaded = [SourcePlugin(name=name, **spec) for name, spec in plugins.items()]
+    return [plugin for plugin in loaded if plugin.enabled]
+
+
+def _transform_and_enrich(dataset: str, transform: LazyHook, enrichers: List[LazyHook], raw: Any) -> Dict[str, Any]:
+    dataframes = transform(dataset, raw) or {}
+    for enrich in enrichers:
+        dataframes = enrich(dataset, dataframes) or dataframes
+    return dataframes
+
+
+def build_dataset_tasks(datasets=None, plugins: Optional[List[SourcePlugin]] = None) -> List[DatasetTask]:
+    """
+    Describes every dataset of the enabled plugins as an independent
+    fetch -> transform -> load task. If `datasets` is given, only the tasks
+    with those names are returned.
+    """
+    plugins = load_plugins() if plugins is None else plugins
+    enrichers: Dict[str, List[LazyHook]] = {}
+    enriched_tables: Dict[str, List[str]] = {}
+    for plugin in plugins:
+        if plugin.enriches:
+            enrichers.setdefault(plugin.enriches, []).append(LazyHook(plugin.enrich))
+            enriched_tables.setdefault(plugin.enriches, []).extend(plugin.tables)
+
+    tasks = []
+    for plugin in plugins:
+        for dataset, tables in plugin.datasets.items():
+            if datasets is not None and dataset not in datasets:
+                continue
+            tasks.append(DatasetTask(
+                name=dataset,
+                fetch=partial(LazyHook(plugin.fetch), dataset),
+                transform=partial(_transform_and_enrich, dataset, LazyHook(plugin.transform), enrichers.get(dataset, [])),
+                tables=list(tables) + enriched_tables.get(dataset, []),
+                cleanup=LazyHook(plugin.cleanup) if plugin.cleanup else None,
+                optional_tables=list(enriched_tables.get(dataset, []))
+            ))
+    return tasks
@@ -0,0 +1,133 @@
+# pipeline/src/profiling.py
+"""
+Per-stage profiling for the pipeline CLI (`--profile`).
+
+Each fetch, transform or load of a dataset can be wrapped in a profiler whose
+output lands in its own file under the run's profile directory:
+
+- cprofile: deterministic cProfile of the thread running the stage, saved as
+  a .prof file (open with snakeviz or pstats) with the top entries logged.
+- sample: a sampling profiler that snapshots thread stacks at a fixed
+  interval and writes collapsed stacks (.folded), ready for flamegraph.pl or
+  speedscope. It has much lower overhead and also sees threads the stage
+  hands work to when sampling all threads.
+"""
+
+import cProfile
+import io
+import logging
+import os
+import pstats
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Optional
+
+from config import STAGE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ('cprofile', 'sample')
+
+
+class SamplingProfiler:
+    """Collects collapsed stacks of one thread, or of every thread, on a background thread"""
+
+    def __init__(self, thread_id: Optional[int] = None, interval: float = STAGE_CONFIG['profile_sample_interval']):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, name="sampling-profiler", daemon=True)
+
+    def _sample(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or (self.thread_id is not None and thread_id != self.thread_id):
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, file_path: str):
+        with open(file_path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class StageProfiler:
+    """
+    Profiles pipeline stages in the given mode, writing one output file per
+    dataset and stage to a timestamped directory.
+    """
+
+    def __init__(self, mode: str, output_dir: str = STAGE_CONFIG['profile_dir'], all_threads: bool = False):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode '{mode}', expected one of {PROFILE_MODES}")
+        self.mode = mode
+        self.all_threads = all_threads
+        self.output_dir = os.path.join(output_dir, datetime.now().strftime('%Y%m%d_%H%M%S'))
+        os.makedirs(self.output_dir, exist_ok=True)
+        logger.info(f"Writing {mode} profiles to {self.output_dir}")
+
+    def _output_path(self, stage: str, name: str, extension: str) -> str:
+        return os.path.join(self.output_dir, f"{name}.{stage}.{extension}")
+
+    @contextmanager
+    def stage(self, stage: str, name: str):
+        """Profiles the enclosed block as `stage` of dataset or table `name`"""
+        if self.mode == 'sample':
+            sampler = SamplingProfiler(None if self.all_threads else threading.get_ident()).start()
+            try:
+                yield
+            finally:
+                sampler.stop()
+                file_path = self._output_path(stage, name, 'folded')
+                sampler.write(file_path)
+                logger.info(f"Profiled {stage} of {name}: {sampler.samples} samples written to {file_path}")
+            return
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError as e:
+            # Only one cProfile can be active at a time on newer Pythons
+            logger.warning(f"Could not profile {stage} of {name}: {str(e)}")
+            yield
+            return
+        try:
+            yield
+        finally:
+            profiler.disable()
+            file_path = self._output_path(stage, name, 'prof')
+            profiler.dump_stats(file_path)
+
+            summary = io.StringIO()
+            pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(STAGE_CONFIG['profile_top'])
+            logger.info(f"Profiled {stage} of {name}, written to {file_path}:\n{summary.getvalue()}")
+
+
+@contextmanager
+def profile_stage(profiler: Optional[StageProfiler], stage: str, name: str):
+    """Profiles the block when a profiler is given, otherwise does nothing"""
+    if profiler is None:
+        yield
+        return
+    with profiler.stage(stage, name):
+        yield
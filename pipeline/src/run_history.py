@@ -0,0 +1,167 @@
+# pipeline/src/run_history.py
+"""
+Persistent history of pipeline runs.
+
+Every run_pipeline execution is recorded in `pipeline_runs`, and every fetch,
+transform and load step in `pipeline_run_stages` with its timings, rows,
+bytes, retries, failures and peak RSS. The backend exposes these tables so throughput
+can be compared across runs. Recording is best effort: a database error here
+is logged and never fails the pipeline itself.
+"""
+
+import logging
+from datetime import datetime
+from typing import Iterable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine.base import Engine
+
+from config import RUN_HISTORY_CONFIG
+
+logger = logging.getLogger(__name__)
+
+RUNS_TABLE = RUN_HISTORY_CONFIG['runs_table']
+STAGES_TABLE = RUN_HISTORY_CONFIG['stages_table']
+
+CREATE_TABLES_SQL = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {RUNS_TABLE} (
+        run_id SERIAL PRIMARY KEY,
+        started_at TIMESTAMP NOT NULL,
+        finished_at TIMESTAMP,
+        duration_seconds DOUBLE PRECISION,
+        status VARCHAR(16) NOT NULL,
+        datasets TEXT,
+        tables_loaded INTEGER,
+        tables_failed INTEGER
+    )
+    """,
+    f"""
+    CREATE TABLE IF NOT EXISTS {STAGES_TABLE} (
+        stage_id SERIAL PRIMARY KEY,
+        run_id INTEGER NOT NULL REFERENCES {RUNS_TABLE} (run_id) ON DELETE CASCADE,
+        stage VARCHAR(16) NOT NULL,
+        dataset VARCHAR(128),
+        table_name VARCHAR(128),
+        started_at TIMESTAMP NOT NULL,
+        finished_at TIMESTAMP NOT NULL,
+        duration_seconds DOUBLE PRECISION,
+        rows BIGINT,
+        bytes BIGINT,
+        retries INTEGER,
+        failures INTEGER,
+        peak_rss_bytes BIGINT,
+        status VARCHAR(16) NOT NULL,
+        error TEXT
+    )
+    """,
+    # Added after the first release of the table
+    f"ALTER TABLE {STAGES_TABLE} ADD COLUMN IF NOT EXISTS peak_rss_bytes BIGINT",
+    f"CREATE INDEX IF NOT EXISTS {STAGES_TABLE}_run_id_idx ON {STAGES_TABLE} (run_id)",
+    f"CREATE INDEX IF NOT EXISTS {STAGES_TABLE}_stage_dataset_idx ON {STAGES_TABLE} (stage, dataset, table_name)"
+]
+
+
+class RunRecorder:
+    """Records one pipeline run and its stages"""
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.run_id: Optional[int] = None
+        self.started_at: Optional[datetime] = None
+
+    def ensure_tables(self) -> bool:
+        try:
+            with self.engine.begin() as conn:
+                for statement in CREATE_TABLES_SQL:
+                    conn.execute(text(statement))
+            return True
+        except Exception as e:
+            logger.error(f"Error creating run history tables: {str(e)}")
+            return False
+
+    def start_run(self, datasets: Iterable[str]) -> Optional[int]:
+        """Inserts the run row and returns its id"""
+        if not RUN_HISTORY_CONFIG['enabled'] or not self.ensure_tables():
+            return None
+        try:
+            self.started_at = datetime.now()
+            with self.engine.begin() as conn:
+                self.run_id = conn.execute(
+                    text(f"INSERT INTO {RUNS_TABLE} (started_at, status, datasets) "
+                         f"VALUES (:started_at, 'running', :datasets) RETURNING run_id"),
+                    {'started_at': self.started_at, 'datasets': ','.join(datasets)}
+                ).scalar()
+            logger.info(f"Recording pipeline run {self.run_id}")
+            return self.run_id
+        except Exception as e:
+            logger.error(f"Error recording pipeline run start: {str(e)}")
+            return None
+
+    def record_stage(
+        self,
+        stage: str,
+        started_at: datetime,
+        finished_at: datetime,
+        status: str,
+        dataset: Optional[str] = None,
+        table_name: Optional[str] = None,
+        rows: Optional[int] = None,
+        num_bytes: Optional[int] = None,
+        retries: Optional[int] = None,
+        failures: Optional[int] = None,
+        peak_rss_bytes: Optional[int] = None,
+        error: Optional[str] = None
+    ) -> None:
+        """Inserts one fetch, transform or load step. Called from the executor's worker threads."""
+        if self.run_id is None:
+            return
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(
+                    text(f"INSERT INTO {STAGES_TABLE} (run_id, stage, dataset, table_name, started_at, "
+                         f"finished_at, duration_seconds, rows, bytes, retries, failures, peak_rss_bytes, status, error) "
+                         f"VALUES (:run_id, :stage, :dataset, :table_name, :started_at, :finished_at, "
+                         f":duration_seconds, :rows, :bytes, :retries, :failures, :peak_rss_bytes, :status, :error)"),
+                    {
+                        'run_id': self.run_id,
+                        'stage': stage,
+                        'dataset': dataset,
+                        'table_name': table_name,
+                        'started_at': started_at,
+                        'finished_at': finished_at,
+                        'duration_seconds': (finished_at - started_at).total_seconds(),
+                        'rows': rows,
+                        'bytes': num_bytes,
+                        'retries': retries,
+                        'failures': failures,
+                        'peak_rss_bytes': peak_rss_bytes,
+                        'status': status,
+                        'error': error[:2000] if error else None
+                    }
+                )
+        except Exception as e:
+            logger.error(f"Error recording {stage} stage for {dataset or table_name}: {str(e)}")
+
+    def finish_run(self, status: str, tables_loaded: int, tables_failed: int) -> None:
+        if self.run_id is None:
+            return
+        try:
+            finished_at = datetime.now()
+            with self.engine.begin() as conn:
+                conn.execute(
+                    text(f"UPDATE {RUNS_TABLE} SET finished_at = :finished_at, "
+                         f"duration_seconds = :duration_seconds, "
+                         f"status = :status, tables_loaded = :tables_loaded, tables_failed = :tables_failed "
+                         f"WHERE run_id = :run_id"),
+                    {
+                        'finished_at': finished_at,
+                        'duration_seconds': (finished_at - self.started_at).total_seconds(),
+                        'status': status,
+                        'tables_loaded': tables_loaded,
+                        'tables_failed': tables_failed,
+                        'run_id': self.run_id
+                    }
+                )
+        except Exception as e:
+            logger.error(f"Error recording pipeline run end: {str(e)}")
@@ -0,0 +1,219 @@
+# pipeline/src/scheduler.py
+"""
+Per-dataset refresh scheduler.
+
+Each dataset refreshes on its own cadence, given either as a number of
+seconds or as a five-field cron expression ("minute hour day month weekday").
+A random jitter is added to every due time so sources do not all hit the
+World Bank API and the database at the same moment, and the last/next run
+times are persisted so a restart does not refetch everything.
+"""
+
+import json
+import logging
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Set, Union
+
+from config import SCHEDULE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+class CronSchedule:
+    """
+    Minimal cron expression matcher supporting '*', 'a-b', 'a,b', and '/n' steps
+    in the usual five fields. Weekdays run 0-6 with Sunday as 0 (7 is also Sunday).
+    """
+
+    FIELD_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression must have 5 fields: '{expression}'")
+
+        self.expression = expression
+        parsed = [self._parse_field(field, low, high)
+                  for field, (low, high) in zip(fields, self.FIELD_RANGES)]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        self.weekdays = {day % 7 for day in weekdays}
+        # Standard cron: when both day fields are restricted, either may match
+        self.day_restricted = fields[2] != '*'
+        self.weekday_restricted = fields[4] != '*'
+
+    @staticmethod
+    def _parse_field(field: str, low: int, high: int) -> Set[int]:
+        values = set()
+        for part in field.split(','):
+            step = 1
+            if '/' in part:
+                part, step_str = part.split('/', 1)
+                step = int(step_str)
+                if step < 1:
+                    raise ValueError(f"Invalid cron step in '{field}'")
+
+            if part == '*':
+                start, end = low, high
+            elif '-' in part:
+                start_str, end_str = part.split('-', 1)
+                start, end = int(start_str), int(end_str)
+            else:
+                start = int(part)
+                end = high if step > 1 else start
+
+            if start < low or end > high or start > end:
+                raise ValueError(f"Cron field '{field}' out of range {low}-{high}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day_ok = moment.day in self.days
+        # Python weekday(): Monday=0, cron: Sunday=0
+        weekday_ok = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.day_restricted and self.weekday_restricted:
+            return day_ok or weekday_ok
+        return day_ok and weekday_ok
+
+    def next_after(self, moment: datetime) -> datetime:
+        """Returns the first matching minute strictly after the given time"""
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=366 * 5)
+
+        while candidate < limit:
+            if candidate.month not in self.months:
+                year = candidate.year + (candidate.month == 12)
+                month = candidate.month % 12 + 1
+                candidate = candidate.replace(year=year, month=month, day=1, hour=0, minute=0)
+                continue
+            if not self._day_matches(candidate):
+                candidate = (candidate + timedelta(days=1)).replace(hour=0, minute=0)
+                continue
+            if candidate.hour not in self.hours:
+                candidate = (candidate + timedelta(hours=1)).replace(minute=0)
+                continue
+            if candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+                continue
+            return candidate
+
+        raise ValueError(f"Cron expression '{self.expression}' never matches")
+
+
+def next_due_time(spec: Union[int, str], last_run: datetime) -> datetime:
+    """Computes the next due time for a schedule spec (seconds or cron expression)"""
+    if isinstance(spec, (int, float)):
+        return last_run + timedelta(seconds=spec)
+    return CronSchedule(spec).next_after(last_run)
+
+
+class DatasetScheduler:
+    """
+    Runs datasets when they are due and persists their last and next run times.
+
+    `run_datasets` receives the list of due dataset names and returns a
+    {dataset: success} mapping. Failed datasets are retried after
+    SCHEDULE_CONFIG['retry_delay'] seconds rather than waiting a full cycle.
+    """
+
+    def __init__(
+        self,
+        datasets: List[str],
+        run_datasets: Callable[[List[str]], Dict[str, bool]],
+        schedules: Optional[Dict[str, Union[int, str]]] = None,
+        state_file: str = SCHEDULE_CONFIG['state_file']
+    ):
+        self.datasets = list(datasets)
+        self.run_datasets = run_datasets
+        self.schedules = schedules if schedules is not None else SCHEDULE_CONFIG['datasets']
+        self.state_file = state_file
+        self.state = self._load_state()
+
+        # Validate cron expressions up front rather than at the first due time
+        for name in self.datasets:
+            next_due_time(self.get_schedule(name), datetime.now())
+
+    def get_schedule(self, dataset: str) -> Union[int, str]:
+        return self.schedules.get(dataset, SCHEDULE_CONFIG['default'])
+
+    def _load_state(self) -> Dict[str, Dict[str, str]]:
+        """Loads the persisted run state, starting fresh if it is missing or unreadable"""
+        if not os.path.exists(self.state_file):
+            return {}
+        try:
+            with open(self.state_file, 'r') as f:
+                return json.load(f).get('datasets', {})
+        except Exception as e:
+            logger.warning(f"Could not read schedule state {self.state_file}, starting fresh: {str(e)}")
+            return {}
+
+    def _save_state(self):
+        """Writes the run state atomically so a crash never leaves a truncated file"""
+        try:
+            os.makedirs(os.path.dirname(self.state_file) or '.', exist_ok=True)
+            tmp_file = f"{self.state_file}.tmp"
+            with open(tmp_file, 'w') as f:
+                json.dump({'datasets': self.state}, f, indent=2)
+            os.replace(tmp_file, self.state_file)
+        except Exception as e:
+            logger.error(f"Error saving schedule state: {str(e)}")
+
+    def _jitter(self) -> timedelta:
+        return timedelta(seconds=random.uniform(0, SCHEDULE_CONFIG['jitter_seconds']))
+
+    def next_run(self, dataset: str) -> datetime:
+        """Next run time of a dataset; datasets that never ran are due immediately"""
+        entry = self.state.get(dataset, {})
+        if entry.get('next_run'):
+            return datetime.fromisoformat(entry['next_run'])
+        return datetime.now()
+
+    def due_datasets(self, now: Optional[datetime] = None) -> List[str]:
+        now = now or datetime.now()
+        return [name for name in self.datasets if self.next_run(name) <= now]
+
+    def record_results(self, results: Dict[str, bool], finished_at: Optional[datetime] = None):
+        """Updates the persisted state after a run and schedules each dataset's next run"""
+        finished_at = finished_at or datetime.now()
+        for dataset, success in results.items():
+            entry = self.state.setdefault(dataset, {})
+            entry['last_attempt'] = finished_at.isoformat()
+            entry['last_status'] = 'success' if success else 'failed'
+            if success:
+                entry['last_run'] = finished_at.isoformat()
+                next_run = next_due_time(self.get_schedule(dataset), finished_at) + self._jitter()
+            else:
+                next_run = finished_at + timedelta(seconds=SCHEDULE_CONFIG['retry_delay'])
+            entry['next_run'] = next_run.isoformat()
+            logger.info(f"Next run of {dataset} scheduled for: {next_run}")
+        self._save_state()
+
+    def run_due(self) -> Dict[str, bool]:
+        """Runs every dataset that is currently due"""
+        due = self.due_datasets()
+        if not due:
+            return {}
+
+        logger.info(f"Running due datasets: {due}")
+        results = self.run_datasets(due)
+        # Datasets the run did not report on are treated as failed
+        results = {dataset: bool(results.get(dataset)) for dataset in due}
+        self.record_results(results)
+        return results
+
+    def seconds_until_next_run(self) -> float:
+        next_runs = [self.next_run(name) for name in self.datasets]
+        if not next_runs:
+            return SCHEDULE_CONFIG['max_sleep']
+        return max((min(next_runs) - datetime.now()).total_seconds(), 0)
+
+    def run_forever(self):
+        """Main scheduling loop"""
+        while True:
+            self.run_due()
+
+            sleep_seconds = min(self.seconds_until_next_run(), SCHEDULE_CONFIG['max_sleep'])
+            logger.info(f"Scheduler sleeping for {sleep_seconds:.0f} seconds")
+            time.sleep(max(sleep_seconds, 1))
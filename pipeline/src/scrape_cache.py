@@ -0,0 +1,145 @@
+# pipeline/src/scrape_cache.py
+"""
+SQLite store of scraped project relationships.
+
+Each project has one row holding its parsed relationship result, optionally a
+zlib-compressed copy of the page it was parsed from, and an expiry time that
+depends on the project's status: closed and dropped projects hardly change,
+so their results are kept far longer than those of active projects. Lookups
+only return unexpired results; get_many answers a whole DataFrame's worth of
+project IDs in a few queries.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import time
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from config import SCRAPE_CACHE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+DAY = 86400
+
+# SQLite limits the number of parameters of a single statement
+LOOKUP_CHUNK = 500
+
+CREATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS relationships (
+    project_id TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    status TEXT,
+    result TEXT NOT NULL,
+    html BLOB,
+    fetched_at REAL NOT NULL,
+    expires_at REAL
+)
+"""
+
+
+class ScrapeCache:
+    """Parsed relationship results keyed by project ID, with per-entry TTLs"""
+
+    def __init__(self, path: str = None, store_html: bool = None, ttl_days: Dict[str, Optional[float]] = None):
+        self.path = path or SCRAPE_CACHE_CONFIG['path']
+        self.store_html = SCRAPE_CACHE_CONFIG['store_html'] if store_html is None else store_html
+        self.ttl_days = {**SCRAPE_CACHE_CONFIG['ttl_days'], **(ttl_days or {})}
+
+        if self.path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute(CREATE_TABLE_SQL)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS relationships_expires_at ON relationships (expires_at)")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._conn.close()
+
+    def ttl_for(self, status: Optional[str], complete: bool = True) -> Optional[float]:
+        """Seconds a result stays fresh; None means it never expires"""
+        if not complete:
+            days = self.ttl_days['incomplete']
+        else:
+            days = self.ttl_days.get(str(status).strip().lower() if status else None, self.ttl_days['default'])
+        return None if days is None else days * DAY
+
+    def get(self, project_id: str) -> Optional[Dict[str, Any]]:
+        """The unexpired result of a project, or None"""
+        return self.get_many([project_id]).get(project_id)
+
+    def get_many(self, project_ids: Iterable[str], include_expired: bool = False) -> Dict[str, Dict[str, Any]]:
+        """Unexpired (or with include_expired, all) results of the given projects, by project ID"""
+        project_ids = list(dict.fromkeys(project_ids))
+        now = 0 if include_expired else time.time()
+        results = {}
+        for i in range(0, len(project_ids), LOOKUP_CHUNK):
+            chunk = project_ids[i:i + LOOKUP_CHUNK]
+            rows = self._conn.execute(
+                f"SELECT project_id, result FROM relationships "
+                f"WHERE project_id IN ({','.join('?' * len(chunk))}) "
+                f"AND (expires_at IS NULL OR expires_at > ?)",
+                [*chunk, now]
+            )
+            results.update((project_id, json.loads(result)) for project_id, result in rows)
+        return results
+
+    def put(self, result: Dict[str, Any], status: Optional[str] = None, html: Optional[str] = None,
+            complete: bool = True):
+        """
+        Stores a parsed result. `complete` is False for pages that rendered
+        without the relationship block, which expire sooner whatever the status.
+        """
+        now = time.time()
+        ttl = self.ttl_for(status, complete)
+        blob = zlib.compress(html.encode('utf-8')) if html and self.store_html else None
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO relationships (project_id, url, status, result, html, fetched_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (result['project_id'], result['url'], status, json.dumps(result), blob, now,
+                 None if ttl is None else now + ttl)
+            )
+
+    def html(self, project_id: str) -> Optional[str]:
+        """The stored page of a project, expired or not"""
+        row = self._conn.execute("SELECT html FROM relationships WHERE project_id = ?", (project_id,)).fetchone()
+        return zlib.decompress(row[0]).decode('utf-8') if row and row[0] is not None else None
+
+    def pages(self, limit: Optional[int] = None) -> Iterator[Tuple[str, str]]:
+        """(url, html) of every stored page, e.g. to re-parse them after a parser change"""
+        query = "SELECT url, html FROM relationships WHERE html IS NOT NULL ORDER BY project_id"
+        params: List[Any] = []
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        for url, blob in self._conn.execute(query, params):
+            yield url, zlib.decompress(blob).decode('utf-8')
+
+    def purge_expired(self) -> int:
+        """Deletes expired entries and returns how many were removed"""
+        with self._conn:
+            deleted = self._conn.execute(
+                "DELETE FROM relationships WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),)
+            ).rowcount
+        if deleted:
+            logger.info(f"Purged {deleted} expired relationship results")
+        return deleted
+
+    def stats(self) -> Dict[str, int]:
+        now = time.time()
+        total, fresh, with_html = self._conn.execute(
+            "SELECT COUNT(*), SUM(CASE WHEN expires_at IS NULL OR expires_at > ? THEN 1 ELSE 0 END), "
+            "SUM(CASE WHEN html IS NOT NULL THEN 1 ELSE 0 END) FROM relationships", (now,)
+        ).fetchone()
+        return {'entries': total, 'fresh': fresh or 0, 'with_html': with_html or 0}
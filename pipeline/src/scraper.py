@@ -2,8 +2,13 @@ import json
 import logging
 import time
 import asyncio
+import re
+import aiohttp
 import pandas as pd
+import lxml.html
+from collections import Counter
 from bs4 import BeautifulSoup
+from lxml.etree import XPath
 from pyppeteer import launch
 from tqdm import tqdm
 import os
@@ -13,6 +18,9 @@ import math
 import atexit
 import signal
 import sys
+from contextlib import asynccontextmanager
+from metrics import SCRAPE_PAGES, SCRAPE_PAGE_SECONDS, SCRAPER_BROWSERS, SCRAPER_BROWSER_RSS, SCRAPER_BROWSER_RECYCLES
+from scrape_cache import ScrapeCache
 
 # Set up logger
 logging.basicConfig(
@@ -24,21 +32,79 @@ logger = logging.getLogger(__name__)
 
 # Constants
 MAX_CONCURRENT_BROWSERS = 2  # Reduced from 10 for better stability
+PAGES_PER_BROWSER = 3  # Tabs each pooled browser serves concurrently
+BROWSER_MAX_PAGES = 200  # Recycle a browser after serving this many pages
+BROWSER_MAX_RSS_MB = 1024  # Recycle a browser once its processes use more memory than this
+BROWSER_MAX_CPU_SECONDS = 900  # Recycle a browser once its processes used this much CPU time
+BROWSER_KILL_RSS_MB = 2048  # Kill a browser at once, even mid-page, above this much memory
+BROWSER_KILL_CPU_SECONDS = 1800  # ... or this much CPU time
+BROWSER_WATCHDOG_INTERVAL = 5  # seconds between resource checks of the running browsers
+BROWSER_HEALTH_CHECK_INTERVAL = 30  # seconds between health checks of an idle browser
 BROWSER_TIMEOUT = 30  # seconds
-CACHE_DIR = "wb_html_cache"  # Directory to cache HTML content
+PAGE_DEADLINE_GRACE = 20  # seconds a tab may take beyond the navigation timeout before it is abandoned
+HTTP_FIRST = True  # Try a plain HTTP fetch before rendering a page in the browser
+HTTP_TIMEOUT = 20  # seconds
+HTTP_MAX_CONNECTIONS = 10  # Connections the pooled HTTP session keeps open
+HTTP_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml'
+}
 BATCH_SIZE = 5  # Process URLs in batches of this size
+PARSE_POOL_MIN_URLS = 1000  # Parse pages in a process pool when scraping at least this many URLs
+PARSE_WORKERS = max(1, min(4, (os.cpu_count() or 1) - 1))
+
+# Docker-optimized launch settings. Pooled browsers serve many tabs, so they
+# run Chromium's normal multi-process model rather than --single-process.
+BROWSER_ARGS = [
+    '--no-sandbox',
+    '--disable-setuid-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-accelerated-2d-canvas',
+    '--disable-gpu',
+    '--disable-extensions',
+    '--disable-component-extensions-with-background-pages',
+    '--disable-default-apps',
+    '--mute-audio',
+    '--disable-background-networking',
+    '--disable-background-timer-throttling',
+    '--disable-backgrounding-occluded-windows',
+    '--disable-breakpad',
+    '--disable-client-side-phishing-detection',
+    '--disable-hang-monitor',
+    '--disable-prompt-on-repost',
+    '--disable-sync',
+    '--disable-translate',
+    '--metrics-recording-only',
+    '--no-first-run',
+    '--safebrowsing-disable-auto-update',
+]
+
+# Pages served by each path of process_url: cache, http, browser or failed
+scrape_paths = Counter()
+
+# A rendered relationship block; pages without it need JavaScript. main-detail has
+# to be a whole class name, as for MAIN_DETAIL_XPATH below
+MAIN_DETAIL_PATTERN = re.compile(r'<div[^>]*\sclass\s*=\s*["\'][^"\']*(?<=["\'\s])main-detail(?=["\'\s])', re.IGNORECASE)
+
+# The first div with a main-detail class, as soup.find('div', class_='main-detail') matches it
+MAIN_DETAIL_XPATH = XPath("(//div[contains(concat(' ', normalize-space(@class), ' '), ' main-detail ')])[1]")
 
 # Global state management
 class GlobalState:
     def __init__(self):
         self.active_browsers = []
+        self.pools = []
+        self.parse_executor = None
         self.event_loop = None
 
 global_state = GlobalState()
 
 # Improved cleanup handlers
 async def async_cleanup_browsers():
-    """Asynchronously close all active browser instances."""
+    """Asynchronously close all browser pools and active browser instances."""
+    for pool in list(global_state.pools):
+        await pool.close()
+
     if not global_state.active_browsers:
         return
         
@@ -94,125 +160,405 @@ atexit.register(cleanup_browsers)
 # signal.signal(signal.SIGINT, signal_handler)
 # signal.signal(signal.SIGTERM, signal_handler)
 
-async def fetch_with_pyppeteer(url, semaphore, timeout=45, retries=3):
-    """Docker-optimized function to fetch URL content using pyppeteer."""
-    async with semaphore:
-        for attempt in range(retries):
-            browser = None
-            try:
-                # Docker-optimized launch settings
-                browser = await launch(
-                    headless=True, 
-                    args=[
-                        '--no-sandbox',
-                        '--disable-setuid-sandbox',
-                        '--disable-dev-shm-usage',
-                        '--disable-accelerated-2d-canvas',
-                        '--disable-gpu',
-                        '--disable-extensions',
-                        '--disable-component-extensions-with-background-pages',
-                        '--disable-default-apps',
-                        '--mute-audio',
-                        '--single-process',  # Try single process mode
-                        '--disable-background-networking',
-                        '--disable-background-timer-throttling',
-                        '--disable-backgrounding-occluded-windows',
-                        '--disable-breakpad',
-                        '--disable-client-side-phishing-detection',
-                        '--disable-hang-monitor',
-                        '--disable-prompt-on-repost',
-                        '--disable-sync',
-                        '--disable-translate',
-                        '--metrics-recording-only',
-                        '--no-first-run',
-                        '--safebrowsing-disable-auto-update',
-                    ],
-                    ignoreHTTPSErrors=True,
-                    executablePath='/usr/bin/chromium' if os.path.exists('/usr/bin/chromium') else None
-                )
-                
-                global_state.active_browsers.append(browser)
-          
-                # Minimal page setup
-                page = await browser.newPage()
-                await page.setViewport({'width': 800, 'height': 600})  # Smaller viewport
-                
-                # Aggressive request blocking to reduce resource usage
-                await page.setRequestInterception(True)
-                async def intercept_request(req):
-                    if req.resourceType in ['document', 'xhr']:
-                        await req.continue_()
-                    else:
-                        await req.abort()
-                
-                page.on('request', lambda req: asyncio.ensure_future(intercept_request(req)))
-             
-                # Use domcontentloaded instead of networkidle0 for faster loading
-                response = await page.goto(url, {
-                    'timeout': timeout * 1000, 
-                    'waitUntil': 'domcontentloaded'
-                })
-                
-                if not response or response.status != 200:
-                    logger.warning(f"Received status {response.status if response else 'none'} for {url}")
-                    if attempt < retries - 1:
-                        await browser.close()
-                        if browser in global_state.active_browsers:
-                            global_state.active_browsers.remove(browser)
-                        browser = None
-                        await asyncio.sleep(2 ** attempt)
-                        continue
-                
-                # Simplified wait - don't fail if selector not found
+def process_tree_stats(pid):
+    """
+    Resident memory in bytes and CPU time in seconds of a process and all its
+    descendants, including exited children it has reaped ((0, 0) off Linux)
+    """
+    rss, cpu_seconds = 0, 0.0
+    pending = [pid]
+    page_size, clock_ticks = os.sysconf('SC_PAGE_SIZE'), os.sysconf('SC_CLK_TCK')
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/statm", 'r') as f:
+                rss += int(f.read().split()[1]) * page_size
+            with open(f"/proc/{current}/stat", 'r') as f:
+                # utime, stime, cutime and cstime follow the parenthesised command name
+                fields = f.read().rsplit(')', 1)[1].split()
+                cpu_seconds += sum(int(value) for value in fields[11:15]) / clock_ticks
+            for tid in os.listdir(f"/proc/{current}/task"):
+                with open(f"/proc/{current}/task/{tid}/children", 'r') as f:
+                    pending.extend(int(child) for child in f.read().split())
+        except (OSError, ValueError, IndexError):
+            continue
+    return rss, cpu_seconds
+
+def process_tree_rss(pid):
+    """Resident memory of a process and all its descendants, in bytes (0 off Linux)"""
+    return process_tree_stats(pid)[0]
+
+async def launch_browser():
+    """Launches a headless Chromium and tracks it for cleanup."""
+    browser = await launch(
+        headless=True,
+        args=BROWSER_ARGS,
+        ignoreHTTPSErrors=True,
+        executablePath='/usr/bin/chromium' if os.path.exists('/usr/bin/chromium') else None
+    )
+    global_state.active_browsers.append(browser)
+    return browser
+
+async def close_browser(browser):
+    """Closes a browser, ignoring errors from one that already died or hangs."""
+    try:
+        await asyncio.wait_for(browser.close(), timeout=10)
+    except Exception as e:
+        logger.error(f"Error closing browser: {str(e)}")
+    finally:
+        if browser in global_state.active_browsers:
+            global_state.active_browsers.remove(browser)
+
+class PooledBrowser:
+    """One browser of a BrowserPool with its reusable tabs."""
+
+    def __init__(self, browser):
+        self.browser = browser
+        self.idle_pages = []
+        self.busy = 0
+        self.pages_served = 0
+        self.retiring = False
+        self.retire_reason = None
+        self.last_checked = time.time()
+
+    def retire(self, reason):
+        """Stops handing out tabs of this browser; it closes once they are all back."""
+        if not self.retiring:
+            self.retiring, self.retire_reason = True, reason
+
+class BrowserPool:
+    """
+    A fixed number of long-lived browsers, each serving up to
+    `pages_per_browser` tabs at a time. Tabs are set up once (viewport and
+    request blocking) and reused across URLs.
+
+    A browser is health-checked before use when it has been idle for a
+    while or one of its tabs failed, and recycled (closed and relaunched on
+    demand) once it has served `max_pages` pages, its processes exceed
+    `max_rss_bytes` or `max_cpu_seconds`, or it stops responding.
+
+    A watchdog samples the memory and CPU time of every browser's process
+    tree while the pool runs and kills a browser outright, with the tabs it
+    is serving, once it exceeds `kill_rss_bytes` or `kill_cpu_seconds`, so a
+    leaking or spinning Chromium cannot stall the pool. The pool registers
+    itself with the global state, so async_cleanup_browsers shuts it down
+    with everything else.
+    """
+
+    def __init__(self, size=MAX_CONCURRENT_BROWSERS, pages_per_browser=PAGES_PER_BROWSER,
+                 max_pages=BROWSER_MAX_PAGES, max_rss_bytes=BROWSER_MAX_RSS_MB * 1024 * 1024,
+                 max_cpu_seconds=BROWSER_MAX_CPU_SECONDS, kill_rss_bytes=BROWSER_KILL_RSS_MB * 1024 * 1024,
+                 kill_cpu_seconds=BROWSER_KILL_CPU_SECONDS, watchdog_interval=BROWSER_WATCHDOG_INTERVAL,
+                 health_check_interval=BROWSER_HEALTH_CHECK_INTERVAL):
+        self.size = size
+        self.pages_per_browser = pages_per_browser
+        self.max_pages = max_pages
+        self.max_rss_bytes = max_rss_bytes
+        self.max_cpu_seconds = max_cpu_seconds
+        self.kill_rss_bytes = kill_rss_bytes
+        self.kill_cpu_seconds = kill_cpu_seconds
+        self.watchdog_interval = watchdog_interval
+        self.health_check_interval = health_check_interval
+        self.slots = []
+        self.launches = 0
+        self.kills = 0
+        self._semaphore = asyncio.Semaphore(size * pages_per_browser)
+        self._lock = asyncio.Lock()
+        self._watchdog = None
+        self._closed = False
+        global_state.pools.append(self)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _healthy(self, slot):
+        process = getattr(slot.browser, 'process', None)
+        if process is not None and process.poll() is not None:
+            return False
+        if time.time() - slot.last_checked < self.health_check_interval:
+            return True
+        try:
+            await asyncio.wait_for(slot.browser.version(), timeout=5)
+            slot.last_checked = time.time()
+            return True
+        except Exception as e:
+            logger.warning(f"Browser failed its health check: {str(e)}")
+            return False
+
+    async def _new_page(self, slot):
+        page = await slot.browser.newPage()
+        await page.setViewport({'width': 800, 'height': 600})  # Smaller viewport
+
+        # Aggressive request blocking to reduce resource usage
+        await page.setRequestInterception(True)
+        async def intercept_request(req):
+            if req.resourceType in ['document', 'xhr']:
+                await req.continue_()
+            else:
+                await req.abort()
+
+        page.on('request', lambda req: asyncio.ensure_future(intercept_request(req)))
+        return page
+
+    async def _retire(self, slot, reason):
+        self.slots.remove(slot)
+        update_browser_gauge()
+        SCRAPER_BROWSER_RECYCLES.labels(reason=reason).inc()
+        await close_browser(slot.browser)
+        logger.info(f"Recycled a browser after {slot.pages_served} pages ({reason})")
+
+    async def _kill(self, slot, reason, detail):
+        async with self._lock:
+            if slot not in self.slots:
+                return
+            self.slots.remove(slot)
+        update_browser_gauge()
+        self.kills += 1
+        SCRAPER_BROWSER_RECYCLES.labels(reason=reason).inc()
+        logger.warning(f"Killing a browser serving {slot.busy} tab(s): {detail}")
+        try:
+            slot.browser.process.kill()
+        except Exception:
+            pass
+        await close_browser(slot.browser)
+
+    async def _watch(self):
+        """Samples the resources of every browser and kills or retires the ones over budget."""
+        while not self._closed:
+            await asyncio.sleep(self.watchdog_interval)
+            total_rss = 0
+            for slot in list(self.slots):
+                process = getattr(slot.browser, 'process', None)
+                if process is None:
+                    continue
+                rss, cpu_seconds = process_tree_stats(process.pid)
+                total_rss += rss
+                if rss > self.kill_rss_bytes:
+                    await self._kill(slot, 'killed_rss', f"{rss // (1024 * 1024)} MB resident")
+                elif cpu_seconds > self.kill_cpu_seconds:
+                    await self._kill(slot, 'killed_cpu', f"{cpu_seconds:.0f} CPU seconds")
+                elif cpu_seconds > self.max_cpu_seconds:
+                    slot.retire('cpu')
+            SCRAPER_BROWSER_RSS.set(total_rss)
+
+    async def _checkout(self):
+        async with self._lock:
+            if self._closed:
+                raise RuntimeError("Browser pool is closed")
+            for slot in [slot for slot in self.slots if slot.busy == 0]:
+                if not slot.retiring and not await self._healthy(slot):
+                    slot.retire('unhealthy')
+                if slot.retiring:
+                    await self._retire(slot, slot.retire_reason)
+
+            available = [slot for slot in self.slots if not slot.retiring and slot.busy < self.pages_per_browser]
+            if not available and len(self.slots) < self.size:
+                slot = PooledBrowser(await launch_browser())
+                self.launches += 1
+                self.slots.append(slot)
+                update_browser_gauge()
+                available = [slot]
+                if self._watchdog is None:
+                    self._watchdog = asyncio.ensure_future(self._watch())
+            if not available:
+                # Only retiring browsers have free tabs; keep using them until they drain
+                available = [slot for slot in self.slots if slot.busy < self.pages_per_browser]
+
+            slot = min(available, key=lambda candidate: candidate.busy)
+            slot.busy += 1
+
+        try:
+            page = slot.idle_pages.pop() if slot.idle_pages else await self._new_page(slot)
+        except Exception:
+            slot.busy -= 1
+            slot.retire('unhealthy')
+            raise
+        return slot, page
+
+    async def _checkin(self, slot, page, reusable):
+        async with self._lock:
+            slot.busy -= 1
+            slot.pages_served += 1
+            if reusable and not self._closed and slot in self.slots:
+                slot.idle_pages.append(page)
+            else:
+                # A failed tab may mean a failing browser; check it before its next use
+                slot.last_checked = 0
                 try:
-                    await page.waitForSelector('.main-detail', {'timeout': 10000})  # Reduced timeout
-                except Exception as e:
-                    logger.warning(f"Element .main-detail not found on {url}, continuing anyway")
-                
-                # Get content and close browser
-                content = await page.content()
-                
-                await browser.close()
-                if browser in global_state.active_browsers:
-                    global_state.active_browsers.remove(browser)
-                browser = None
-                
-                return content
-               
-            except Exception as e:
-                logger.warning(f"Attempt {attempt+1}/{retries} failed for {url}: {str(e)}")
-                
-                if browser:
-                    try:
-                        await browser.close()
-                    except Exception as close_error:
-                        logger.error(f"Error closing browser: {str(close_error)}")
-                    finally:
-                        if browser in global_state.active_browsers:
-                            global_state.active_browsers.remove(browser)
-                
-                if attempt < retries - 1:
-                    await asyncio.sleep(2 ** attempt)
-        
-        logger.error(f"All {retries} attempts failed for {url}")
+                    await asyncio.wait_for(page.close(), timeout=5)
+                except Exception:
+                    pass
+
+            if slot.pages_served >= self.max_pages:
+                slot.retire('pages')
+            else:
+                process = getattr(slot.browser, 'process', None)
+                if process is not None and process_tree_rss(process.pid) > self.max_rss_bytes:
+                    logger.info(f"Browser exceeded {self.max_rss_bytes // (1024 * 1024)} MB, recycling it")
+                    slot.retire('rss')
+            if slot.retiring and slot.busy == 0 and slot in self.slots:
+                await self._retire(slot, slot.retire_reason)
+
+    @asynccontextmanager
+    async def page(self):
+        """Borrows a ready-to-use tab; a tab that raised is closed rather than reused."""
+        async with self._semaphore:
+            slot, page = await self._checkout()
+            reusable = False
+            try:
+                yield page
+                reusable = True
+            finally:
+                await self._checkin(slot, page, reusable)
+
+    async def close(self):
+        """Closes every browser of the pool."""
+        async with self._lock:
+            self._closed = True
+            slots, self.slots = self.slots, []
+        if self._watchdog is not None:
+            self._watchdog.cancel()
+            self._watchdog = None
+        for slot in slots:
+            await close_browser(slot.browser)
+        if self in global_state.pools:
+            global_state.pools.remove(self)
+        update_browser_gauge()
+
+def update_browser_gauge():
+    SCRAPER_BROWSERS.set(sum(len(pool.slots) for pool in global_state.pools))
+
+def create_http_session():
+    """Pooled HTTP session for the plain fetch path; create it inside the running event loop."""
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=HTTP_MAX_CONNECTIONS),
+        timeout=aiohttp.ClientTimeout(total=HTTP_TIMEOUT),
+        headers=HTTP_HEADERS
+    )
+
+async def fetch_with_http(url, session):
+    """Fetches a page without rendering it. Returns None on any error or non-200 response."""
+    try:
+        async with session.get(url) as response:
+            if response.status != 200:
+                logger.info(f"Plain fetch of {url} returned {response.status}")
+                return None
+            return await response.text()
+    except Exception as e:
+        logger.info(f"Plain fetch of {url} failed: {str(e)}")
         return None
 
-def parse_project_relationships(html, url):
-    """Parse the HTML content to extract relationship data."""
-    if not html:
-        return {
-            "url": url,
-            "project_id": url.split("/")[-1],
-            "parent_project": None,
-           "associated_projects": []
-        }
-    
-    result = {
+def has_main_detail(html):
+    """Whether the page already contains the block the relationships are parsed from."""
+    return bool(html) and MAIN_DETAIL_PATTERN.search(html) is not None
+
+def record_scrape_path(path, seconds=None):
+    scrape_paths[path] += 1
+    SCRAPE_PAGES.labels(path=path).inc()
+    if seconds is not None:
+        SCRAPE_PAGE_SECONDS.labels(path=path).observe(seconds)
+
+def log_scrape_stats():
+    """Logs how many pages each path of process_url served."""
+    total = sum(scrape_paths.values())
+    if not total:
+        return
+    logger.info("Relationship pages by path: " + ", ".join(
+        f"{path} {count} ({count * 100.0 / total:.0f}%)" for path, count in scrape_paths.most_common()
+    ))
+
+async def render_page(page, url, timeout, last_attempt):
+    """Loads a URL in a tab and returns its HTML, or None on a bad status before the last attempt."""
+    # Use domcontentloaded instead of networkidle0 for faster loading
+    response = await page.goto(url, {
+        'timeout': timeout * 1000,
+        'waitUntil': 'domcontentloaded'
+    })
+
+    bad_status = not response or response.status != 200
+    if bad_status:
+        logger.warning(f"Received status {response.status if response else 'none'} for {url}")
+        if not last_attempt:
+            return None
+
+    # Simplified wait - don't fail if selector not found
+    try:
+        await page.waitForSelector('.main-detail', {'timeout': 10000})  # Reduced timeout
+    except Exception as e:
+        logger.warning(f"Element .main-detail not found on {url}, continuing anyway")
+
+    return await page.content()
+
+async def fetch_with_pyppeteer(url, pool, timeout=45, retries=3):
+    """
+    Docker-optimized function to fetch URL content with a tab from the browser
+    pool. A tab that takes longer than the navigation timeout plus
+    PAGE_DEADLINE_GRACE is abandoned, so a hung page cannot hold its slot.
+    """
+    for attempt in range(retries):
+        try:
+            async with pool.page() as page:
+                html = await asyncio.wait_for(
+                    render_page(page, url, timeout, attempt == retries - 1),
+                    timeout=timeout + PAGE_DEADLINE_GRACE
+                )
+                if html is not None:
+                    return html
+
+            # Hand the tab back before backing off
+            await asyncio.sleep(2 ** attempt)
+
+        except Exception as e:
+            logger.warning(f"Attempt {attempt+1}/{retries} failed for {url}: {str(e)}")
+            if attempt < retries - 1:
+                await asyncio.sleep(2 ** attempt)
+
+    logger.error(f"All {retries} attempts failed for {url}")
+    return None
+
+def _empty_relationships(url):
+    return {
         "url": url,
         "project_id": url.split("/")[-1],
         "parent_project": None,
         "associated_projects": []
     }
+
+def _add_relationship_item(result, item_text, item_links):
+    """Applies one list item of the main-detail block to the result."""
+    # Check if this is a parent project item
+    if "Parent Project" in item_text and item_links:
+        # Update the parent_project field with the first link
+        result["parent_project"] = {
+            "title": item_links[0]["text"],
+            "url": item_links[0]["url"],
+            "id": item_links[0]["url"].split("/")[-1] if item_links[0]["url"] else None
+        }
+
+    # Check if this is an associated projects item
+    elif "Associated Project" in item_text:
+        # Add to associated_projects (might be multiple links)
+        for link in item_links:
+            if "/projects-operations/project-detail/" in link["url"]:
+                project_data = {
+                    "title": link["text"],
+                    "url": link["url"],
+                    "id": link["url"].split("/")[-1]
+                }
+                result["associated_projects"].append(project_data)
+
+def parse_project_relationships_soup(html, url):
+    """
+    Parse the HTML content to extract relationship data with BeautifulSoup.
+    Kept as the reference implementation parse_project_relationships is
+    checked against (see benchmarks/parse_benchmark.py).
+    """
+    result = _empty_relationships(url)
+    if not html:
+        return result
     
     try:
         # Parse with BeautifulSoup
@@ -225,11 +571,8 @@ def parse_project_relationships(html, url):
             logger.warning(f"main-detail div not found on {url} after parsing")
             return result
         
-        # Find all list items within the main-detail div
-        list_items = main_detail.find_all('li')
-        
-        # Process list items
-        for li in list_items:
+        # Process list items within the main-detail div
+        for li in main_detail.find_all('li'):
             item_text = li.get_text(strip=True)
             
             # Skip items that don't contain "Parent Project" or "Associated Project"
@@ -249,26 +592,7 @@ def parse_project_relationships(html, url):
             if not item_links:
                 continue
                 
-            # Check if this is a parent project item
-            if "Parent Project" in item_text and item_links:
-                # Update the parent_project field with the first link
-                result["parent_project"] = {
-                    "title": item_links[0]["text"],
-                    "url": item_links[0]["url"],
-                    "id": item_links[0]["url"].split("/")[-1] if item_links[0]["url"] else None
-                }
-            
-            # Check if this is an associated projects item
-            elif "Associated Project" in item_text:
-                # Add to associated_projects (might be multiple links)
-                for link in item_links:
-                    if "/projects-operations/project-detail/" in link["url"]:
-                        project_data = {
-                            "title": link["text"],
-                            "url": link["url"],
-                            "id": link["url"].split("/")[-1]
-                        }
-                        result["associated_projects"].append(project_data)
+            _add_relationship_item(result, item_text, item_links)
         
         return result
         
@@ -276,94 +600,157 @@ def parse_project_relationships(html, url):
         logger.error(f"Error parsing HTML for {url}: {str(e)}")
         return result
 
-def get_cache_path(url, cache_dir=CACHE_DIR):
-    """Get the cache file path for a URL."""
-    project_id = url.split("/")[-1]
-    return os.path.join(cache_dir, f"{project_id}.html")
+def _stripped_text(element):
+    """Same text as BeautifulSoup's get_text(strip=True)"""
+    return ''.join(text.strip() for text in element.xpath('.//text()'))
 
-def read_from_cache(url, cache_dir=CACHE_DIR):
-    """Read HTML content from cache if available."""
-    cache_path = get_cache_path(url, cache_dir)
-    if os.path.exists(cache_path):
-        try:
-            with open(cache_path, 'r', encoding='utf-8') as f:
-                return f.read()
-        except Exception as e:
-            logger.error(f"Error reading from cache for {url}: {str(e)}")
-    return None
+def parse_project_relationships(html, url):
+    """
+    Parse the HTML content to extract relationship data.
+
+    Uses lxml's C parser and only walks the first main-detail div instead of
+    building a Python object per node, which makes it several times faster
+    than parse_project_relationships_soup while returning the same result.
+    Markup lxml refuses (an empty document, or a string with an XML encoding
+    declaration) falls back to the BeautifulSoup parser.
+    """
+    result = _empty_relationships(url)
+    if not html:
+        return result
+
+    try:
+        document = lxml.html.fromstring(html)
+    except Exception:
+        return parse_project_relationships_soup(html, url)
 
-def write_to_cache(url, html, cache_dir=CACHE_DIR):
-    """Write HTML content to cache."""
-    if not os.path.exists(cache_dir):
-        os.makedirs(cache_dir)
-    
-    cache_path = get_cache_path(url, cache_dir)
     try:
-        with open(cache_path, 'w', encoding='utf-8') as f:
-            f.write(html)
+        main_detail = MAIN_DETAIL_XPATH(document)
+        if not main_detail:
+            logger.warning(f"main-detail div not found on {url} after parsing")
+            return result
+
+        for li in main_detail[0].iter('li'):
+            item_text = _stripped_text(li)
+            if "Parent Project" not in item_text and "Associated Project" not in item_text:
+                continue
+
+            item_links = []
+            for link in li.iter('a'):
+                href = link.get('href', '')
+                if href and '/projects-operations/project-detail/' in href:
+                    item_links.append({
+                        "text": _stripped_text(link),
+                        "url": href
+                    })
+
+            if not item_links:
+                continue
+
+            _add_relationship_item(result, item_text, item_links)
+
+        return result
+
     except Exception as e:
-        logger.error(f"Error writing to cache for {url}: {str(e)}")
+        logger.error(f"Error parsing HTML for {url}: {str(e)}")
+        return result
 
-def cleanup_cache(result, cache_dir=CACHE_DIR):
+def start_parse_pool(url_count, workers=PARSE_WORKERS):
     """
-    Delete cache file if parent project or associated projects are found.
-    
-    Args:
-        result (dict): The parsed result containing project relationship data
-        cache_dir (str): Directory for HTML cache
+    Starts the process pool pages are parsed in when scraping at least
+    PARSE_POOL_MIN_URLS URLs, so parsing does not stall the event loop
+    driving the browsers. Returns whether a pool is running.
     """
-    # Check if parent project or associated projects exist
-    if (result.get('parent_project') or result.get('associated_projects')):
-        url = result.get('url')
-        cache_path = get_cache_path(url, cache_dir)
-        
-        if os.path.exists(cache_path):
-            try:
-                os.remove(cache_path)
-                logger.info(f"Removed cache for {url} due to found relationships")
-            except Exception as e:
-                logger.error(f"Error removing cache for {url}: {str(e)}")
+    if url_count < PARSE_POOL_MIN_URLS or workers < 2:
+        return False
+    if global_state.parse_executor is None:
+        logger.info(f"Parsing pages in {workers} processes")
+        global_state.parse_executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn')
+        )
+    return True
 
-async def process_url(url, semaphore, use_cache=True, cache_dir=CACHE_DIR):
-    """Process a single URL: fetch, cache, and parse."""
-    # Format URL if needed (handle project IDs vs full URLs)
+def stop_parse_pool():
+    executor, global_state.parse_executor = global_state.parse_executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+async def parse_page(html, url):
+    """Parses a page in the parse pool when one is running, inline otherwise."""
+    executor = global_state.parse_executor
+    if executor is None or not html:
+        return parse_project_relationships(html, url)
+    try:
+        return await asyncio.get_running_loop().run_in_executor(executor, parse_project_relationships, html, url)
+    except Exception as e:
+        logger.warning(f"Parse pool failed for {url}, parsing inline: {str(e)}")
+        return parse_project_relationships(html, url)
+
+def project_url(url):
+    """Full project page URL of a URL or bare project ID"""
     if not url.startswith('http'):
-        url = f"https://projects.worldbank.org/en/projects-operations/project-detail/{url}"
+        return f"https://projects.worldbank.org/en/projects-operations/project-detail/{url}"
+    return url
+
+async def fetch_page(url, pool, session=None, limiter=None):
+    """
+    Fetches a project page, rendering it only when the plain response lacks
+    the main-detail block. Every request first takes a token from `limiter`
+    if one is given. Returns None if the page could not be fetched.
+    """
+    if session is not None:
+        if limiter is not None:
+            await limiter.acquire()
+        started = time.time()
+        html = await fetch_with_http(url, session)
+        if has_main_detail(html):
+            record_scrape_path('http', time.time() - started)
+            return html
+
+    if limiter is not None:
+        await limiter.acquire()
+    started = time.time()
+    html = await fetch_with_pyppeteer(url, pool)
+    record_scrape_path('browser' if html else 'failed', time.time() - started)
+    return html
+
+async def process_url(url, pool, cache=None, session=None, status=None):
+    """
+    Process a single URL: look up, fetch, parse and cache. With an HTTP
+    session the page is first fetched without rendering, and only rendered in
+    the browser when the plain response lacks the main-detail block. `status`
+    is the project status, which decides how long the result stays cached.
+    """
+    # Format URL if needed (handle project IDs vs full URLs)
+    url = project_url(url)
     
-    # Try to read from cache first if enabled
-    if use_cache:
-        cached_html = read_from_cache(url, cache_dir)
-        if cached_html:
-            result = parse_project_relationships(cached_html, url)
-            
-            # If relationships found, clean up cache to force refresh next time
-            cleanup_cache(result, cache_dir)
-            
-            return result
+    # Try the cache first if enabled
+    if cache is not None:
+        cached_result = cache.get(url.split("/")[-1])
+        if cached_result:
+            record_scrape_path('cache')
+            return cached_result
     
     # Fetch HTML content
-    html = await fetch_with_pyppeteer(url, semaphore)
-    
-    # Write to cache if successful
-    if html and use_cache:
-        write_to_cache(url, html, cache_dir)
+    html = await fetch_page(url, pool, session)
     
     # Parse HTML
-    result = parse_project_relationships(html, url)
+    result = await parse_page(html, url)
     
-    # Clean up cache if relationships found
-    if use_cache:
-        cleanup_cache(result, cache_dir)
+    # Cache the result if the page was fetched; failures are retried next time
+    if html and cache is not None:
+        cache.put(result, status=status, html=html, complete=has_main_detail(html))
     
     # Return results
     return result
 
-async def process_batch(urls, semaphore, use_cache=True, cache_dir=CACHE_DIR):
-    """Process a batch of URLs concurrently."""
-    tasks = [process_url(url, semaphore, use_cache, cache_dir) for url in urls]
+async def process_batch(urls, pool, cache=None, session=None, statuses=None):
+    """Process a batch of URLs concurrently, as far as the pool has free tabs."""
+    statuses = statuses or {}
+    tasks = [process_url(url, pool, cache, session, statuses.get(url.split("/")[-1])) for url in urls]
     return await asyncio.gather(*tasks)
 
-async def batch_processor(all_urls, semaphore, use_cache=True, cache_dir=CACHE_DIR, batch_size=BATCH_SIZE):
+async def batch_processor(all_urls, pool, cache=None, batch_size=BATCH_SIZE, session=None, statuses=None):
     """Process URLs in smaller batches to improve stability."""
     results = []
     
@@ -372,18 +759,15 @@ async def batch_processor(all_urls, semaphore, use_cache=True, cache_dir=CACHE_D
         batch = all_urls[i:i+batch_size]
         logger.info(f"Processing batch {i//batch_size + 1}/{math.ceil(len(all_urls)/batch_size)} ({len(batch)} URLs)")
         
-        batch_results = await process_batch(batch, semaphore, use_cache, cache_dir)
+        batch_results = await process_batch(batch, pool, cache, session, statuses)
         results.extend(batch_results)
         
         # Brief pause between batches
         await asyncio.sleep(1)
         
-        # Ensure browsers are cleaned up between batches
-        await async_cleanup_browsers()
-        
     return results
 
-def find_related_projects(urls):
+def find_related_projects(urls, use_cache=True):
     """Run the scraper on a list of URLs."""
     # Ensure event loop is properly managed
     try:
@@ -393,14 +777,26 @@ def find_related_projects(urls):
         asyncio.set_event_loop(loop)
     
     global_state.event_loop = loop
+    start_parse_pool(len(urls))
     
-    semaphore = asyncio.Semaphore(MAX_CONCURRENT_BROWSERS)
-    results = loop.run_until_complete(batch_processor(urls, semaphore))
+    cache = ScrapeCache() if use_cache else None
     
-    # Clean up browsers before returning
-    loop.run_until_complete(async_cleanup_browsers())
+    async def scrape():
+        async with BrowserPool() as pool:
+            if not HTTP_FIRST:
+                return await batch_processor(urls, pool, cache)
+            async with create_http_session() as session:
+                return await batch_processor(urls, pool, cache, session=session)
     
-    return results
+    try:
+        return loop.run_until_complete(scrape())
+    finally:
+        # Clean up browsers before returning
+        loop.run_until_complete(async_cleanup_browsers())
+        stop_parse_pool()
+        if cache is not None:
+            cache.close()
+        log_scrape_stats()
 
 def export_results_to_json(results, output_file="project_relationships.json"):
     """Export results to a JSON file."""
@@ -448,137 +844,6 @@ def export_results_to_csv(results, output_file="project_relationships.csv"):
     except Exception as e:
         logger.error(f"Error exporting results to CSV: {str(e)}")
         return False
-    
-def enrich_dataframe_with_relationships(df, url_column='project_id_url', batch_size=5, use_cache=True):
-    """
-    Docker-optimized function to enrich a dataframe with project relationship data.
-    """
-    import pandas as pd
-    import json
-    import time
-    import random
-    
-    logger.info(f"Enriching {len(df)} projects with relationship data...")
-    
-    # Initialize columns
-    if 'parent_project' not in df.columns:
-        df['parent_project'] = None
-    if 'associated_projects' not in df.columns:
-        df['associated_projects'] = "[]"
-    
-    # Extract URLs - limit to a reasonable number for testing if there are many
-    all_urls = []
-    id_to_idx_map = {}
-    
-    for idx, url in enumerate(df[url_column]):
-        if url and isinstance(url, str):
-            project_id = url.split('/')[-1]
-            all_urls.append(url)
-            id_to_idx_map[project_id] = idx
-    
-    if not all_urls:
-        logger.warning("No valid URLs found in the dataframe")
-        return df
-    
-    # For very large datasets, consider just processing a subset first
-    process_count = min(len(all_urls), 50)  # Limit for initial testing
-    
-    if process_count < len(all_urls):
-        logger.warning(f"Processing only {process_count} out of {len(all_urls)} URLs for testing")
-        # Take a random sample for testing
-        sample_urls = random.sample(all_urls, process_count)
-    else:
-        sample_urls = all_urls
-    
-    # Very small batch size for Docker
-    actual_batch_size = min(batch_size, 3)
-    logger.info(f"Using batch size of {actual_batch_size} for processing {len(sample_urls)} URLs")
-    
-    # Process URLs in extremely small batches with retry mechanism
-    all_results = []
-    
-    # Split URLs into tiny chunks
-    url_chunks = [sample_urls[i:i+actual_batch_size] for i in range(0, len(sample_urls), actual_batch_size)]
-    
-    # Process each chunk with retry mechanism
-    for chunk_idx, url_chunk in enumerate(url_chunks):
-        max_retries = 3
-        for retry in range(max_retries):
-            try:
-                logger.info(f"Processing batch {chunk_idx+1}/{len(url_chunks)} ({len(url_chunk)} URLs)")
-                
-                # Create a new loop for each batch to avoid event loop issues in Docker
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                
-                # Use a semaphore with very limited concurrency
-                semaphore = asyncio.Semaphore(1)  # Process one URL at a time
-                
-                # Process the batch
-                chunk_results = loop.run_until_complete(batch_processor(
-                    url_chunk, 
-                    semaphore,
-                    use_cache=use_cache,
-                    batch_size=1  # Process one URL at a time
-                ))
-                
-                # Clean up resources
-                loop.run_until_complete(async_cleanup_browsers())
-                loop.close()
-                
-                all_results.extend(chunk_results)
-                
-                # Success - break retry loop
-                break
-                
-            except Exception as e:
-                logger.error(f"Error processing batch {chunk_idx+1}: {str(e)}")
-                if retry < max_retries - 1:
-                    # Wait before retry with progressive backoff
-                    wait_time = (retry + 1) * 10
-                    logger.info(f"Retrying in {wait_time} seconds...")
-                    time.sleep(wait_time)
-                    
-                    # Force cleanup
-                    cleanup_browsers()
-                else:
-                    logger.error(f"Failed to process batch {chunk_idx+1} after {max_retries} retries")
-        
-        # Sleep between batches to avoid overwhelming the system
-        time.sleep(5)
-        
-        # Every 5 batches, rest longer
-        if (chunk_idx + 1) % 5 == 0:
-            logger.info(f"Processed {chunk_idx+1} batches. Taking a break...")
-            time.sleep(15)
-    
-    # Update the dataframe with results
-    update_count = 0
-    for result in all_results:
-        project_id = result["project_id"]
-        
-        # Skip if we don't have this project in our mapping
-        if project_id not in id_to_idx_map:
-            continue
-            
-        idx = id_to_idx_map[project_id]
-        
-        # Extract parent project ID if available
-        if result.get("parent_project"):
-            parent_project = result["parent_project"]["id"]
-            df.at[idx, 'parent_project'] = parent_project
-        
-        # Extract associated project IDs if available
-        associated_projects = []
-        if result.get("associated_projects"):
-            associated_projects = [ap["id"] for ap in result["associated_projects"]]
-            df.at[idx, 'associated_projects'] = json.dumps(associated_projects)
-        
-        update_count += 1
-    
-    logger.info(f"Added relationship data for {update_count} out of {len(sample_urls)} projects")
-    
-    return df
 
 if __name__ == "__main__":
     import sys
@@ -590,7 +855,7 @@ if __name__ == "__main__":
     parser.add_argument("--file", help="Path to a file containing URLs, one per line")
     parser.add_argument("--output", default="project_relationships", help="Output file name without extension")
     parser.add_argument("--format", choices=["json", "csv", "both"], default="json", help="Output format")
-    parser.add_argument("--no-cache", action="store_true", help="Disable HTML caching")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the relationship cache")
     
     args = parser.parse_args()
     
@@ -618,7 +883,7 @@ if __name__ == "__main__":
     logger.info(f"Processing {len(urls_to_process)} URLs")
     
     # Run the scraper
-    results = find_related_projects(urls_to_process)
+    results = find_related_projects(urls_to_process, use_cache=not args.no_cache)
     
     # Export results
     if args.format in ["json", "both"]:
@@ -0,0 +1,115 @@
+# pipeline/src/sources.py
+"""
+Hooks of the built-in data source plugins registered in SOURCE_PLUGINS.
+
+Every hook imports what it needs when it is called, so importing this module
+is cheap and a source's dependencies (openpyxl for the projects workbook,
+pyppeteer and lxml for the relationship scraper) are only loaded once one of
+its datasets actually runs.
+
+- fetch(dataset) returns the raw payload
+- transform(dataset, raw) returns {table_key: DataFrame}
+- cleanup(raw) removes what the fetch left behind
+- enrich(dataset, dataframes) returns the dataframes extended by another source
+"""
+
+import logging
+import os
+
+from config import API_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+def fetch_api_endpoint(endpoint):
+    """Fetch step for a World Bank API endpoint dataset"""
+    from fetcher import fetch_wb_endppoints
+
+    return fetch_wb_endppoints(endpoint)
+
+def process_api_data_worker(item):
+    """Worker function to process API data - defined outside for pickling"""
+    import logging
+    from transformer import process_api_call_json
+
+    logger = logging.getLogger(__name__)
+    table_name, data = item
+    try:
+        if data and data.get('data'):
+            logger.info(f"Processing data for {table_name}...")
+            df = process_api_call_json(data['data'], table_name)
+            return table_name, df
+        else:
+            logger.warning(f"No data found for {table_name}")
+            return table_name, None
+    except Exception as e:
+        logger.error(f"Error processing {table_name}: {str(e)}")
+        return table_name, None
+
+def transform_api_data(endpoint, data):
+    """Transform step for an API endpoint dataset"""
+    table_name, df = process_api_data_worker((endpoint, data))
+    return {table_name: df} if df is not None else {}
+
+def fetch_projects_excel(dataset):
+    """Fetch step for the projects Excel file"""
+    from fetcher import fetch_projects_excel
+
+    return fetch_projects_excel(API_CONFIG['projects_url'])
+
+def transform_projects_excel(dataset, projects_file):
+    """Transform step for the projects Excel file"""
+    from transformer import process_projects_excel
+
+    logger.info("Processing WBG project excel data...")
+    return process_projects_excel(projects_file)
+
+def fetch_gef_projects_csv(dataset):
+    """Fetch step for the GEF projects CSV export"""
+    from fetcher import fetch_gef_projects_csv
+
+    return fetch_gef_projects_csv(API_CONFIG['gef_projects_url'])
+
+def transform_gef_projects_csv(dataset, gef_file):
+    """Transform step for the GEF projects CSV export"""
+    from transformer import process_gef_projects_csv
+
+    return {'gef_projects': process_gef_projects_csv(gef_file)}
+
+def remove_temp_file(file_path):
+    """Cleanup step removing a downloaded file once it has been transformed"""
+    os.remove(file_path)
+    logger.info(f"Cleaned up temporary file {file_path}")
+
+def enrich_project_relationships(dataset, project_dataframes):
+    """
+    Enrichment step scraping parent and associated projects into
+    world_bank_projects and the project_relationships edge table. A scraping
+    failure keeps the base dataframe with empty relationship columns and
+    leaves the edge table as it is rather than failing the projects dataset.
+    """
+    from enrichment import enrich_dataframe_with_relationships, relationship_edges
+
+    df = project_dataframes.get('world_bank_projects')
+    if df is None:
+        logger.warning("world_bank_projects not found in processed data, skipping relationship scraping")
+        return project_dataframes
+
+    if 'parent_project' not in df.columns:
+        df['parent_project'] = None
+    if 'associated_projects' not in df.columns:
+        df['associated_projects'] = "[]"
+
+    try:
+        logger.info("Scraping project relationships (parent/associated projects)...")
+        project_dataframes['world_bank_projects'] = enrich_dataframe_with_relationships(
+            df,
+            url_column='project_id_url',
+            use_cache=True
+        )
+        project_dataframes['project_relationships'] = relationship_edges(project_dataframes['world_bank_projects'])
+        logger.info("Project relationship processing completed")
+    except Exception as e:
+        logger.error(f"Error in relationship scraping: {str(e)}")
+        logger.info("Continuing pipeline without relationship data")
+    return project_dataframes
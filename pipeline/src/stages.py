@@ -0,0 +1,188 @@
+# pipeline/src/stages.py
+"""
+Single-stage runs of the pipeline, for iterating on one dataset or table.
+
+- fetch: downloads datasets and archives the raw payloads
+- transform: transforms the archived payloads and stages the resulting
+  tables as Parquet
+- load: loads staged tables into PostgreSQL and refreshes the materialized
+  views that depend on them
+
+Each stage only reads what the previous one wrote, so a slow transform can
+be rerun against the same download as often as needed.
+"""
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from config import STAGE_CONFIG
+from executor import DatasetTask, load_single_df
+from materializer import discover_materialized_queries, refresh_views_for_tables
+from profiling import StageProfiler, profile_stage
+
+logger = logging.getLogger(__name__)
+
+STAGES = ('fetch', 'transform', 'load')
+
+
+def archive_raw(dataset: str, raw: Any, archive_dir: str = STAGE_CONFIG['archive_dir']) -> Optional[str]:
+    """
+    Archives a fetched payload: API responses as JSON, downloaded files
+    (such as the projects workbook) as a copy keeping their extension.
+    """
+    os.makedirs(archive_dir, exist_ok=True)
+    for existing in os.listdir(archive_dir):
+        if os.path.splitext(existing)[0] == dataset:
+            os.remove(os.path.join(archive_dir, existing))
+
+    if isinstance(raw, str) and os.path.isfile(raw):
+        archive_path = os.path.join(archive_dir, f"{dataset}{os.path.splitext(raw)[1]}")
+        shutil.copyfile(raw, archive_path)
+    else:
+        archive_path = os.path.join(archive_dir, f"{dataset}.json")
+        with open(archive_path, 'w') as f:
+            json.dump(raw, f, default=str)
+    return archive_path
+
+
+def restore_raw(dataset: str, archive_dir: str = STAGE_CONFIG['archive_dir']) -> Any:
+    """
+    Reads an archived payload back in the form the dataset's transform expects.
+    Archived files are handed out as temporary copies, since transform cleanup
+    deletes the file it was given.
+    """
+    if not os.path.isdir(archive_dir):
+        return None
+    for archived in os.listdir(archive_dir):
+        name, extension = os.path.splitext(archived)
+        if name != dataset:
+            continue
+        archive_path = os.path.join(archive_dir, archived)
+        if extension == '.json':
+            with open(archive_path, 'r') as f:
+                return json.load(f)
+        fd, tmp_path = tempfile.mkstemp(prefix=f"{dataset}_", suffix=extension)
+        os.close(fd)
+        shutil.copyfile(archive_path, tmp_path)
+        return tmp_path
+    return None
+
+
+def staging_path(table_key: str, staging_dir: str = STAGE_CONFIG['staging_dir']) -> str:
+    return os.path.join(staging_dir, f"{table_key}.parquet")
+
+
+def remove_staged(table_key: str, staging_dir: str = STAGE_CONFIG['staging_dir']):
+    try:
+        os.remove(staging_path(table_key, staging_dir))
+    except OSError:
+        pass
+
+
+def stage_dataframe(table_key: str, df: pd.DataFrame, staging_dir: str = STAGE_CONFIG['staging_dir']) -> bool:
+    try:
+        os.makedirs(staging_dir, exist_ok=True)
+        # Parquet needs one type per column; mixed object columns are staged as text
+        for col in df.columns:
+            if df[col].dtype == object:
+                df[col] = df[col].map(lambda value: value if value is None or isinstance(value, str) else str(value))
+        df.to_parquet(staging_path(table_key, staging_dir), index=False)
+        return True
+    except Exception as e:
+        logger.error(f"Error staging {table_key}: {str(e)}")
+        return False
+
+
+def run_fetch_stage(tasks: List[DatasetTask], profiler: Optional[StageProfiler] = None) -> Dict[str, bool]:
+    """Fetches each dataset and archives its raw payload"""
+    results = {}
+    for task in tasks:
+        try:
+            logger.info(f"Fetching data for {task.name}...")
+            with profile_stage(profiler, 'fetch', task.name):
+                raw = task.fetch()
+            if raw is None:
+                logger.error(f"No data fetched for {task.name}")
+                results[task.name] = False
+                continue
+            archive_path = archive_raw(task.name, raw)
+            if task.cleanup:
+                task.cleanup(raw)
+            logger.info(f"Archived {task.name} to {archive_path}")
+            results[task.name] = True
+        except Exception as e:
+            logger.error(f"Error fetching {task.name}: {str(e)}")
+            results[task.name] = False
+    return results
+
+
+def run_transform_stage(tasks: List[DatasetTask], profiler: Optional[StageProfiler] = None) -> Dict[str, bool]:
+    """Transforms each archived dataset and stages its tables"""
+    results = {}
+    for task in tasks:
+        raw = restore_raw(task.name)
+        if raw is None:
+            logger.error(f"No archived data for {task.name}, run the fetch stage first")
+            results[task.name] = False
+            continue
+        try:
+            logger.info(f"Processing data for {task.name}...")
+            with profile_stage(profiler, 'transform', task.name):
+                dataframes = task.transform(raw) or {}
+            staged = {
+                table_key: stage_dataframe(table_key, df)
+                for table_key, df in dataframes.items() if df is not None
+            }
+            for table_key in task.optional_tables:
+                if table_key not in staged:
+                    # Keep the load stage from loading an earlier run's copy
+                    remove_staged(table_key)
+            results[task.name] = (bool(staged) and all(staged.values())
+                                  and all(table_key in staged for table_key in task.required_tables))
+            logger.info(f"Staged {len(staged)} table(s) for {task.name}")
+        except Exception as e:
+            logger.error(f"Error processing {task.name}: {str(e)}")
+            results[task.name] = False
+        finally:
+            if task.cleanup:
+                try:
+                    task.cleanup(raw)
+                except Exception as e:
+                    logger.warning(f"Could not clean up after {task.name}: {str(e)}")
+    return results
+
+
+def run_load_stage(engine: Any, tasks: List[DatasetTask], table_mapping: Dict[str, str],
+                   profiler: Optional[StageProfiler] = None) -> Dict[str, bool]:
+    """Loads each dataset's staged tables and refreshes the views over them"""
+    materialized_queries = discover_materialized_queries()
+    loaded_tables = []
+    results = {}
+    for task in tasks:
+        task_success = True
+        for table_key in task.tables:
+            file_path = staging_path(table_key)
+            if not os.path.exists(file_path):
+                if table_key in task.optional_tables:
+                    logger.warning(f"No staged data for the optional table {table_key}, skipping it")
+                    continue
+                logger.error(f"No staged data for {table_key}, run the transform stage first")
+                task_success = False
+                continue
+            df = pd.read_parquet(file_path)
+            with profile_stage(profiler, 'load', table_key):
+                _, success = load_single_df((table_key, df), table_mapping, engine, materialized_queries)
+            del df
+            if success:
+                loaded_tables.append(table_mapping[table_key])
+            task_success = task_success and success
+        results[task.name] = task_success
+
+    refresh_views_for_tables(engine, loaded_tables, materialized_queries)
+    return results
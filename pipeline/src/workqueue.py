@@ -0,0 +1,507 @@
+# pipeline/src/workqueue.py
+"""
+Postgres-backed work queue for scaling a pipeline run out across processes.
+
+In queue mode run_pipeline does not fetch anything itself. It enqueues one
+task per dataset into `pipeline_tasks` and waits for worker processes
+(`pipeline.py --worker`, any number of them on any node) to work through
+the queue:
+
+- endpoint: reads an API endpoint's record count and enqueues a pages task
+  per range of WORK_QUEUE_CONFIG['pages_per_task'] pages
+- pages: fetches one page range and stores the rows
+- fetch: fetches a whole dataset at once (the projects workbook)
+- load: once every other task of its dataset is done, transforms the stored
+  payloads and loads the dataset's tables
+
+Payloads travel between workers through `pipeline_task_results`, so nothing
+beyond the database we already run is needed. Workers claim tasks with
+FOR UPDATE SKIP LOCKED and hold a lease that a heartbeat keeps extending. A
+worker that dies loses its lease and the task is claimed again; failed tasks
+are retried with a growing delay up to max_attempts.
+"""
+
+import json
+import logging
+import os
+import signal
+import socket
+import tempfile
+import threading
+import time
+import uuid
+import zlib
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine.base import Engine
+
+from config import API_CONFIG, TABLES, WORK_QUEUE_CONFIG
+from executor import DatasetTask, load_single_df
+from fetcher import create_api_config, fetch_page_data, fetch_record_count
+from materializer import discover_materialized_queries, refresh_views_for_tables
+from metrics import pop_fetch_totals
+from run_history import RunRecorder
+
+logger = logging.getLogger(__name__)
+
+TASKS_TABLE = WORK_QUEUE_CONFIG['tasks_table']
+RESULTS_TABLE = WORK_QUEUE_CONFIG['results_table']
+
+CREATE_TABLES_SQL = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {TASKS_TABLE} (
+        task_id BIGSERIAL PRIMARY KEY,
+        batch_id VARCHAR(32) NOT NULL,
+        run_id INTEGER,
+        kind VARCHAR(16) NOT NULL,
+        dataset VARCHAR(128) NOT NULL,
+        params JSONB NOT NULL DEFAULT '{{}}',
+        status VARCHAR(16) NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        max_attempts INTEGER NOT NULL,
+        available_at TIMESTAMP NOT NULL DEFAULT now(),
+        leased_until TIMESTAMP,
+        worker_id VARCHAR(128),
+        error TEXT,
+        created_at TIMESTAMP NOT NULL DEFAULT now(),
+        finished_at TIMESTAMP
+    )
+    """,
+    f"""
+    CREATE TABLE IF NOT EXISTS {RESULTS_TABLE} (
+        task_id BIGINT PRIMARY KEY REFERENCES {TASKS_TABLE} (task_id) ON DELETE CASCADE,
+        encoding VARCHAR(16) NOT NULL,
+        payload BYTEA NOT NULL
+    )
+    """,
+    f"CREATE INDEX IF NOT EXISTS {TASKS_TABLE}_claim_idx ON {TASKS_TABLE} (status, available_at)",
+    f"CREATE INDEX IF NOT EXISTS {TASKS_TABLE}_batch_idx ON {TASKS_TABLE} (batch_id, dataset)"
+]
+
+# A load task is claimable only once the other tasks of its dataset have finished
+CLAIM_SQL = f"""
+    WITH next AS (
+        SELECT t.task_id
+        FROM {TASKS_TABLE} t
+        WHERE ((t.status = 'pending' AND t.available_at <= now())
+               OR (t.status = 'running' AND t.leased_until < now()))
+          AND t.attempts < t.max_attempts
+          AND t.dataset = ANY(:datasets)
+          AND (t.kind <> 'load' OR NOT EXISTS (
+              SELECT 1 FROM {TASKS_TABLE} d
+              WHERE d.batch_id = t.batch_id AND d.dataset = t.dataset
+                AND d.kind <> 'load' AND d.status IN ('pending', 'running')
+          ))
+        ORDER BY t.task_id
+        LIMIT 1
+        FOR UPDATE OF t SKIP LOCKED
+    )
+    UPDATE {TASKS_TABLE} t
+    SET status = 'running', attempts = t.attempts + 1, worker_id = :worker_id,
+        leased_until = now() + make_interval(secs => :lease_seconds)
+    FROM next
+    WHERE t.task_id = next.task_id
+    RETURNING t.task_id, t.batch_id, t.run_id, t.kind, t.dataset, t.params, t.attempts, t.max_attempts
+"""
+
+
+def encode_payload(raw: Any):
+    """Encodes a fetched payload for storage: files as their bytes, anything else as compressed JSON"""
+    if isinstance(raw, str) and os.path.isfile(raw):
+        with open(raw, 'rb') as f:
+            return os.path.splitext(raw)[1] or '.bin', f.read()
+    return 'json', zlib.compress(json.dumps(raw, default=str).encode('utf-8'))
+
+
+def decode_payload(encoding: str, payload: bytes) -> Any:
+    """Reverses encode_payload; files come back as a temporary file path"""
+    if encoding == 'json':
+        return json.loads(zlib.decompress(payload))
+    fd, tmp_path = tempfile.mkstemp(suffix=encoding)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(payload)
+    return tmp_path
+
+
+class WorkQueue:
+    """Enqueues runs and waits for them to finish, from the scheduling process"""
+
+    def __init__(self, engine: Engine, poll_interval: float = WORK_QUEUE_CONFIG['poll_interval']):
+        self.engine = engine
+        self.poll_interval = poll_interval
+
+    def ensure_tables(self):
+        with self.engine.begin() as conn:
+            for statement in CREATE_TABLES_SQL:
+                conn.execute(text(statement))
+
+    def enqueue(self, tasks: List[DatasetTask], run_id: Optional[int] = None) -> str:
+        """Enqueues a run of the given datasets and returns its batch id"""
+        self.ensure_tables()
+        batch_id = uuid.uuid4().hex
+        rows = []
+        for task in tasks:
+            kind = 'endpoint' if task.name in API_CONFIG['endpoints'] else 'fetch'
+            rows.append({'dataset': task.name, 'kind': kind})
+            rows.append({'dataset': task.name, 'kind': 'load'})
+
+        with self.engine.begin() as conn:
+            # Old runs are kept for a while to inspect failures, then removed with their payloads
+            conn.execute(
+                text(f"DELETE FROM {TASKS_TABLE} WHERE created_at < now() - make_interval(days => :days)"),
+                {'days': WORK_QUEUE_CONFIG['retention_days']}
+            )
+            conn.execute(
+                text(f"INSERT INTO {TASKS_TABLE} (batch_id, run_id, kind, dataset, max_attempts) "
+                     f"VALUES (:batch_id, :run_id, :kind, :dataset, :max_attempts)"),
+                [
+                    {**row, 'batch_id': batch_id, 'run_id': run_id, 'max_attempts': WORK_QUEUE_CONFIG['max_attempts']}
+                    for row in rows
+                ]
+            )
+        logger.info(f"Enqueued batch {batch_id} for {[task.name for task in tasks]}")
+        return batch_id
+
+    def wait(self, batch_id: str) -> Dict[str, bool]:
+        """Blocks until every task of the batch has finished and returns {dataset: success}"""
+        last_remaining = None
+        while True:
+            with self.engine.connect() as conn:
+                rows = conn.execute(
+                    text(f"SELECT dataset, kind, status, attempts, max_attempts, leased_until < now() AS expired "
+                         f"FROM {TASKS_TABLE} WHERE batch_id = :batch_id"),
+                    {'batch_id': batch_id}
+                ).fetchall()
+
+            # An expired lease after the last attempt is never claimed again
+            remaining = [
+                row for row in rows
+                if row.status == 'pending' or (row.status == 'running' and not (row.expired and row.attempts >= row.max_attempts))
+            ]
+            if not remaining:
+                return {
+                    row.dataset: row.status == 'done'
+                    for row in rows if row.kind == 'load'
+                }
+            if len(remaining) != last_remaining:
+                logger.info(f"Waiting on {len(remaining)} of {len(rows)} tasks in batch {batch_id}")
+                last_remaining = len(remaining)
+            time.sleep(self.poll_interval)
+
+    def run(self, tasks: List[DatasetTask], run_id: Optional[int] = None) -> Dict[str, bool]:
+        """Runs tasks through the queue and returns the load result per table key, like PipelineExecutor.run"""
+        dataset_results = self.wait(self.enqueue(tasks, run_id))
+        return {
+            table_key: dataset_results.get(task.name, False)
+            for task in tasks for table_key in task.tables
+        }
+
+
+class LeaseLost(Exception):
+    """Raised when a task's lease expired and another worker may have claimed it"""
+
+
+class QueueWorker:
+    """
+    Claims and executes queued tasks until stopped. `tasks` maps dataset
+    names to the DatasetTask whose fetch and transform the worker runs; the
+    worker only claims tasks of those datasets (`--worker --only ...`), so
+    the others wait for a worker that can run them.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        tasks: Dict[str, DatasetTask],
+        worker_id: Optional[str] = None,
+        lease_seconds: int = WORK_QUEUE_CONFIG['lease_seconds'],
+        poll_interval: float = WORK_QUEUE_CONFIG['poll_interval']
+    ):
+        self.engine = engine
+        self.tasks = tasks
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+
+    def stop(self, *_):
+        logger.info(f"Worker {self.worker_id} stopping after the current task")
+        self._stop.set()
+
+    def run_forever(self):
+        WorkQueue(self.engine).ensure_tables()
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, self.stop)
+        logger.info(f"Worker {self.worker_id} polling {TASKS_TABLE}")
+        while not self._stop.is_set():
+            try:
+                if not self.run_next():
+                    self._stop.wait(self.poll_interval)
+            except Exception as e:
+                # Lost connections and the like: back off and keep polling
+                logger.error(f"Worker {self.worker_id} error: {str(e)}")
+                self._stop.wait(self.poll_interval)
+
+    def claim(self) -> Optional[Dict[str, Any]]:
+        with self.engine.begin() as conn:
+            conn.execute(
+                text(f"UPDATE {TASKS_TABLE} SET status = 'failed', finished_at = now(), "
+                     f"error = COALESCE(error, 'Lease expired after the last attempt') "
+                     f"WHERE status = 'running' AND leased_until < now() AND attempts >= max_attempts")
+            )
+            row = conn.execute(
+                text(CLAIM_SQL),
+                {'worker_id': self.worker_id, 'lease_seconds': self.lease_seconds, 'datasets': list(self.tasks)}
+            ).first()
+        return dict(row._mapping) if row else None
+
+    def run_next(self) -> bool:
+        """Claims and executes one task. Returns False when there was nothing to claim."""
+        claimed = self.claim()
+        if claimed is None:
+            return False
+
+        task_id = claimed['task_id']
+        logger.info(f"Worker {self.worker_id} running {claimed['kind']} task {task_id} for {claimed['dataset']} "
+                    f"(attempt {claimed['attempts']}/{claimed['max_attempts']})")
+        heartbeat_stop = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(task_id, heartbeat_stop), daemon=True)
+        heartbeat.start()
+        try:
+            handler = getattr(self, f"_run_{claimed['kind']}")
+            handler(claimed)
+        except LeaseLost as e:
+            logger.warning(str(e))
+        except Exception as e:
+            logger.error(f"{claimed['kind']} task {task_id} for {claimed['dataset']} failed: {str(e)}")
+            self._fail(task_id, str(e))
+        finally:
+            heartbeat_stop.set()
+            heartbeat.join()
+        return True
+
+    def _heartbeat(self, task_id: int, stop: threading.Event):
+        while not stop.wait(WORK_QUEUE_CONFIG['heartbeat_interval']):
+            try:
+                with self.engine.begin() as conn:
+                    conn.execute(
+                        text(f"UPDATE {TASKS_TABLE} SET leased_until = now() + make_interval(secs => :lease_seconds) "
+                             f"WHERE task_id = :task_id AND worker_id = :worker_id AND status = 'running'"),
+                        {'task_id': task_id, 'worker_id': self.worker_id, 'lease_seconds': self.lease_seconds}
+                    )
+            except Exception as e:
+                logger.warning(f"Could not extend the lease of task {task_id}: {str(e)}")
+
+    def _complete(self, conn, task_id: int):
+        updated = conn.execute(
+            text(f"UPDATE {TASKS_TABLE} SET status = 'done', finished_at = now(), leased_until = NULL, error = NULL "
+                 f"WHERE task_id = :task_id AND worker_id = :worker_id AND status = 'running'"),
+            {'task_id': task_id, 'worker_id': self.worker_id}
+        ).rowcount
+        if not updated:
+            # Rolls back the surrounding transaction, including any results written in it
+            raise LeaseLost(f"Lost the lease on task {task_id}, discarding its result")
+
+    def _fail(self, task_id: int, error: str, retry: bool = True):
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(
+                    text(f"UPDATE {TASKS_TABLE} SET "
+                         f"status = CASE WHEN :retry AND attempts < max_attempts THEN 'pending' ELSE 'failed' END, "
+                         f"available_at = now() + make_interval(secs => :retry_delay * attempts), "
+                         f"finished_at = CASE WHEN :retry AND attempts < max_attempts THEN NULL ELSE now() END, "
+                         f"leased_until = NULL, error = :error "
+                         f"WHERE task_id = :task_id AND worker_id = :worker_id AND status = 'running'"),
+                    {
+                        'task_id': task_id,
+                        'worker_id': self.worker_id,
+                        'retry': retry,
+                        'retry_delay': WORK_QUEUE_CONFIG['retry_delay'],
+                        'error': error[:2000]
+                    }
+                )
+        except Exception as e:
+            logger.error(f"Could not record the failure of task {task_id}: {str(e)}")
+
+    def _recorder(self, claimed: Dict[str, Any]) -> RunRecorder:
+        recorder = RunRecorder(self.engine)
+        recorder.run_id = claimed['run_id']
+        return recorder
+
+    def _store_result(self, claimed: Dict[str, Any], raw: Any, rows: Optional[int],
+                      totals: Dict[str, int], started_at: datetime):
+        encoding, payload = encode_payload(raw)
+        with self.engine.begin() as conn:
+            conn.execute(
+                text(f"INSERT INTO {RESULTS_TABLE} (task_id, encoding, payload) VALUES (:task_id, :encoding, :payload) "
+                     f"ON CONFLICT (task_id) DO UPDATE SET encoding = EXCLUDED.encoding, payload = EXCLUDED.payload"),
+                {'task_id': claimed['task_id'], 'encoding': encoding, 'payload': payload}
+            )
+            self._complete(conn, claimed['task_id'])
+        self._recorder(claimed).record_stage(
+            'fetch',
+            started_at=started_at,
+            finished_at=datetime.now(),
+            status='success',
+            dataset=claimed['dataset'],
+            rows=rows,
+            num_bytes=totals['bytes'],
+            retries=totals['retries'],
+            failures=totals['failures']
+        )
+
+    def _run_endpoint(self, claimed: Dict[str, Any]):
+        """Splits an API endpoint into page-range tasks"""
+        config = create_api_config(claimed['dataset'])
+        count = fetch_record_count(config)
+        pop_fetch_totals(claimed['dataset'])
+        if count is None:
+            raise RuntimeError("Could not read the record count")
+
+        total_pages = (count + config.records_per_page - 1) // config.records_per_page
+        pages_per_task = WORK_QUEUE_CONFIG['pages_per_task']
+        ranges = [
+            {'first_page': first, 'last_page': min(first + pages_per_task - 1, total_pages)}
+            for first in range(1, total_pages + 1, pages_per_task)
+        ]
+        with self.engine.begin() as conn:
+            if ranges:
+                conn.execute(
+                    text(f"INSERT INTO {TASKS_TABLE} (batch_id, run_id, kind, dataset, params, max_attempts) "
+                         f"VALUES (:batch_id, :run_id, 'pages', :dataset, CAST(:params AS JSONB), :max_attempts)"),
+                    [
+                        {
+                            'batch_id': claimed['batch_id'],
+                            'run_id': claimed['run_id'],
+                            'dataset': claimed['dataset'],
+                            'params': json.dumps(page_range),
+                            'max_attempts': claimed['max_attempts']
+                        }
+                        for page_range in ranges
+                    ]
+                )
+            self._complete(conn, claimed['task_id'])
+        logger.info(f"Split {claimed['dataset']} ({count} records) into {len(ranges)} page-range tasks")
+
+    def _run_pages(self, claimed: Dict[str, Any]):
+        """Fetches one page range of an API endpoint"""
+        started_at = datetime.now()
+        config = create_api_config(claimed['dataset'])
+        params = claimed['params']
+        pop_fetch_totals(claimed['dataset'])
+        rows = []
+        totals = {'pages': 0, 'bytes': 0, 'retries': 0, 'failures': 0}
+        for page in range(params['first_page'], params['last_page'] + 1):
+            rows.extend(fetch_page_data(config, page))
+            page_totals = pop_fetch_totals(claimed['dataset'])
+            for key in totals:
+                totals[key] += page_totals[key]
+            # fetch_page_data returns an empty page after its last retry; retry the whole range instead
+            if page_totals['failures']:
+                raise RuntimeError(f"Page {page} failed after {API_CONFIG['max_retries']} retries")
+        self._store_result(claimed, rows, len(rows), totals, started_at)
+
+    def _run_fetch(self, claimed: Dict[str, Any]):
+        """Fetches a whole dataset in one go"""
+        started_at = datetime.now()
+        task = self.tasks[claimed['dataset']]
+        pop_fetch_totals(claimed['dataset'])
+        raw = task.fetch()
+        totals = pop_fetch_totals(claimed['dataset'])
+        if raw is None:
+            raise RuntimeError("No data fetched")
+        try:
+            self._store_result(claimed, raw, None, totals, started_at)
+        finally:
+            if task.cleanup:
+                task.cleanup(raw)
+
+    def _run_load(self, claimed: Dict[str, Any]):
+        """Transforms the stored payloads of a dataset and loads its tables"""
+        task = self.tasks[claimed['dataset']]
+        recorder = self._recorder(claimed)
+        with self.engine.connect() as conn:
+            failed = conn.execute(
+                text(f"SELECT COUNT(*) FROM {TASKS_TABLE} WHERE batch_id = :batch_id AND dataset = :dataset "
+                     f"AND kind <> 'load' AND status = 'failed'"),
+                {'batch_id': claimed['batch_id'], 'dataset': claimed['dataset']}
+            ).scalar()
+            if failed:
+                self._fail(claimed['task_id'], f"{failed} fetch task(s) failed", retry=False)
+                return
+            results = conn.execute(
+                text(f"SELECT r.encoding, r.payload FROM {RESULTS_TABLE} r "
+                     f"JOIN {TASKS_TABLE} t ON t.task_id = r.task_id "
+                     f"WHERE t.batch_id = :batch_id AND t.dataset = :dataset "
+                     f"ORDER BY (t.params->>'first_page')::INTEGER NULLS FIRST, t.task_id"),
+                {'batch_id': claimed['batch_id'], 'dataset': claimed['dataset']}
+            ).fetchall()
+
+        if task.name in API_CONFIG['endpoints']:
+            # Reassemble the page ranges into the payload fetch_wb_endppoints would have returned
+            rows = []
+            for result in results:
+                rows.extend(decode_payload(result.encoding, result.payload))
+            raw = {'count': len(rows), 'data': rows}
+            del rows
+        elif results:
+            raw = decode_payload(results[0].encoding, results[0].payload)
+        else:
+            raise RuntimeError("No fetched data found")
+        del results
+
+        started_at = datetime.now()
+        try:
+            dataframes = task.transform(raw) or {}
+        finally:
+            if task.cleanup:
+                task.cleanup(raw)
+        del raw
+        dataframes = {table_key: df for table_key, df in dataframes.items() if df is not None}
+        recorder.record_stage(
+            'transform',
+            started_at=started_at,
+            finished_at=datetime.now(),
+            status='success' if dataframes else 'failed',
+            dataset=task.name,
+            rows=sum(len(df) for df in dataframes.values())
+        )
+        if not dataframes:
+            raise RuntimeError("Transform produced no tables")
+
+        materialized_queries = discover_materialized_queries()
+        loaded_tables, failed_tables = [], []
+        for table_key in list(dataframes):
+            df = dataframes.pop(table_key)
+            num_rows = len(df)
+            started_at = datetime.now()
+            _, success = load_single_df((table_key, df), TABLES, self.engine, materialized_queries)
+            del df
+            recorder.record_stage(
+                'load',
+                started_at=started_at,
+                finished_at=datetime.now(),
+                status='success' if success else 'failed',
+                dataset=task.name,
+                table_name=TABLES.get(table_key, table_key),
+                rows=num_rows
+            )
+            if success:
+                loaded_tables.append(TABLES[table_key])
+            else:
+                failed_tables.append(table_key)
+        refresh_views_for_tables(self.engine, loaded_tables, materialized_queries)
+        if failed_tables:
+            raise RuntimeError(f"Failed to load {failed_tables}")
+
+        with self.engine.begin() as conn:
+            self._complete(conn, claimed['task_id'])
+            # The payloads are no longer needed once the dataset is loaded
+            conn.execute(
+                text(f"DELETE FROM {RESULTS_TABLE} WHERE task_id IN ("
+                     f"SELECT task_id FROM {TASKS_TABLE} WHERE batch_id = :batch_id AND dataset = :dataset)"),
+                {'batch_id': claimed['batch_id'], 'dataset': claimed['dataset']}
+            )
+        logger.info(f"Loaded {loaded_tables} for {task.name}")
@@ -0,0 +1,12 @@
+# pipeline/tests/conftest.py
+"""
+The pipeline modules import each other as top-level modules (the container
+runs them from src/), so the tests put src/ on the path the same way.
+"""
+
+import sys
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parents[1] / 'src'
+
+sys.path.insert(0, str(SRC_DIR))
@@ -0,0 +1,78 @@
+# pipeline/tests/test_enrichment_failures.py
+import pandas as pd
+
+import enrichment
+import executor
+import pipeline
+import stages
+from executor import DatasetTask
+from plugins import SourcePlugin, build_dataset_tasks
+from sources import enrich_project_relationships
+
+
+def projects_task(enrich=enrich_project_relationships):
+    return DatasetTask(
+        name='projects',
+        fetch=lambda: {'data': []},
+        transform=lambda raw: enrich('projects', {
+            'world_bank_projects': pd.DataFrame({'project_id': ['P1'], 'project_id_url': ['https://x/P1']})
+        }),
+        tables=['world_bank_projects', 'project_relationships'],
+        optional_tables=['project_relationships']
+    )
+
+
+def fail_scraping(monkeypatch):
+    def scrape(*args, **kwargs):
+        raise RuntimeError('browser crashed')
+
+    monkeypatch.setattr(enrichment, 'enrich_dataframe_with_relationships', scrape)
+
+
+def test_enriched_tables_are_optional():
+    plugins = [
+        SourcePlugin(name='projects_excel', datasets={'projects': ['world_bank_projects']},
+                     fetch='sources:fetch_projects_excel', transform='sources:transform_projects_excel'),
+        SourcePlugin(name='project_relationships', enriches='projects',
+                     enrich='sources:enrich_project_relationships', tables=['project_relationships'])
+    ]
+
+    task, = build_dataset_tasks(plugins=plugins)
+
+    assert task.tables == ['world_bank_projects', 'project_relationships']
+    assert task.required_tables == ['world_bank_projects']
+
+
+def test_failed_scraping_keeps_the_projects_dataset_successful(monkeypatch):
+    fail_scraping(monkeypatch)
+    monkeypatch.setattr(executor, 'discover_materialized_queries', lambda: [])
+    monkeypatch.setattr(executor, 'load_single_df', lambda item, *args: (item[0], True))
+    monkeypatch.setattr(pipeline, 'build_dataset_tasks', lambda datasets=None: [projects_task()])
+
+    results = pipeline.run_pipeline(engine=None)
+
+    assert results == {'projects': True}
+
+
+def test_failed_scraping_keeps_the_transform_stage_successful(monkeypatch, tmp_path):
+    fail_scraping(monkeypatch)
+    stale = tmp_path / 'project_relationships.parquet'
+    stale.write_bytes(b'from an earlier run')
+    monkeypatch.setattr(stages, 'restore_raw', lambda dataset: {'data': []})
+    monkeypatch.setattr(stages, 'stage_dataframe',
+                        lambda table_key, df: df.to_parquet(tmp_path / f"{table_key}.parquet") is None)
+    monkeypatch.setattr(stages, 'remove_staged', lambda table_key: (tmp_path / f"{table_key}.parquet").unlink())
+
+    results = stages.run_transform_stage([projects_task()])
+
+    assert results == {'projects': True}
+    assert not stale.exists()
+    assert (tmp_path / 'world_bank_projects.parquet').exists()
+
+
+def test_missing_required_table_still_fails_the_dataset(monkeypatch):
+    monkeypatch.setattr(executor, 'discover_materialized_queries', lambda: [])
+    monkeypatch.setattr(executor, 'load_single_df', lambda item, *args: (item[0], item[0] != 'world_bank_projects'))
+    monkeypatch.setattr(pipeline, 'build_dataset_tasks', lambda datasets=None: [projects_task(lambda name, dfs: dfs)])
+
+    assert pipeline.run_pipeline(engine=None) == {'projects': False}
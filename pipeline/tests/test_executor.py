@@ -0,0 +1,125 @@
+# pipeline/tests/test_executor.py
+import threading
+
+import pandas as pd
+
+import executor
+from executor import DatasetTask, PipelineExecutor
+from memory import MemoryBudget
+
+
+def make_task(name):
+    return DatasetTask(
+        name=name,
+        fetch=lambda: {'data': [{'id': 1}]},
+        transform=lambda raw: {name: pd.DataFrame(raw['data'])},
+        tables=[name]
+    )
+
+
+def run_with_timeout(pipeline, tasks, timeout=30):
+    results = {}
+    thread = threading.Thread(target=lambda: results.update(pipeline.run(tasks)), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), 'run() did not return'
+    return results
+
+
+def test_run_returns_when_load_step_raises(monkeypatch):
+    monkeypatch.setattr(executor, 'discover_materialized_queries', lambda: [])
+
+    def load_single_df(item, table_mapping, engine, materialized_queries=()):
+        if item[0] == 'broken':
+            raise RuntimeError('connection lost')
+        return item[0], True
+
+    monkeypatch.setattr(executor, 'load_single_df', load_single_df)
+    names = ['broken', 'first', 'second', 'third']
+    pipeline = PipelineExecutor(
+        engine=None,
+        table_mapping={name: f"wb_{name}" for name in names},
+        fetch_workers=1,
+        transform_workers=1,
+        queue_size=1
+    )
+
+    results = run_with_timeout(pipeline, [make_task(name) for name in names])
+
+    assert results == {'broken': False, 'first': True, 'second': True, 'third': True}
+
+
+def test_run_returns_when_transform_stage_raises(monkeypatch):
+    monkeypatch.setattr(executor, 'discover_materialized_queries', lambda: [])
+    monkeypatch.setattr(executor, 'load_single_df', lambda item, *args: (item[0], True))
+    record_transform_output = executor.record_transform_output
+
+    def record_or_fail(table_key, df):
+        if table_key == 'broken':
+            raise RuntimeError('measuring failed')
+        return record_transform_output(table_key, df)
+
+    monkeypatch.setattr(executor, 'record_transform_output', record_or_fail)
+    names = ['broken', 'first', 'second']
+    pipeline = PipelineExecutor(
+        engine=None,
+        table_mapping={name: f"wb_{name}" for name in names},
+        fetch_workers=1,
+        transform_workers=1,
+        queue_size=1
+    )
+
+    results = run_with_timeout(pipeline, [make_task(name) for name in names])
+
+    assert results == {'broken': False, 'first': True, 'second': True}
+
+
+def test_run_returns_when_spilling_fails(monkeypatch, tmp_path):
+    monkeypatch.setattr(executor, 'discover_materialized_queries', lambda: [])
+    monkeypatch.setattr(executor, 'load_single_df', lambda item, *args: (item[0], True))
+    # A file where the spill directory should be
+    (tmp_path / 'spill').write_text('')
+    budget = MemoryBudget(budget_bytes=1, spill_dir=str(tmp_path / 'spill' / 'dir'))
+    names = ['first', 'second']
+    pipeline = PipelineExecutor(
+        engine=None,
+        table_mapping={name: f"wb_{name}" for name in names},
+        fetch_workers=1,
+        transform_workers=1,
+        queue_size=1,
+        budget=budget
+    )
+
+    results = run_with_timeout(pipeline, [make_task(name) for name in names])
+
+    # Data that cannot be spilled stays in memory and is loaded as usual
+    assert results == {'first': True, 'second': True}
+    assert not budget.in_flight
+
+
+def test_failed_hand_over_releases_the_dataset(monkeypatch):
+    monkeypatch.setattr(executor, 'discover_materialized_queries', lambda: [])
+    monkeypatch.setattr(executor, 'load_single_df', lambda item, *args: (item[0], True))
+    budget = MemoryBudget(budget_bytes=1)
+
+    def spill(name, data):
+        if name == 'broken':
+            raise OSError('spill failed')
+        return data
+
+    monkeypatch.setattr(budget, 'should_spill', lambda: True)
+    monkeypatch.setattr(budget, 'spill', spill)
+    names = ['broken', 'first']
+    pipeline = PipelineExecutor(
+        engine=None,
+        table_mapping={name: f"wb_{name}" for name in names},
+        fetch_workers=1,
+        transform_workers=1,
+        queue_size=1,
+        budget=budget
+    )
+
+    results = run_with_timeout(pipeline, [make_task(name) for name in names])
+
+    assert results == {'broken': False, 'first': True}
+    assert not budget.in_flight
@@ -0,0 +1,81 @@
+# pipeline/tests/test_k8s_manifests.py
+import posixpath
+from pathlib import Path
+
+import pytest
+
+from config import MATERIALIZED_VIEWS_CONFIG, SCHEDULE_CONFIG, SCRAPE_CACHE_CONFIG, STAGE_CONFIG
+
+REPO_DIR = Path(__file__).resolve().parents[2]
+K8S_MANIFEST = REPO_DIR / 'k8s' / 'pipeline-deployment.yaml'
+
+
+@pytest.fixture
+def k8s_pods():
+    """Pod specs of the k8s pipeline deployments by container name"""
+    yaml = pytest.importorskip('yaml')
+    if not K8S_MANIFEST.exists():
+        pytest.skip('k8s manifests are not part of this checkout')
+    documents = list(yaml.safe_load_all(K8S_MANIFEST.read_text()))
+    claims = {doc['metadata']['name'] for doc in documents if doc['kind'] == 'PersistentVolumeClaim'}
+    pods = {}
+    for doc in documents:
+        if doc['kind'] == 'Deployment':
+            spec = doc['spec']['template']['spec']
+            for container in spec['containers']:
+                pods[container['name']] = (container, spec)
+    return pods, claims
+
+
+def pod_env(container):
+    return {var['name']: var.get('value') for var in container.get('env', [])}
+
+
+def volume_for(path, container, spec):
+    """Returns the pod volume mounted over a path, or None"""
+    mounts = sorted(container.get('volumeMounts', []), key=lambda m: len(m['mountPath']), reverse=True)
+    for mount in mounts:
+        if path == mount['mountPath'] or path.startswith(mount['mountPath'].rstrip('/') + '/'):
+            return next(volume for volume in spec['volumes'] if volume['name'] == mount['name'])
+    return None
+
+
+def test_k8s_scheduler_state_is_on_a_claim(k8s_pods):
+    pods, claims = k8s_pods
+    container, spec = pods['pipeline']
+    state_file = pod_env(container).get('SCHEDULE_STATE_FILE') or SCHEDULE_CONFIG['state_file']
+
+    volume = volume_for(state_file, container, spec)
+    assert volume is not None, f"{state_file} is not on a volume"
+    assert volume.get('persistentVolumeClaim', {}).get('claimName') in claims
+
+
+@pytest.mark.parametrize('name', ['pipeline', 'pipeline-worker'])
+def test_k8s_pods_mount_the_query_library(k8s_pods, name):
+    pods, _ = k8s_pods
+    container, spec = pods[name]
+    queries_dir = pod_env(container).get('QUERIES_DIR') or MATERIALIZED_VIEWS_CONFIG['queries_dir']
+
+    materialized = sorted(
+        str(path.relative_to(REPO_DIR / 'queries'))
+        for path in (REPO_DIR / 'queries').rglob('*.sql')
+        if '@materialize' in path.read_text(encoding='utf-8')
+    )
+    assert materialized
+    for query_path in materialized:
+        volume = volume_for(posixpath.join(queries_dir, query_path), container, spec)
+        assert volume is not None and 'configMap' in volume, f"{query_path} is not mounted in {name}"
+
+
+@pytest.mark.parametrize('path', [
+    SCRAPE_CACHE_CONFIG['path'],
+    STAGE_CONFIG['archive_dir'],
+    STAGE_CONFIG['staging_dir']
+])
+def test_k8s_scheduler_keeps_its_data(k8s_pods, path):
+    pods, claims = k8s_pods
+    container, spec = pods['pipeline']
+
+    volume = volume_for(path, container, spec)
+    assert volume is not None, f"{path} is not on a volume"
+    assert volume.get('persistentVolumeClaim', {}).get('claimName') in claims
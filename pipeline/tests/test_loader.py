@@ -0,0 +1,48 @@
+# pipeline/tests/test_loader.py
+import logging
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine
+
+from config import DATA_VERSION_CONFIG
+from loader import bump_data_version
+
+
+class RecordingEngine:
+    """Stands in for an Engine and keeps the SQL it was asked to run"""
+
+    def __init__(self, version=None):
+        self.statements = []
+        self.version = version
+
+    @contextmanager
+    def begin(self):
+        yield self
+
+    def execute(self, statement, *args):
+        self.statements.append(str(statement))
+        return self
+
+    def scalar(self):
+        return self.version
+
+
+def test_bump_draws_the_version_from_the_sequence_in_one_statement():
+    engine = RecordingEngine(version=42)
+
+    assert bump_data_version(engine, 'wb_projects') == 42
+    assert len(engine.statements) == 1
+    statement = engine.statements[0]
+    assert f"nextval('{DATA_VERSION_CONFIG['sequence']}')" in statement
+    assert 'RETURNING version' in statement
+    assert 'CREATE' not in statement and 'MAX(' not in statement
+
+
+def test_failed_bump_warns_that_the_cache_was_not_invalidated(caplog):
+    # No versions table (or sequence) in this database
+    engine = create_engine('sqlite://')
+
+    with caplog.at_level(logging.WARNING, logger='loader'):
+        assert bump_data_version(engine, 'wb_projects') is None
+    assert any('not invalidated' in record.getMessage() and record.levelno == logging.WARNING
+               for record in caplog.records)
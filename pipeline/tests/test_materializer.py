@@ -0,0 +1,93 @@
+# pipeline/tests/test_materializer.py
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+
+import pytest
+
+from config import MATERIALIZED_VIEWS_CONFIG
+import materializer
+from materializer import (
+    MaterializedQuery,
+    create_materialized_view,
+    discover_materialized_queries,
+    get_materialized_view_name,
+    parse_query_directives,
+)
+
+REPO_DIR = Path(__file__).resolve().parents[2]
+QUERIES_DIR = REPO_DIR / 'queries'
+BACKEND_DIR = REPO_DIR / 'backend'
+
+
+class RecordingEngine:
+    """Stands in for an Engine and keeps the SQL it was asked to run"""
+
+    def __init__(self):
+        self.statements = []
+
+    @contextmanager
+    def begin(self):
+        yield self
+
+    def execute(self, statement, *args):
+        self.statements.append(str(statement))
+
+
+def test_view_row_numbers_follow_order_by_directive():
+    engine = RecordingEngine()
+    mq = MaterializedQuery(
+        query_path='a.sql',
+        view_name='mv_a',
+        sql='SELECT project_id FROM t ORDER BY project_id DESC',
+        order_by='project_id DESC'
+    )
+
+    assert create_materialized_view(engine, mq)
+    assert 'row_number() OVER (ORDER BY project_id DESC)' in engine.statements[0]
+
+
+def test_view_without_order_by_directive_is_unordered():
+    engine = RecordingEngine()
+    mq = MaterializedQuery(query_path='a.sql', view_name='mv_a', sql='SELECT 1')
+
+    assert create_materialized_view(engine, mq)
+    assert 'row_number() OVER ()' in engine.statements[0]
+
+
+def test_ordered_library_queries_declare_their_order():
+    queries = discover_materialized_queries(str(QUERIES_DIR))
+
+    assert queries
+    for mq in queries:
+        if materializer.ORDER_BY_PATTERN.search(mq.sql):
+            assert mq.order_by, f"{mq.query_path} needs an @order_by directive"
+
+
+@pytest.fixture
+def backend_sql_query():
+    if not BACKEND_DIR.exists():
+        pytest.skip('backend sources are not part of this checkout')
+    sys.path.insert(0, str(BACKEND_DIR))
+    try:
+        from app import config
+        from app.services.sql_query import service
+        yield config, service
+    finally:
+        sys.path.remove(str(BACKEND_DIR))
+
+
+def test_backend_matches_pipeline_view_naming(backend_sql_query):
+    config, service = backend_sql_query
+
+    assert config.MATERIALIZED_VIEW_PREFIX == MATERIALIZED_VIEWS_CONFIG['view_prefix']
+    assert config.MATERIALIZED_VIEW_ROW_ID == MATERIALIZED_VIEWS_CONFIG['row_id_column']
+    assert service.DIRECTIVE_PATTERN.pattern == materializer.DIRECTIVE_PATTERN.pattern
+
+    for sql_file in sorted(QUERIES_DIR.rglob('*.sql')):
+        query_path = str(sql_file.relative_to(QUERIES_DIR))
+        sql = sql_file.read_text(encoding='utf-8')
+        assert service.get_materialized_view_name(query_path) == get_materialized_view_name(query_path)
+        assert service.parse_query_directives(sql) == parse_query_directives(sql)
+    long_path = 'Region/' + 'x' * 80 + '.sql'
+    assert service.get_materialized_view_name(long_path) == get_materialized_view_name(long_path)
@@ -0,0 +1,67 @@
+# pipeline/tests/test_memory.py
+import os
+import threading
+
+import pandas as pd
+
+from memory import MemoryBudget, restore
+
+
+def test_failed_parquet_spill_leaves_only_the_pickle(tmp_path, monkeypatch):
+    def write_partial_parquet(self, path, **kwargs):
+        with open(path, 'wb') as f:
+            f.write(b'PAR1')
+        raise ValueError('cannot convert mixed-type column')
+
+    monkeypatch.setattr(pd.DataFrame, 'to_parquet', write_partial_parquet)
+    budget = MemoryBudget(budget_bytes=1, spill_dir=str(tmp_path))
+    df = pd.DataFrame({'value': [1, 'two']})
+
+    spilled = budget.spill('mixed', df)
+
+    assert spilled.kind == 'pickle'
+    assert [path.suffix for path in tmp_path.iterdir()] == ['.pkl']
+    assert restore(spilled).equals(df)
+    assert not os.listdir(tmp_path)
+
+
+def test_failed_spill_keeps_data_in_memory_without_leftovers(tmp_path, monkeypatch):
+    def write_partial(self, path, **kwargs):
+        with open(path, 'wb') as f:
+            f.write(b'partial')
+        raise OSError('disk full')
+
+    monkeypatch.setattr(pd.DataFrame, 'to_parquet', write_partial)
+    monkeypatch.setattr(pd.DataFrame, 'to_pickle', write_partial)
+    budget = MemoryBudget(budget_bytes=1, spill_dir=str(tmp_path))
+    df = pd.DataFrame({'value': [1, 2]})
+
+    assert budget.spill('full', df) is df
+    assert not os.listdir(tmp_path)
+    assert budget.spilled_bytes == 0
+
+
+def test_concurrent_spills_count_every_byte(tmp_path):
+    budget = MemoryBudget(budget_bytes=1, spill_dir=str(tmp_path))
+    payload = {'data': [{'id': i} for i in range(100)]}
+    spilled = []
+
+    def spill(i):
+        spilled.append(budget.spill(f"payload-{i}", payload))
+
+    threads = [threading.Thread(target=spill, args=(i,)) for i in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert budget.spilled_bytes == sum(os.path.getsize(data.path) for data in spilled)
+
+
+def test_spill_into_unusable_directory_keeps_data_in_memory(tmp_path):
+    (tmp_path / 'spill').write_text('')
+    budget = MemoryBudget(budget_bytes=1, spill_dir=str(tmp_path / 'spill' / 'dir'))
+    df = pd.DataFrame({'value': [1, 2]})
+
+    assert budget.spill('blocked', df) is df
+    assert budget.spilled_bytes == 0
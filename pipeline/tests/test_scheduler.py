@@ -0,0 +1,15 @@
+# pipeline/tests/test_scheduler.py
+from datetime import datetime
+
+from scheduler import DatasetScheduler
+
+
+def test_scheduler_state_survives_restarts(tmp_path):
+    # The state file's directory need not exist yet, as on a fresh volume
+    state_file = str(tmp_path / 'state' / 'schedule_state.json')
+    finished_at = datetime(2024, 1, 1, 12, 0)
+    DatasetScheduler(['projects'], lambda names: {}, state_file=state_file).record_results(
+        {'projects': True}, finished_at
+    )
+    restarted = DatasetScheduler(['projects'], lambda names: {}, state_file=state_file)
+    assert not restarted.due_datasets(finished_at)
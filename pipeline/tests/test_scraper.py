@@ -0,0 +1,28 @@
+# pipeline/tests/test_scraper.py
+import pytest
+
+from scraper import has_main_detail
+
+
+@pytest.mark.parametrize('html', [
+    '<div class="main-detail">',
+    "<div id='p1' class='row main-detail'>",
+    '<DIV CLASS = "main-detail col-md-12">',
+    '<div class="row\tmain-detail\n">',
+])
+def test_rendered_pages_have_main_detail(html):
+    assert has_main_detail(html)
+
+
+@pytest.mark.parametrize('html', [
+    '',
+    None,
+    '<div class="x-main-detail">',
+    '<div class="main-details">',
+    '<div class="row main-detail-header">',
+    '<div class="sub_main-detail">',
+    '<span class="main-detail">',
+    '<div data-class="main-detail">',
+])
+def test_incomplete_pages_lack_main_detail(html):
+    assert not has_main_detail(html)
@@ -0,0 +1,19 @@
+# pipeline/tests/test_synthetic.py
+import importlib.util
+from pathlib import Path
+
+from config import TABLES
+
+SYNTHETIC_PATH = Path(__file__).resolve().parents[1] / 'benchmarks' / 'synthetic.py'
+
+
+def load_synthetic():
+    spec = importlib.util.spec_from_file_location('synthetic', SYNTHETIC_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_every_table_has_a_schema():
+    # The generator's default run covers every table in config.TABLES
+    assert sorted(set(TABLES) - set(load_synthetic().SCHEMAS)) == []
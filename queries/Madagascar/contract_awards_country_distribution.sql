@@ -1,3 +1,6 @@
+-- @materialize
+-- @depends_on: wb_contract_awards
+-- @order_by: project_id DESC, supplier_country DESC, to_number(contract_amount, '999,999,999,999.99') DESC, contract_signing_date
 SELECT
 	TO_CHAR(CAST(contract_signing_date AS TIMESTAMP), 'YYYY-MM-DD') AS contract_signing_date,
 	project_id,
@@ -1,3 +1,6 @@
+-- @materialize
+-- @depends_on: wb_contract_awards
+-- @order_by: to_number(supplier_total, '999,999,999,999.99') DESC, project_id, to_number(contract_amount, '999,999,999,999.99') DESC, contract_signing_date
 WITH normalized_suppliers AS (
     SELECT 
         *,
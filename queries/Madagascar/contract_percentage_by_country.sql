@@ -1,3 +1,6 @@
+-- @materialize
+-- @depends_on: wb_contract_awards
+-- @order_by: project_id DESC, supplier_country DESC
 SELECT 
     project_id,
     supplier_country,